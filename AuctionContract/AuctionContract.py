@@ -304,3 +304,14 @@ def getRouter():
         )
 
     return router
+
+
+# State views, ABI methods and state schemas live in the PyTeal-free client interface
+try:
+    from .AuctionInterface import (
+        AuctionState, BidderState, auction_global_schema, auction_local_schema, auction_methods, compile_auction)
+except ImportError:
+    from AuctionInterface import (
+        AuctionState, BidderState, auction_global_schema, auction_local_schema, auction_methods, compile_auction)
+
+check_state_views(globals(), AuctionState, BidderState)
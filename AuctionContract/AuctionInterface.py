@@ -0,0 +1,83 @@
+import sys
+
+from algosdk.abi import Contract
+from algosdk.future import transaction
+
+from nam.artifacts import find_bundle
+from util import *
+
+# Client-side interface of the open auction contract: state layout, ABI methods and state schemas,
+# importable without PyTeal. Bidders, claim bots and monitoring scripts only need this module; the PyTeal contract
+# (AuctionContract) is only imported by compile_auction(), when deploying.
+# The contract checks its state keys against this module, and compile_auction() the methods of its Router.
+
+HAS_NOT_BEEN_PAID = 0
+HAS_BEEN_PAID = 1
+
+# Typed views of the contract's global and local state
+AuctionState = state_view_class("AuctionGlobalState", {
+    "seller": b"seller",
+    "nft_id": b"nft_id",
+    "start_round": b"start",
+    "end_round": b"end",
+    "reserve_amount": b"reserve_amount",
+    "min_bid_increment": b"min_bid_inc",
+    "num_bids": b"num_bids",
+    "lead_bid_amount": b"bid_amount",
+    "lead_bid_account": b"bid_account",
+    "service_fee": b"service_fee",
+    "seller_has_been_paid": b"seller_paid",
+    "winner_has_been_paid": b"winner_paid",
+})
+BidderState = state_view_class("AuctionLocalState", {})
+
+# ABI of the contract, as generated by its Router
+auction_contract = {
+    "name": "AuctionContract",
+    "methods": [
+        {"name": "create_app", "args": [
+            {"type": "account", "name": "seller"},
+            {"type": "uint64", "name": "nftID"},
+            {"type": "uint64", "name": "startRound"},
+            {"type": "uint64", "name": "endRound"},
+            {"type": "uint64", "name": "reserve"},
+            {"type": "uint64", "name": "minBidIncrement"},
+            {"type": "uint64", "name": "serviceFee"},
+        ], "returns": {"type": "string"}},
+        {"name": "on_setup", "args": [], "returns": {"type": "void"}},
+        {"name": "on_bid", "args": [], "returns": {"type": "void"}},
+        {"name": "paySeller", "args": [], "returns": {"type": "void"}},
+        {"name": "payWinner", "args": [], "returns": {"type": "void"}},
+    ],
+}
+
+# ABI methods of the contract, loaded once per process
+auction_methods = get_method_registry("AuctionContract", lambda: Contract.undictify(auction_contract))
+
+# State schema the app is created with (immutable)
+auction_global_schema = transaction.StateSchema(num_uints=10, num_byte_slices=2)
+auction_local_schema = transaction.StateSchema(num_uints=0, num_byte_slices=0)
+
+
+# PyTeal module of the contract, next to this one
+auction_contract_module = "AuctionContract"
+
+
+# Compiles the PyTeal contract to TEAL, reusing the cached output (see compile_router); imports PyTeal.
+# Returns (approval_program, clear_program, contract).
+def compile_auction():
+    contract_module = import_sibling(__name__, auction_contract_module)
+    approval_program, clear_program, contract = compile_router(
+        contract_module.getRouter, version=6, optimize=contract_module.OptimizeOptions(scratch_slots=True))
+    check_methods(auction_methods.contract, contract)
+    return approval_program, clear_program, contract
+
+
+# Approval and clear program bytecode: from the prebuilt artifact bundle (see nam.artifacts) when it is up to date,
+# else compiled from the PyTeal contract
+def auction_programs(client=None):
+    bundle = find_bundle(sys.modules[__name__])
+    if bundle is not None:
+        return bundle.approval_program, bundle.clear_program
+    approval_program, clear_program, _ = compile_auction()
+    return compile_program(client, approval_program), compile_program(client, clear_program)
@@ -2,106 +2,125 @@
 with open('../mnemonic.txt','r') as f:
     creator_mnemonic = f.read()
 
-# user declared algod connection parameters. Node must have EnableDeveloperAPI set to true in its config
-algod_address = "http://localhost:4001"
+# user declared algod connection parameters. Programs are assembled locally, so the developer API is not needed
+# one or more algod nodes: reads are spread over the healthy ones
+algod_addresses = ["http://localhost:4001"]
 algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-
-from AuctionContract import *
+# per-endpoint latency and error metrics of the algod calls made by main() are written there
+metrics_path = "algod_metrics.json"
+
+import os
+import sys
+# the shared nam package lives in the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from AuctionInterface import *
+import AuctionInterface
+from nam.mirror import AuctionMirror, Call
+from nam.metrics import InstrumentedAlgodClient, operation
+from nam.multinode import MultiNodeAlgodClient
 from algosdk.atomic_transaction_composer import AtomicTransactionComposer
 from algosdk.abi import Contract, Method
 from algosdk.logic import get_application_address
 
+# state of the auctions written to by this module, updated from its confirmed calls instead of read back
+mirror = AuctionMirror(AuctionInterface)
+
+@operation("claimWinner")
 def claimWinner(
         client: algod.AlgodClient,
         app_id: int,
         winner_sk: str
 ) -> None:
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     winner_addr = account.address_from_private_key(winner_sk)
     winner_signer = AccountTransactionSigner(winner_sk)
 
-    with open("../test_contract.json") as f:
-        js = f.read()
+    def claim(global_state):
+        nft_id = global_state.nft_id
 
-    atc.add_method_call(app_id=app_id,
-                        method=get_method('payWinner', js),
-                        sender=winner_addr,
-                        sp=suggestedParams,
-                        signer=winner_signer,
-                        foreign_assets=[nft_id],
-                        )
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
+        atc = AtomicTransactionComposer()
+        atc.add_method_call(app_id=app_id,
+                            method=auction_methods.get('payWinner'),
+                            sender=winner_addr,
+                            sp=suggestedParams,
+                            signer=winner_signer,
+                            foreign_assets=[nft_id],
+                            )
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, claim)
+    mirror.confirmed_response(app_id, result, [Call('payWinner', winner_addr)])
 
-    global_state = read_global_state(client, app_id)
-    winnerClaimed = global_state['winner_paid']
+    global_state = mirror.read(client, app_id).state
+    winnerClaimed = global_state.winner_has_been_paid
     print("Winner claimed: ", winnerClaimed)
 
+@operation("claimSeller")
 def claimSeller(
         client: algod.AlgodClient,
         app_id: int,
         seller_sk: str
 ) -> None:
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     seller_addr = account.address_from_private_key(seller_sk)
     seller_signer = AccountTransactionSigner(seller_sk)
 
-    with open("../test_contract.json") as f:
-        js = f.read()
+    def claim(global_state):
+        nft_id = global_state.nft_id
 
-    atc.add_method_call(app_id=app_id,
-                        method=get_method('paySeller', js),
-                        sender=seller_addr,
-                        sp=suggestedParams,
-                        signer=seller_signer,
-                        foreign_assets=[nft_id],
-                        )
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
+        atc = AtomicTransactionComposer()
+        atc.add_method_call(app_id=app_id,
+                            method=auction_methods.get('paySeller'),
+                            sender=seller_addr,
+                            sp=suggestedParams,
+                            signer=seller_signer,
+                            foreign_assets=[nft_id],
+                            )
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, claim)
+    mirror.confirmed_response(app_id, result, [Call('paySeller', seller_addr)])
 
-    global_state = read_global_state(client, app_id)
-    sellerClaimed = global_state['seller_paid']
+    global_state = mirror.read(client, app_id).state
+    sellerClaimed = global_state.seller_has_been_paid
     print("Seller claimed: ", sellerClaimed)
 
+@operation("closeAuction")
 def closeAuction(
         client: algod.AlgodClient,
         app_id: int,
         closer: str,
 ):
-    global_state = read_global_state(client, app_id)
-
-    nft_id = global_state['nft_id']
-
-    accounts: List[str] = [encoding.encode_address(global_state["seller"])]
-
-    if any(global_state["bid_account"]):
-        # if "bid_account" is not the zero address
-        accounts.append(encoding.encode_address(global_state["bid_account"]))
-
-
-    deleteTxn = transaction.ApplicationDeleteTxn(
-        sender=account.address_from_private_key(closer),
-        index=app_id,
-        accounts=accounts,
-        foreign_assets=[nft_id],
-        sp=client.suggested_params(),
-    )
-    signedDeleteTxn = deleteTxn.sign(closer)
-
-    client.send_transaction(signedDeleteTxn)
-    transaction.wait_for_confirmation(client, signedDeleteTxn.get_txid())
+    def close(global_state):
+        nft_id = global_state.nft_id
+
+        accounts: List[str] = [encoding.encode_address(global_state.seller)]
+
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            accounts.append(encoding.encode_address(global_state.lead_bid_account))
+
+        deleteTxn = transaction.ApplicationDeleteTxn(
+            sender=account.address_from_private_key(closer),
+            index=app_id,
+            accounts=accounts,
+            foreign_assets=[nft_id],
+            sp=suggested_params(client),
+        )
+        signedDeleteTxn = deleteTxn.sign(closer)
+
+        client.send_transaction(signedDeleteTxn)
+        transaction.wait_for_confirmation(client, signedDeleteTxn.get_txid())
+        return signedDeleteTxn
+
+    signedDeleteTxn = mirror.write(client, app_id, close)
+    mirror.deleted(app_id)
     print(signedDeleteTxn.get_txid())
 
+@operation("placeBid")
 def placeBid(
         client: algod.AlgodClient,
         app_id: int,
@@ -109,48 +128,50 @@ def placeBid(
         bid_amount: int
 ) -> None:
     app_addr = get_application_address(app_id)
-
-    suggestedParams = client.suggested_params()
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    if any(global_state["bid_account"]):
-        # if "bid_account" is not the zero address
-        prevBidLeader = global_state["bid_account"]
-    else:
-        prevBidLeader = None
-
-    atc = AtomicTransactionComposer()
     bidder_addr = account.address_from_private_key(bidder_sk)
     bidder_signer = AccountTransactionSigner(bidder_sk)
 
-    ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, bid_amount)
-    tws = TransactionWithSigner(ptxn, bidder_signer)
-    atc.add_transaction(tws)
-
-    with open("../test_contract.json") as f:
-        js = f.read()
-    if prevBidLeader == None:
-        atc.add_method_call(app_id=app_id,
-                            method=get_method('on_bid', js),
-                            sender=bidder_addr,
-                            sp=suggestedParams,
-                            signer=bidder_signer,
-                            foreign_assets=[nft_id],
-                            )
-    else:
-        atc.add_method_call(app_id=app_id,
-                            method=get_method('on_bid', js),
-                            sender=bidder_addr,
-                            sp=suggestedParams,
-                            signer=bidder_signer,
-                            foreign_assets=[nft_id],
-                            accounts=[prevBidLeader]
-                            )
-    result = atc.execute(client, 10)
-
-    print("Global state:", read_global_state(client, app_id))
-
+    def bid(global_state):
+        suggestedParams = suggested_params(client)
+        nft_id = global_state.nft_id
+
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            prevBidLeader = global_state.lead_bid_account
+        else:
+            prevBidLeader = None
+
+        atc = AtomicTransactionComposer()
+
+        ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, bid_amount)
+        tws = TransactionWithSigner(ptxn, bidder_signer)
+        atc.add_transaction(tws)
+
+        if prevBidLeader == None:
+            atc.add_method_call(app_id=app_id,
+                                method=auction_methods.get('on_bid'),
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                foreign_assets=[nft_id],
+                                )
+        else:
+            atc.add_method_call(app_id=app_id,
+                                method=auction_methods.get('on_bid'),
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                foreign_assets=[nft_id],
+                                accounts=[prevBidLeader]
+                                )
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, bid)
+    mirror.confirmed_response(app_id, result, [Call('on_bid', bidder_addr, (), bid_amount)])
+
+    print("Global state:", mirror.read(client, app_id).state.as_dict())
+
+@operation("setupAuctionApp")
 def setupAuctionApp(
         client: algod.AlgodClient,
         app_id: int,
@@ -160,7 +181,7 @@ def setupAuctionApp(
 ):
     app_addr = get_application_address(app_id)
 
-    suggestedParams = client.suggested_params()
+    suggestedParams = suggested_params(client)
 
     fundingAmount = (
         # min account balance
@@ -181,9 +202,7 @@ def setupAuctionApp(
     tws = TransactionWithSigner(ptxn, signer_funder)
     atc.add_transaction(tws)
 
-    with open("../test_contract.json") as f:
-        js = f.read()
-    atc.add_method_call(app_id=app_id, method=get_method('on_setup', js), sender=funder_addr,
+    atc.add_method_call(app_id=app_id, method=auction_methods.get('on_setup'), sender=funder_addr,
                         sp=suggestedParams, signer=signer_funder, foreign_assets=[nft_id])
 
     atxn = transaction.AssetTransferTxn(nft_holder_addr, suggestedParams, app_addr, 1, nft_id)
@@ -197,6 +216,7 @@ def setupAuctionApp(
 
 
 
+@operation("createAuctionApp")
 def createAuctionApp(
         algod_client: algod.AlgodClient,
         senderSK: str,
@@ -216,30 +236,8 @@ def createAuctionApp(
     global_schema = transaction.StateSchema(global_ints, global_bytes)
     local_schema = transaction.StateSchema(local_ints, local_bytes)
 
-    # Compile the program
-    router = getRouter()
-    approval_program, clear_program, contract = router.compile_program(version=6,
-                                                                       optimize=OptimizeOptions(scratch_slots=True))
-
-    with open("./auction_approval.teal", "w") as f:
-        f.write(approval_program)
-
-    with open("./auction_clear.teal", "w") as f:
-        f.write(clear_program)
-
-    with open("./auction_contract.json", "w") as f:
-        import json
-
-        f.write(json.dumps(contract.dictify()))
-    with open("../test_contract.json", "w") as f:
-        import json
-
-        f.write(json.dumps(contract.dictify()))
-    # compile program to binary
-    approval_program_compiled = compile_program(algod_client, approval_program)
-
-    # compile program to binary
-    clear_state_program_compiled = compile_program(algod_client, clear_program)
+    # Load the programs from the prebuilt artifact bundle, or compile the PyTeal contract when there is none
+    approval_program_compiled, clear_state_program_compiled = auction_programs(algod_client)
 
     print("--------------------------------------------")
     print("Deploying Auction application......")
@@ -256,16 +254,13 @@ def createAuctionApp(
 
     atc = AtomicTransactionComposer()
     signer = AccountTransactionSigner(senderSK)
-    sp = algod_client.suggested_params()
-
-    with open("../test_contract.json") as f:
-        js = f.read()
+    sp = suggested_params(algod_client)
 
     # Simple call to the `create_app` method, method_args can be any type but _must_
     # match those in the method signature of the contract
     atc.add_method_call(
         app_id=0,
-        method=get_method("create_app", js),
+        method=auction_methods.get("create_app"),
         sender=account.address_from_private_key(senderSK),
         sp=sp,
         signer=signer,
@@ -277,15 +272,15 @@ def createAuctionApp(
     )
 
     result = atc.execute(algod_client, 10)
-    app_id = transaction.wait_for_confirmation(algod_client, result.tx_ids[0])['application-index']
+    app_id = mirror.created(result.abi_results[0].tx_info, account.address_from_private_key(senderSK))
 
     for res in result.abi_results:
         print(res.return_value)
 
-    print("Global state:", read_global_state(algod_client, app_id))
+    print("Global state:", mirror.read(algod_client, app_id).state.as_dict())
 
     assert app_id is not None and app_id > 0
-    return app_id, contract
+    return app_id, auction_methods.contract
 
 def main():
     with open('../mnemonic.txt','r') as f:
@@ -294,8 +289,8 @@ def main():
     creator_address = account.address_from_private_key(creator_private_key)
     print("creator address: ",creator_address)
 
-    # initialize an algodClient
-    algod_client = algod.AlgodClient(algod_token, algod_address)
+    # initialize an algodClient that keeps its connections to the nodes alive and records metrics of every call
+    algod_client = InstrumentedAlgodClient(MultiNodeAlgodClient.from_addresses(algod_token, algod_addresses))
     seller_sk = account.generate_account()[0]
     seller = account.address_from_private_key(seller_sk)
     print("seller address: ",seller)
@@ -304,27 +299,10 @@ def main():
     bidder = account.address_from_private_key(bidder_sk)
     print("bidder address: ",bidder)
 
-    print("sending 1Algo to seller")
-    txn = transaction.PaymentTxn(
-        sender=creator_address,
-        receiver=seller,
-        amt=10000000,
-        sp=algod_client.suggested_params(),
-    )
-    signedTxn = txn.sign(creator_private_key)
-    algod_client.send_transaction(signedTxn)
-    transaction.wait_for_confirmation(algod_client, signedTxn.get_txid())
-
-    print("sending 1Algo to bidder")
-    txn = transaction.PaymentTxn(
-        sender=creator_address,
-        receiver=bidder,
-        amt=12000000,
-        sp=algod_client.suggested_params(),
-    )
-    signedTxn = txn.sign(creator_private_key)
-    algod_client.send_transaction(signedTxn)
-    transaction.wait_for_confirmation(algod_client, signedTxn.get_txid())
+    print("sending 10Algo to seller and 12Algo to bidder")
+    failures = fundAccounts(algod_client, creator_address, creator_private_key,
+                            [(seller, 10000000), (bidder, 12000000)])
+    assert not failures, failures
 
     nftAmount = 1
     nftID = createDummyAsset(algod_client, nftAmount, seller, seller_sk)
@@ -389,5 +367,8 @@ def main():
     print("Closing the Auction application......")
     closeAuction(algod_client, app_id, creator_private_key)
 
+    print(algod_client.metrics.report())
+    algod_client.metrics.dump(metrics_path)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,293 @@
+import base64
+import io
+import json
+import multiprocessing
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+
+import msgpack
+from algosdk.future import transaction
+
+# Minimal stand-in for an algod node, serving just the endpoints used by util.py and the nam package from
+# in-memory state. Each request sleeps for `latency` seconds to mimic the network round-trip to a real node.
+# Connections are kept alive (HTTP/1.1), like a real node does, and closed once idle for idle_timeout seconds
+# when it is set.
+# With block_time set, a new round is produced every block_time seconds and wait-for-block-after blocks until it
+# is; otherwise every wait-for-block-after produces the next round immediately.
+# Submitted transactions are not executed: they are confirmed in the next round, and app/asset creations are
+# given fresh IDs.
+# With rate_limit set, requests beyond rate_limit per second (bursts of one second's worth) are answered with
+# 429 Too Many Requests, like public nodes do.
+# Application deletions remove the app, and `reject` (a function of a transaction returning an error message or
+# None) can make the node refuse groups the way it would refuse transactions the ledger or a contract rejects.
+# `evaluate` (a function of the transactions of a group and the index of one of them, returning a dict or None) can
+# stand in for a contract: what it returns, e.g. a global-state-delta, is added to the pending info of the
+# transaction.
+
+ZERO_ADDRESS = bytes(32)
+
+
+class StandinRejection(Exception):
+    pass
+
+
+def state_entry(key: str, value):
+    entry = {"key": base64.b64encode(key.encode("utf-8")).decode("ascii")}
+    if isinstance(value, bytes):
+        entry["value"] = {"type": 1, "bytes": base64.b64encode(value).decode("ascii"), "uint": 0}
+    else:
+        entry["value"] = {"type": 2, "bytes": "", "uint": value}
+    return entry
+
+
+# Global state shaped like a SealedAuctionContract app
+def sealed_auction_state(app_id: int, start: int = 1000, commit: int = 1010, end: int = 1020):
+    state = {
+        "seller": app_id.to_bytes(32, "big"), "nft_id": app_id + 1, "start": start, "commit": commit,
+        "end": end, "reserve_amount": 100_000, "min_bid_inc": 10_000, "num_bids": 0,
+        "bid_amount": 100_000, "bid_account": ZERO_ADDRESS, "2nd_amount": 100_000, "deposit": 100_000,
+        "auction_type": 1, "service_fee": 2, "seller_paid": 0, "winner_paid": 0,
+    }
+    return [state_entry(k, v) for k, v in state.items()]
+
+
+class AlgodStandin:
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0, block_time: float = 0.0,
+                 rate_limit: float = 0.0, idle_timeout: float = None):
+        self.latency = latency
+        self.idle_timeout = idle_timeout
+        self.block_time = block_time
+        self.rate_limit = rate_limit
+        self._allowance = rate_limit
+        self._allowance_updated = monotonic()
+        self.throttled = 0
+        self.round = 1000
+        self.apps = {}
+        # app_id -> (creator address, base64 approval program)
+        self.app_params = {}
+        self.local_states = {}
+        self.reject = None
+        self.evaluate = None
+        # txid -> pending transaction info
+        self.pending = {}
+        self.next_index = 1_000_000
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._new_round = threading.Condition(self._lock)
+        self._server = _Server((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        if self.block_time:
+            threading.Thread(target=self._produce_blocks, daemon=True).start()
+        return self
+
+    def _produce_blocks(self):
+        while True:
+            sleep(self.block_time)
+            self.advance()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def advance(self, rounds: int = 1):
+        with self._lock:
+            self.round += rounds
+            self._new_round.notify_all()
+
+    # Returns the transaction IDs of the group, or raises StandinRejection when `reject` refuses one of them
+    def submit(self, body: bytes):
+        txids = []
+        with self._lock:
+            txns = [transaction.SignedTransaction.undictify(stxn).transaction
+                    for stxn in msgpack.Unpacker(io.BytesIO(body), raw=False)]
+            for txn in txns:
+                message = self.reject(txn) if self.reject is not None else None
+                if message:
+                    raise StandinRejection("transaction {}: {}".format(txn.get_txid(), message))
+            for i, txn in enumerate(txns):
+                info = {"confirmed-round": self.round + 1, "pool-error": ""}
+                if self.evaluate is not None:
+                    info.update(self.evaluate(txns, i) or {})
+                if txn.type in ("appl", "acfg") and not txn.index:
+                    info["application-index" if txn.type == "appl" else "asset-index"] = self.next_index
+                    self.next_index += 1
+                elif txn.type == "appl" and txn.on_complete == transaction.OnComplete.DeleteApplicationOC:
+                    self.apps.pop(txn.index, None)
+                    self.app_params.pop(txn.index, None)
+                txids.append(txn.get_txid())
+                self.pending[txids[-1]] = info
+        return txids
+
+    def pending_info(self, txid: str):
+        info = dict(self.pending[txid])
+        if info["confirmed-round"] > self.round:
+            info["confirmed-round"] = 0
+        return info
+
+    # Server-side token bucket: False when the request is over the rate limit
+    def admit(self) -> bool:
+        with self._lock:
+            now = monotonic()
+            self._allowance = min(self.rate_limit, self._allowance + (now - self._allowance_updated) * self.rate_limit)
+            self._allowance_updated = now
+            if self._allowance < 1:
+                self.throttled += 1
+                return False
+            self._allowance -= 1
+            return True
+
+    def app_info_params(self, app_id: int) -> dict:
+        creator, approval_program = self.app_params.get(app_id, ("", ""))
+        return {"creator": creator, "approval-program": approval_program, "global-state": self.apps[app_id]}
+
+    def status(self):
+        return {"last-round": self.round, "time-since-last-round": 0, "catchup-time": 0}
+
+    def handle(self, method: str, path: str, body: bytes):
+        path = path.split("?")[0]
+        if path == "/v2/status":
+            return 200, self.status()
+        match = re.fullmatch(r"/v2/status/wait-for-block-after/(\d+)", path)
+        if match:
+            with self._lock:
+                if self.block_time:
+                    self._new_round.wait_for(lambda: self.round > int(match.group(1)))
+                else:
+                    self.round = max(self.round, int(match.group(1)) + 1)
+            return 200, self.status()
+        if path == "/v2/transactions/params":
+            return 200, {"consensus-version": "standin", "fee": 0, "genesis-id": "standin-v1",
+                         "genesis-hash": "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=",
+                         "last-round": self.round, "min-fee": 1000}
+        if method == "POST" and path == "/v2/transactions":
+            try:
+                return 200, {"txId": self.submit(body)[0]}
+            except StandinRejection as err:
+                return 400, {"message": str(err)}
+        match = re.fullmatch(r"/v2/transactions/pending/(\w+)", path)
+        if match:
+            if match.group(1) not in self.pending:
+                return 404, {"message": "txn does not exist"}
+            return 200, self.pending_info(match.group(1))
+        match = re.fullmatch(r"/v2/applications/(\d+)", path)
+        if match:
+            app_id = int(match.group(1))
+            if app_id not in self.apps:
+                return 404, {"message": "application does not exist"}
+            return 200, {"id": app_id, "params": self.app_info_params(app_id)}
+        match = re.fullmatch(r"/v2/accounts/(\w+)", path)
+        if match:
+            with self._lock:
+                created = [{"id": app_id, "params": self.app_info_params(app_id)} for app_id in list(self.apps)
+                           if self.app_params.get(app_id, ("",))[0] == match.group(1)]
+            return 200, {"address": match.group(1), "amount": 10 ** 12, "round": self.round,
+                         "created-apps": created}
+        match = re.fullmatch(r"/v2/accounts/(\w+)/applications/(\d+)", path)
+        if match:
+            key = (match.group(1), int(match.group(2)))
+            if key not in self.local_states:
+                return 404, {"message": "account application info not found"}
+            return 200, {"round": self.round, "app-local-state": {"id": key[1], "key-value": self.local_states[key]}}
+        return 404, {"message": "unknown endpoint {} {}".format(method, path)}
+
+
+class _Server(ThreadingHTTPServer):
+    # a client pool opening its connections at once overflows the default backlog of 5: the dropped SYNs are
+    # retried after 1s, 3s...
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # clients closing their kept-alive connections, e.g. during a wait-for-block, are not errors
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def _handler(standin: AlgodStandin):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body are written separately: without TCP_NODELAY, kept-alive connections stall on delayed ACKs
+        disable_nagle_algorithm = True
+        timeout = standin.idle_timeout
+
+        def setup(self):
+            super().setup()
+            with standin._lock:
+                standin.connections += 1
+
+        def _serve(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            with standin._lock:
+                standin.requests += 1
+            if standin.latency:
+                sleep(standin.latency)
+            if standin.rate_limit and not standin.admit():
+                code, payload = 429, {"message": "Too Many Requests"}
+            else:
+                code, payload = standin.handle(method, self.path, body)
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._serve("GET")
+
+        def do_POST(self):
+            self._serve("POST")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _serve(latency, app_count, block_time, rate_limit, app_spread, setup, queue):
+    standin = AlgodStandin(latency=latency, block_time=block_time, rate_limit=rate_limit)
+    for app_id in range(1, app_count + 1):
+        if app_spread:
+            # phases spread over app_spread rounds, starting 60 rounds from now
+            start = standin.round + 60 + app_id % app_spread
+            standin.apps[app_id] = sealed_auction_state(app_id, start, start + 5, start + 10)
+        else:
+            standin.apps[app_id] = sealed_auction_state(app_id)
+    if setup is not None:
+        setup(standin)
+    standin.start()
+    queue.put(standin.address)
+    standin._thread.join()
+
+
+# Starts a stand-in in its own process, so that serving requests does not compete for the GIL with the client
+# under test. `setup(standin)` runs in that process before it starts serving, e.g. to add apps or set `reject`.
+# Returns (process, address); terminate the process when done.
+def spawn_standin(latency: float = 0.0, app_count: int = 0, block_time: float = 0.0, rate_limit: float = 0.0,
+                  app_spread: int = 0, setup=None):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve,
+                                      args=(latency, app_count, block_time, rate_limit, app_spread, setup, queue),
+                                      daemon=True)
+    process.start()
+    return process, queue.get()
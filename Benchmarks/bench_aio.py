@@ -0,0 +1,57 @@
+# Benchmark of driving many bidders at once: funding N bidder accounts (one payment each, waiting for its
+# confirmation) with the blocking util.fundAccount on a thread pool versus nam.aio.fundAccount on one event loop,
+# against a local algod stand-in producing a block every BLOCK_TIME seconds.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_aio.py [bidders]
+
+import asyncio
+import sys
+from time import perf_counter
+
+from algosdk import account
+
+from Benchmarks.algod_standin import spawn_standin
+from nam import aio
+from nam.transport import PooledAlgodClient
+from util import fundAccount, map_concurrently
+
+LATENCY = 0.005
+BLOCK_TIME = 0.25
+THREADS = 32
+
+
+async def fund_async(address, funder_sk, funder, bidders):
+    async with aio.AsyncAlgodClient("a" * 64, address) as client:
+        results, errors = await aio.gather_by_item(
+            lambda bidder: aio.fundAccount(client, funder, bidder, funder_sk, 100_000), bidders, limit=len(bidders))
+        assert not errors
+        return client.connections_opened
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME)
+    try:
+        funder_sk, funder = account.generate_account()
+        bidders = [account.generate_account()[1] for _ in range(count)]
+        print("{} bidders, stand-in latency {:.0f} ms, block time {:.2f}s".format(count, LATENCY * 1000, BLOCK_TIME))
+
+        client = PooledAlgodClient("a" * 64, address, pool_size=THREADS)
+        start = perf_counter()
+        _, errors = map_concurrently(lambda bidder: fundAccount(client, funder, bidder, funder_sk, 100_000),
+                                     bidders, max_workers=THREADS)
+        threaded = perf_counter() - start
+        assert not errors
+
+        start = perf_counter()
+        connections = asyncio.run(fund_async(address, funder_sk, funder, bidders))
+        concurrent = perf_counter() - start
+
+        print("threads ({}): {:6.2f}s | asyncio: {:6.2f}s ({} connections) | speed-up x{:.1f}".format(
+            THREADS, threaded, concurrent, connections, threaded / concurrent))
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# Benchmark of getting the approval and clear program bytecode of the sealed auction in a fresh deployer process:
+# compiling the PyTeal contract with an empty compile cache, with a warm one, and loading the prebuilt artifact
+# bundle (built first with `python -m nam.artifacts`). Reports the median process time and whether PyTeal was loaded.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_artifacts.py
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+RUNS = 5
+
+CHILD = """
+import sys
+from SealedAuctionContract.AuctionInterfaceSealed import *
+{programs}
+print("pyteal" in sys.modules)
+"""
+COMPILE = """approval_program, clear_program, _ = compile_auction()
+compile_program(None, approval_program), compile_program(None, clear_program)"""
+BUNDLE = """bundle = find_bundle(sys.modules["SealedAuctionContract.AuctionInterfaceSealed"])
+assert bundle is not None, "build the bundles first: python -m nam.artifacts"
+auction_programs()"""
+
+
+def measure(programs, env, fresh_cache=False):
+    walls = []
+    for _ in range(RUNS):
+        with tempfile.TemporaryDirectory() as cache:
+            run_env = dict(env, NAM_COMPILE_CACHE=cache) if fresh_cache else env
+            start = perf_counter()
+            out = subprocess.run([sys.executable, "-c", CHILD.format(programs=programs)], check=True,
+                                 capture_output=True, text=True, env=run_env).stdout.split()
+            walls.append(perf_counter() - start)
+    return statistics.median(walls), out[-1] == "True"
+
+
+def main():
+    env = dict(os.environ)
+    for name, programs, fresh_cache in [("compile, empty compile cache", COMPILE, True),
+                                        ("compile, warm compile cache", COMPILE, False),
+                                        ("prebuilt artifact bundle", BUNDLE, False)]:
+        wall, pyteal = measure(programs, env, fresh_cache)
+        print("{:<30} {:7.1f} ms | PyTeal loaded: {}".format(name, wall * 1000, pyteal))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Benchmark of reading the global state of N apps on 32 threads from a node limiting clients to RATE requests per
+# second (answering 429 beyond): plain PooledAlgodClient vs. ThrottledAlgodClient with backoff only and with a
+# token bucket paced just under the node's limit.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_backoff.py
+
+from time import perf_counter, sleep
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.backoff import ThrottledAlgodClient
+from nam.transport import PooledAlgodClient
+from util import read_global_states
+
+LATENCY = 0.002
+RATE = 200
+APPS = 2_000
+
+
+def run(name, client):
+    # start with the node's bucket full
+    sleep(1.5)
+    start = perf_counter()
+    states, errors = read_global_states(client, range(1, APPS + 1))
+    elapsed = perf_counter() - start
+    line = "{:<28} {:6.2f}s {:6.0f} reads/s {:5} failed".format(name, elapsed, len(states) / elapsed, len(errors))
+    if isinstance(client, ThrottledAlgodClient):
+        stats = client.stats.snapshot()
+        line += " | {} attempts, {} throttled, {:.0%} of request time lost to throttling".format(
+            stats["attempts"], stats["throttled"], stats["lost_fraction"])
+    print(line)
+
+
+def main():
+    process, address = spawn_standin(latency=LATENCY, app_count=APPS, rate_limit=RATE)
+    try:
+        print("{} apps, node limit {} requests/s, latency {:.0f} ms".format(APPS, RATE, LATENCY * 1000))
+        run("PooledAlgodClient", PooledAlgodClient("a" * 64, address))
+        run("Throttled, backoff only", ThrottledAlgodClient(PooledAlgodClient("a" * 64, address)))
+        run("Throttled, rate {}".format(int(RATE * 0.95)),
+            ThrottledAlgodClient(PooledAlgodClient("a" * 64, address), rate=RATE * 0.95))
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Benchmark of the per-command latency of a sealed auction bid: a one-shot process (interpreter start, imports,
+# new algod connection, then the bid), `python -m nam.cli bid ...` talking to a running daemon (nam.daemon), and a
+# DaemonClient call from a process that stays connected. Runs against a local algod stand-in confirming every
+# transaction in the next round. Reports the median and p90 wall time per command.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_daemon.py
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter, sleep
+
+from algosdk import account, mnemonic
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.cli import DaemonClient
+
+RUNS = 20
+LATENCY = 0.002
+
+ONE_SHOT = """
+import asyncio
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam.aio import AsyncAlgodClient, AuctionOperations
+
+async def bid():
+    async with AsyncAlgodClient("a" * 64, {address!r}) as client:
+        await AuctionOperations(client, AuctionInterfaceSealed).placeBid(1, {sk!r}, 1_000_000, 7)
+
+asyncio.run(bid())
+"""
+
+
+def timed(runs, command):
+    walls = []
+    for _ in range(runs):
+        start = perf_counter()
+        command()
+        walls.append(perf_counter() - start)
+    walls.sort()
+    return statistics.median(walls), walls[int(0.9 * (len(walls) - 1))]
+
+
+def main():
+    process, address = spawn_standin(latency=LATENCY, app_count=1)
+    workdir = tempfile.TemporaryDirectory()
+    socket_path = os.path.join(workdir.name, "nam.sock")
+    mnemonic_path = os.path.join(workdir.name, "mnemonic.txt")
+    with open(mnemonic_path, "w") as f:
+        f.write(mnemonic.from_private_key(account.generate_account()[0]))
+    env = dict(os.environ, NAM_SOCKET=socket_path)
+    daemon = subprocess.Popen([sys.executable, "-m", "nam.daemon", "--algod-address", address, "--mnemonic",
+                               mnemonic_path], env=env, stdout=subprocess.DEVNULL)
+    try:
+        while not os.path.exists(socket_path):
+            if daemon.poll() is not None:
+                raise RuntimeError("the daemon exited")
+            sleep(0.05)
+        bidder_sk, bidder = account.generate_account()
+        with DaemonClient(socket_path) as client:
+            client.request("add_account", mnemonic=mnemonic.from_private_key(bidder_sk))
+            client.request("fund", receiver=bidder, amount=100_000_000)
+            print("sealed auction bid, stand-in latency {:.0f} ms, {} runs".format(LATENCY * 1000, RUNS))
+
+            one_shot = ONE_SHOT.format(address=address, sk=bidder_sk)
+            results = [
+                ("one-shot process", timed(RUNS, lambda: subprocess.run(
+                    [sys.executable, "-c", one_shot], check=True, env=env))),
+                ("nam.cli process + daemon", timed(RUNS, lambda: subprocess.run(
+                    [sys.executable, "-m", "nam.cli", "bid", "app_id=1", "contract=sealed", "bidder=" + bidder,
+                     "amount=1000000", "nonce=7"], check=True, env=env, stdout=subprocess.DEVNULL))),
+                ("DaemonClient call", timed(RUNS, lambda: client.request(
+                    "bid", app_id=1, contract="sealed", bidder=bidder, amount=1_000_000, nonce=7))),
+            ]
+        for name, (median, p90) in results:
+            print("{:<26} median {:7.1f} ms | p90 {:7.1f} ms".format(name, median * 1000, p90 * 1000))
+    finally:
+        daemon.terminate()
+        daemon.wait()
+        process.terminate()
+        workdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Benchmark of funding N accounts: one fundAccount (payment + wait for confirmation) per receiver versus a single
+# fundAccounts call (groups of 16 submitted together), against a local algod stand-in producing a block every
+# BLOCK_TIME seconds. Reports wall time and the number of rounds it took.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_funding.py
+
+from time import perf_counter
+
+from algosdk import account
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.transport import PooledAlgodClient
+from util import fundAccount, fundAccounts
+
+LATENCY = 0.005
+BLOCK_TIME = 0.25
+COUNTS = [50, 1_000]
+SEQUENTIAL_MAX = 50
+
+
+def main():
+    process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME)
+    try:
+        client = PooledAlgodClient("a" * 64, address)
+        funder_sk, funder = account.generate_account()
+        print("Stand-in latency {:.0f} ms, block time {:.2f}s".format(LATENCY * 1000, BLOCK_TIME))
+        for count in COUNTS:
+            receivers = [account.generate_account()[1] for _ in range(count)]
+            line = "{:>5} receivers:".format(count)
+            if count <= SEQUENTIAL_MAX:
+                first_round = client.status()["last-round"]
+                start = perf_counter()
+                for receiver in receivers:
+                    fundAccount(client, funder, receiver, funder_sk, 100_000)
+                line += " fundAccount loop {:6.2f}s ({} rounds) |".format(
+                    perf_counter() - start, client.status()["last-round"] - first_round)
+
+            first_round = client.status()["last-round"]
+            start = perf_counter()
+            failures = fundAccounts(client, funder, funder_sk, [(receiver, 100_000) for receiver in receivers])
+            assert not failures
+            line += " fundAccounts {:5.2f}s ({} rounds)".format(
+                perf_counter() - start, client.status()["last-round"] - first_round)
+            print(line)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
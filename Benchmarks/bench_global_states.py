@@ -0,0 +1,44 @@
+# Benchmark of reading the global state of many auction apps: one app at a time with read_global_state
+# versus concurrently with read_global_states, against a local algod stand-in running in its own process.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_global_states.py [latency_ms]
+
+import sys
+from time import perf_counter
+
+from algosdk.v2client import algod
+
+from Benchmarks.algod_standin import spawn_standin
+from util import read_global_state, read_global_states
+
+APP_COUNTS = [1_000, 10_000]
+MAX_WORKERS = 32
+
+
+def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.005
+    process, address = spawn_standin(latency=latency, app_count=max(APP_COUNTS))
+    try:
+        client = algod.AlgodClient("a" * 64, address)
+        print("Stand-in latency per request: {:.1f} ms".format(latency * 1000))
+        for count in APP_COUNTS:
+            app_ids = list(range(1, count + 1))
+
+            start = perf_counter()
+            for app_id in app_ids:
+                read_global_state(client, app_id)
+            sequential = perf_counter() - start
+
+            start = perf_counter()
+            states, errors = read_global_states(client, app_ids, max_workers=MAX_WORKERS)
+            concurrent = perf_counter() - start
+            assert len(states) == count and not errors
+
+            print("{:>6} apps: sequential {:7.2f}s | concurrent ({} workers) {:6.2f}s | speed-up x{:.1f}".format(
+                count, sequential, MAX_WORKERS, concurrent, sequential / concurrent))
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# Benchmark of minting N NFTs: one createDummyAsset (create + wait for confirmation) per asset versus a single
+# createDummyAssets call from two creators, against a local algod stand-in producing a block every BLOCK_TIME
+# seconds. Reports wall time and the number of rounds it took.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_minting.py
+
+from time import perf_counter
+
+from algosdk import account
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.transport import PooledAlgodClient
+from util import createDummyAsset, createDummyAssets
+
+LATENCY = 0.005
+BLOCK_TIME = 0.25
+COUNTS = [20, 5_000]
+SEQUENTIAL_MAX = 20
+
+
+def main():
+    process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME)
+    try:
+        client = PooledAlgodClient("a" * 64, address)
+        creators = [account.generate_account()[::-1] for _ in range(2)]
+        print("Stand-in latency {:.0f} ms, block time {:.2f}s".format(LATENCY * 1000, BLOCK_TIME))
+        for count in COUNTS:
+            line = "{:>5} NFTs:".format(count)
+            if count <= SEQUENTIAL_MAX:
+                first_round = client.status()["last-round"]
+                start = perf_counter()
+                for i in range(count):
+                    address, sk = creators[i % len(creators)]
+                    createDummyAsset(client, 1, address, sk)
+                line += " createDummyAsset loop {:6.2f}s ({} rounds) |".format(
+                    perf_counter() - start, client.status()["last-round"] - first_round)
+
+            first_round = client.status()["last-round"]
+            start = perf_counter()
+            asset_ids, failures = createDummyAssets(client, creators, count)
+            assert not failures and len(set(asset_ids)) == count
+            line += " createDummyAssets {:5.2f}s ({} rounds)".format(
+                perf_counter() - start, client.status()["last-round"] - first_round)
+            print(line)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
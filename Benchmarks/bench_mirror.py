@@ -0,0 +1,156 @@
+# Benchmark of nam.mirror.AuctionMirror: the life of one sealed auction (commits and reveals of BIDDERS bidders,
+# one outside bid sent by another client halfway through the reveals, the two claims and the deletion) against a
+# local algod stand-in that models the state changes of the sealed contract and returns them as eval-deltas.
+# Compares AuctionOperations reading the global state before each call and, like the AuctionMain scripts, the
+# global and local states after each bid, commit and claim, with AuctionOperations keeping an AuctionMirror, whose
+# reads after the calls come from memory. Reports wall time, the state reads sent to algod and the mirror's
+# counters (the outside bid shows up as a mismatch, reconciled with one read).
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_mirror.py [bidders]
+
+import asyncio
+import base64
+import sys
+from time import perf_counter
+
+from algosdk import account, encoding
+
+from Benchmarks.algod_standin import sealed_auction_state, spawn_standin, state_entry
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam import aio
+from nam.metrics import AlgodMetrics
+from nam.mirror import AuctionMirror
+
+LATENCY = 0.02
+BLOCK_TIME = 0.1
+APP_ID = 1
+DEPOSIT = 100_000
+STATE_READS = ("GET /applications/{id}", "GET /accounts/{address}/applications/{id}")
+
+
+def _delta(key: str, value) -> dict:
+    encoded = base64.b64encode(key.encode("utf-8")).decode("ascii")
+    if value is None:
+        return {"key": encoded, "value": {"action": 3}}
+    if isinstance(value, bytes):
+        return {"key": encoded, "value": {"action": 1, "bytes": base64.b64encode(value).decode("ascii")}}
+    return {"key": encoded, "value": {"action": 2, "uint": value}}
+
+
+# The sealed contract's state changes, run by the stand-in on every transaction (without its checks)
+class SealedModel:
+    def __init__(self, standin):
+        self.standin = standin
+        self.globals = {}
+        for entry in standin.apps[APP_ID]:
+            value = entry["value"]
+            self.globals[base64.b64decode(entry["key"]).decode("utf-8")] = \
+                base64.b64decode(value["bytes"]) if value["type"] == 1 else value["uint"]
+
+    def _put_global(self, changes: dict) -> list:
+        self.globals.update(changes)
+        self.standin.apps[APP_ID] = [state_entry(k, v) for k, v in self.globals.items()]
+        return [_delta(k, v) for k, v in changes.items()]
+
+    def _put_local(self, address: str, changes: dict) -> list:
+        entries = {base64.b64decode(e["key"]).decode("utf-8"): e
+                   for e in self.standin.local_states.get((address, APP_ID), [])}
+        for key, value in changes.items():
+            if value is None:
+                entries.pop(key, None)
+            else:
+                entries[key] = state_entry(key, value)
+        self.standin.local_states[(address, APP_ID)] = list(entries.values())
+        return [{"address": address, "delta": [_delta(k, v) for k, v in changes.items()]}]
+
+    def __call__(self, txns, i):
+        txn = txns[i]
+        if txn.type != "appl" or txn.index != APP_ID or not txn.app_args:
+            return None
+        method = AuctionInterfaceSealed.auction_methods.get_by_selector(txn.app_args[0]).name
+        info = {}
+        if method == "on_commit":
+            info["local-state-delta"] = self._put_local(txn.sender, {"commitment": txn.app_args[1][2:]})
+        elif method == "on_bid":
+            amount = txns[i - 1].amt
+            info["global-state-delta"] = self._put_global({
+                "2nd_amount": self.globals["bid_amount"], "bid_amount": amount,
+                "bid_account": encoding.decode_address(txn.sender), "num_bids": self.globals["num_bids"] + 1})
+            info["local-state-delta"] = self._put_local(txn.sender, {"commitment": None, "value": amount})
+        elif method in ("paySeller", "payWinner"):
+            key = "seller_paid" if method == "paySeller" else "winner_paid"
+            info["global-state-delta"] = self._put_global({key: AuctionInterfaceSealed.HAS_BEEN_PAID})
+        return info
+
+
+def setup(standin):
+    standin.apps[APP_ID] = sealed_auction_state(APP_ID, standin.round - 10, standin.round - 5, standin.round + 10_000)
+    standin.evaluate = SealedModel(standin)
+
+
+async def lifecycle(client, ops, outsider, bidders, seller_sk, closer_sk):
+    mirror = ops.mirror
+
+    # the reads the AuctionMain scripts make to print the states after a call
+    async def print_states(bidder=None):
+        if mirror is None:
+            await aio.read_global_state(client, APP_ID, ops.AuctionState)
+            if bidder is not None:
+                await aio.read_local_state(client, bidder, APP_ID, ops.BidderState)
+        else:
+            await mirror.read_async(client, APP_ID)
+            if bidder is not None:
+                await mirror.read_local_async(client, APP_ID, bidder)
+
+    for sk, amount, nonce in bidders:
+        await ops.commitAuctionApp(APP_ID, sk, amount, nonce, DEPOSIT)
+        await print_states(account.address_from_private_key(sk))
+    for i, (sk, amount, nonce) in enumerate(bidders):
+        if i == len(bidders) // 2:
+            outside_sk, outside_amount, outside_nonce = outsider
+            await aio.AuctionOperations(client, AuctionInterfaceSealed).placeBid(
+                APP_ID, outside_sk, outside_amount, outside_nonce)
+        await ops.placeBid(APP_ID, sk, amount, nonce)
+        await print_states(account.address_from_private_key(sk))
+    await ops.claimWinner(APP_ID, bidders[-1][0])
+    await print_states()
+    await ops.claimSeller(APP_ID, seller_sk)
+    await print_states()
+    await ops.closeAuction(APP_ID, closer_sk)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    # increasing amounts, each taking the lead; the outside bid takes it halfway through
+    bidders = [(account.generate_account()[0], 1_000_000 + 100_000 * i, i) for i in range(count)]
+    outsider = (account.generate_account()[0], 1_000_000 + 100_000 * (count // 2) - 50_000, 7)
+    seller_sk, closer_sk = account.generate_account()[0], account.generate_account()[0]
+    print("{} bidders committing and revealing, 1 outside bid, block time {:.2f}s, stand-in latency {:.0f} ms".format(
+        count, BLOCK_TIME, LATENCY * 1000))
+    for name, mirrored in [("read after write", False), ("AuctionMirror", True)]:
+        process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME, setup=setup)
+        try:
+            async def run():
+                async with aio.AsyncAlgodClient("a" * 64, address, metrics=AlgodMetrics()) as client:
+                    mirror = AuctionMirror(AuctionInterfaceSealed) if mirrored else None
+                    ops = aio.AuctionOperations(client, AuctionInterfaceSealed, mirror)
+                    start = perf_counter()
+                    await lifecycle(client, ops, outsider, bidders, seller_sk, closer_sk)
+                    wall = perf_counter() - start
+                    endpoints = client.metrics.snapshot(by_operation=False)
+                    reads = sum(endpoints.get(endpoint, {}).get("calls", 0) for endpoint in STATE_READS)
+                    return wall, reads, sum(stats["calls"] for stats in endpoints.values()), \
+                        None if mirror is None else mirror.stats.snapshot()
+            wall, reads, requests, stats = asyncio.run(run())
+        finally:
+            process.terminate()
+        writes = 2 * count + 3
+        print("{:<18} {:6.2f}s | {} state reads ({:.2f} per call), {} requests".format(
+            name, wall, reads, reads / writes, requests))
+        if stats:
+            print("{:<18} hits {hits}, loads {loads}, local hits {local_hits}, local loads {local_loads}, "
+                  "deltas {deltas}, mismatches {mismatches}".format("", **stats))
+
+
+if __name__ == "__main__":
+    main()
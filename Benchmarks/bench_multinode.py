@@ -0,0 +1,47 @@
+# Benchmark of reading the global state of N apps on 32 threads from one algod stand-in vs. three stand-ins with
+# different latencies behind a MultiNodeAlgodClient, then again while the fastest node is stopped mid-run.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_multinode.py
+
+import threading
+from time import perf_counter
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.multinode import MultiNodeAlgodClient
+from nam.transport import PooledAlgodClient
+from util import read_global_states
+
+LATENCIES = [0.010, 0.020, 0.040]
+APPS = 3_000
+
+
+def run(name, client):
+    start = perf_counter()
+    states, errors = read_global_states(client, range(1, APPS + 1))
+    elapsed = perf_counter() - start
+    print("{:<34} {:6.2f}s {:6.0f} reads/s {:5} failed".format(name, elapsed, len(states) / elapsed, len(errors)))
+
+
+def main():
+    standins = [spawn_standin(latency=latency, app_count=APPS) for latency in LATENCIES]
+    addresses = [address for _, address in standins]
+    try:
+        print("{} apps, node latencies {}".format(APPS, ", ".join("{:.0f} ms".format(l * 1000) for l in LATENCIES)))
+        run("single node ({:.0f} ms)".format(LATENCIES[0] * 1000), PooledAlgodClient("a" * 64, addresses[0]))
+
+        client = MultiNodeAlgodClient.from_addresses("a" * 64, addresses)
+        run("MultiNodeAlgodClient, 3 nodes", client)
+        print("  requests per node:", [node["requests"] for node in client.node_stats()])
+
+        client = MultiNodeAlgodClient.from_addresses("a" * 64, addresses)
+        threading.Timer(0.5, standins[0][0].terminate).start()
+        run("3 nodes, fastest stopped at 0.5s", client)
+        print("  requests per node:", [node["requests"] for node in client.node_stats()],
+              "failures:", [node["failures"] for node in client.node_stats()])
+    finally:
+        for process, _ in standins:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
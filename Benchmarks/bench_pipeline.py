@@ -0,0 +1,73 @@
+# Benchmark of running N independent operations (a one-payment AtomicTransactionComposer each): atc.execute one
+# after the other versus submitting them all to a TransactionPipeline, against a local algod stand-in producing a
+# block every BLOCK_TIME seconds. Reports wall time, operations per second and the number of rounds it took.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_pipeline.py
+
+from time import perf_counter
+
+from algosdk import account
+from algosdk.atomic_transaction_composer import (AccountTransactionSigner, AtomicTransactionComposer,
+                                                 TransactionWithSigner)
+from algosdk.future import transaction
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.pipeline import TransactionPipeline
+from nam.transport import PooledAlgodClient
+from util import suggested_params
+
+LATENCY = 0.005
+BLOCK_TIME = 0.25
+COUNTS = [40, 1_000]
+SEQUENTIAL_MAX = 40
+
+
+def operations(client, count):
+    sender_sk, sender = account.generate_account()
+    signer = AccountTransactionSigner(sender_sk)
+    sp = suggested_params(client)
+    atcs = []
+    for _ in range(count):
+        atc = AtomicTransactionComposer()
+        atc.add_transaction(TransactionWithSigner(
+            transaction.PaymentTxn(sender, sp, account.generate_account()[1], 100_000), signer))
+        atcs.append(atc)
+    return atcs
+
+
+def measure(client, run):
+    first_round = client.status()["last-round"]
+    start = perf_counter()
+    run()
+    return perf_counter() - start, client.status()["last-round"] - first_round
+
+
+def main():
+    process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME)
+    try:
+        client = PooledAlgodClient("a" * 64, address)
+        print("Stand-in latency {:.0f} ms, block time {:.2f}s".format(LATENCY * 1000, BLOCK_TIME))
+        for count in COUNTS:
+            line = "{:>5} operations:".format(count)
+            if count <= SEQUENTIAL_MAX:
+                atcs = operations(client, count)
+                elapsed, rounds = measure(client, lambda: [atc.execute(client, 10) for atc in atcs])
+                line += " atc.execute {:6.2f}s {:6.1f} ops/s ({} rounds) |".format(elapsed, count / elapsed, rounds)
+
+            atcs = operations(client, count)
+            pipeline = TransactionPipeline(client)
+
+            def pipelined():
+                pipeline.submit_all(atcs)
+                for future in pipeline.flush():
+                    future.result()
+
+            elapsed, rounds = measure(client, pipelined)
+            line += " pipeline {:5.2f}s {:6.1f} ops/s ({} rounds)".format(elapsed, count / elapsed, rounds)
+            print(line)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Benchmark of revealing the sealed bids of many committed bidders in one SealedAuctionContract app, against a
+# local algod stand-in producing a block every BLOCK_TIME seconds: one placeBid after the other, each waiting for
+# its confirmation like AuctionMainSealed does, versus nam.reveal.reveal_bids. BAD_NONCES of the bidders reveal a
+# nonce that does not match their commitment. Both send the reveals by increasing amount and leave out the ones
+# the contract would reject. Reports wall time, the rounds the reveals landed in and the outcomes.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_reveal.py [bidders]
+
+import asyncio
+import random
+import sys
+from time import perf_counter
+
+from algosdk import account
+
+from Benchmarks.algod_standin import sealed_auction_state, spawn_standin, state_entry
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam import aio
+from nam.metrics import AlgodMetrics
+from nam.reveal import LANDED, commitment, reveal_bids
+
+LATENCY = 0.002
+BLOCK_TIME = 0.1
+BAD_NONCES = 0.05
+APP_ID = 1
+
+
+class Bidders:
+    def __init__(self, count):
+        rng = random.Random(42)
+        self.reveals = []
+        self.commitments = {}
+        for i in range(count):
+            sk, address = account.generate_account()
+            amount, nonce = rng.randrange(200_000, 10_000_000), rng.randrange(2 ** 32)
+            self.commitments[address] = commitment(amount, nonce)
+            self.reveals.append((sk, amount, nonce + 1 if i < count * BAD_NONCES else nonce))
+
+    # runs in the stand-in process
+    def setup(self, standin):
+        standin.apps[APP_ID] = sealed_auction_state(APP_ID, standin.round - 10, standin.round, standin.round + 500)
+        for address, digest in self.commitments.items():
+            standin.local_states[(address, APP_ID)] = [state_entry("commitment", digest)]
+
+
+async def one_by_one(client, bidders):
+    ops = aio.AuctionOperations(client, AuctionInterfaceSealed)
+    state = await aio.read_global_state(client, APP_ID, AuctionInterfaceSealed.AuctionState)
+    lead = state.lead_bid_amount
+    rounds = []
+    for sk, amount, nonce in sorted(bidders.reveals, key=lambda reveal: reveal[1]):
+        if (commitment(amount, nonce) != bidders.commitments[account.address_from_private_key(sk)]
+                or amount < lead + state.min_bid_increment):
+            # the contract would reject it (the stand-in does not run it)
+            continue
+        rounds.append((await ops.placeBid(APP_ID, sk, amount, nonce)).confirmed_round)
+        lead = amount
+    return rounds
+
+
+async def bulk(client, bidders):
+    reveals = await reveal_bids(client, AuctionInterfaceSealed, APP_ID, bidders.reveals)
+    return [reveal.round for reveal in reveals if reveal.status == LANDED]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    bidders = Bidders(count)
+    print("{} committed bidders, {:.0%} with a wrong nonce, block time {:.2f}s, stand-in latency {:.0f} ms".format(
+        count, BAD_NONCES, BLOCK_TIME, LATENCY * 1000))
+    for name, variant in [("placeBid one by one", one_by_one), ("reveal_bids", bulk)]:
+        process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME, setup=bidders.setup)
+        try:
+            async def run():
+                async with aio.AsyncAlgodClient("a" * 64, address, metrics=AlgodMetrics()) as client:
+                    start = perf_counter()
+                    rounds = await variant(client, bidders)
+                    wall = perf_counter() - start
+                    endpoints = client.metrics.snapshot(by_operation=False)
+                    return wall, rounds, sum(stats["calls"] for stats in endpoints.values())
+            wall, rounds, requests = asyncio.run(run())
+        finally:
+            process.terminate()
+        print("{:<20} {:6.2f}s | {} reveals landed in {} rounds | {} requests".format(
+            name, wall, len(rounds), max(rounds) - min(rounds) + 1, requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Benchmark of running the phases of many sealed auctions at once, against a local algod stand-in producing a
+# block every BLOCK_TIME seconds with the auction deadlines spread over SPREAD rounds. Each phase action reads the
+# auction's global state. Compares one thread per auction blocking in util's waitUntilRound until each deadline
+# with nam.scheduler.AuctionScheduler on one event loop. Each variant runs in its own process; reports wall time,
+# dispatch lag (rounds between a deadline and the round its action ran in), threads and peak memory.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_scheduler.py [auctions]
+
+import asyncio
+import multiprocessing
+import resource
+import sys
+import threading
+from time import perf_counter
+
+from Benchmarks.algod_standin import spawn_standin
+from SealedAuctionContract.AuctionInterfaceSealed import AuctionState
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam import aio
+from nam.scheduler import AuctionScheduler, auction_deadlines, per_auction
+from nam.transport import PooledAlgodClient
+from util import get_round_waiter, read_global_state, read_global_states
+
+LATENCY = 0.002
+BLOCK_TIME = 0.1
+SPREAD = 20
+
+
+def threaded(address, app_ids, results):
+    client = PooledAlgodClient("a" * 64, address, pool_size=64)
+    states, errors = read_global_states(client, app_ids, view=AuctionState)
+    assert not errors
+    waiter = get_round_waiter(client)
+    lags = []
+    failures = []
+    peak_threads = [0]
+
+    def run_auction(app_id):
+        try:
+            for deadline, _ in auction_deadlines(states[app_id]):
+                waiter.wait(deadline)
+                lags.append(waiter.last_round - deadline)
+                read_global_state(client, app_id, AuctionState)
+        except Exception as err:
+            failures.append(err)
+
+    start = perf_counter()
+    threads = [threading.Thread(target=run_auction, args=(app_id,)) for app_id in app_ids]
+    for thread in threads:
+        thread.start()
+        peak_threads[0] = max(peak_threads[0], threading.active_count())
+    for thread in threads:
+        thread.join()
+    results.put((perf_counter() - start, len(lags), sum(lags) / len(lags), max(lags), peak_threads[0],
+                 len(failures), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def scheduled(address, app_ids, results):
+    async def run():
+        async with aio.AsyncAlgodClient("a" * 64, address) as client:
+            async def action(auction):
+                await aio.read_global_state(client, auction.app_id, AuctionState)
+
+            handler = per_auction(action)
+            scheduler = AuctionScheduler(client, {phase: handler for phase in ("start", "commit_end", "end")})
+            errors = await scheduler.add_many(app_ids, AuctionInterfaceSealed)
+            assert not errors
+            start = perf_counter()
+            await scheduler.run()
+            return perf_counter() - start, scheduler.stats.snapshot(), len(scheduler.failed)
+
+    wall, stats, failures = asyncio.run(run())
+    results.put((wall, stats["dispatched"], stats["mean_lag_rounds"], stats["max_lag_rounds"],
+                 threading.active_count(), failures, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    app_ids = list(range(1, count + 1))
+    print("{} auctions, deadlines over {} rounds, block time {:.2f}s, stand-in latency {:.0f} ms".format(
+        count, SPREAD, BLOCK_TIME, LATENCY * 1000))
+    for name, variant in [("thread per auction", threaded), ("AuctionScheduler", scheduled)]:
+        # fresh chain for each variant
+        process, address = spawn_standin(latency=LATENCY, app_count=count, block_time=BLOCK_TIME,
+                                         app_spread=SPREAD)
+        try:
+            results = multiprocessing.Queue()
+            child = multiprocessing.Process(target=variant, args=(address, app_ids, results))
+            child.start()
+            wall, actions, mean_lag, max_lag, threads, failures, rss = results.get(timeout=600)
+            child.join()
+        finally:
+            process.terminate()
+        print("{:<20} {:6.2f}s | {} actions, {} failed | lag mean {:.2f} max {} rounds | {} threads | "
+              "peak RSS {:.0f} MiB".format(name, wall, actions, failures, mean_lag, max_lag, threads, rss))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# Benchmark of settling many ended sealed auctions, against a local algod stand-in producing a block every
+# BLOCK_TIME seconds. The auctions end over SPREAD rounds and LATE_OPT_IN of the winners only opt into their NFT
+# OPT_IN_DELAY rounds after the end (the stand-in rejects their payWinner until then). Compares settling them the
+# way the Demo scripts do, concurrently (claimSeller, claimWinner retried every round, then closeAuction, each
+# confirmed before the next), with nam.settlement.SettlementWorker discovering them from the creator account.
+# Reports wall time, the rounds between the end of an auction and its deletion, for the auctions whose winner
+# had opted in and for the others, and the requests and transaction submissions per auction.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_settlement.py [auctions]
+
+import asyncio
+import sys
+from time import perf_counter
+
+from algosdk import account, encoding, error
+
+from Benchmarks.algod_standin import sealed_auction_state, spawn_standin, state_entry
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam import aio
+from nam.metrics import AlgodMetrics
+from nam.settlement import SettlementWorker
+
+LATENCY = 0.002
+BLOCK_TIME = 0.5
+SPREAD = 10
+LATE_OPT_IN = 0.3
+OPT_IN_DELAY = 5
+FIRST_END = 1010
+
+
+class Auctions:
+    def __init__(self, count):
+        self.creator_sk, self.creator = account.generate_account()
+        self.sellers = {app_id: account.generate_account() for app_id in range(1, count + 1)}
+        self.winners = {app_id: account.generate_account() for app_id in range(1, count + 1)}
+        self.ends = {app_id: FIRST_END + app_id % SPREAD for app_id in self.sellers}
+        # winner address -> round from which it is opted into the NFT
+        self.opt_in_rounds = {self.winners[app_id][1]: self.ends[app_id] + OPT_IN_DELAY
+                              for app_id in self.sellers if app_id % int(1 / LATE_OPT_IN) == 0}
+        self.approval_program = AuctionInterfaceSealed.auction_programs()[0]
+
+    def keys(self) -> dict:
+        return {address: sk for sk, address in list(self.sellers.values()) + list(self.winners.values())}
+
+    # runs in the stand-in process
+    def setup(self, standin):
+        program = encoding.base64.b64encode(self.approval_program).decode("ascii")
+        for app_id, (_, seller) in self.sellers.items():
+            end = self.ends[app_id]
+            state = [entry for entry in sealed_auction_state(app_id, end - 10, end - 5, end)
+                     if entry["key"] not in ("c2VsbGVy", "YmlkX2FjY291bnQ=")]
+            state.append(state_entry("seller", encoding.decode_address(seller)))
+            state.append(state_entry("bid_account", encoding.decode_address(self.winners[app_id][1])))
+            standin.apps[app_id] = state
+            standin.app_params[app_id] = (self.creator, program)
+
+        def reject(txn):
+            opt_in_round = self.opt_in_rounds.get(txn.sender)
+            if txn.type == "appl" and opt_in_round is not None and standin.round < opt_in_round:
+                return "asset {} missing from {}".format(txn.foreign_assets[0], txn.sender)
+            return None
+        standin.reject = reject
+
+
+async def by_hand(client, auctions):
+    ops = aio.AuctionOperations(client, AuctionInterfaceSealed)
+    deleted_rounds = {}
+
+    async def settle(app_id):
+        await client.wait_for_round(auctions.ends[app_id])
+        await ops.claimSeller(app_id, auctions.sellers[app_id][0])
+        while True:
+            try:
+                await ops.claimWinner(app_id, auctions.winners[app_id][0])
+                break
+            except error.AlgodHTTPError:
+                await client.wait_for_round(client.last_round + 1)
+        info = await ops.closeAuction(app_id, auctions.creator_sk)
+        deleted_rounds[app_id] = info["confirmed-round"]
+
+    _, errors = await aio.gather_by_item(settle, list(auctions.sellers), limit=len(auctions.sellers))
+    assert not errors, errors
+    return deleted_rounds
+
+
+async def with_worker(client, auctions):
+    worker = SettlementWorker(client, auctions.keys(), auctions.creator_sk, contracts=[AuctionInterfaceSealed],
+                              discover_interval=5)
+    deleted_rounds = {}
+    settle = worker.settle
+
+    async def settle_and_record(auction):
+        deleted_round = await settle(auction)
+        if deleted_round is not None:
+            deleted_rounds[auction.app_id] = deleted_round
+    worker.settle = settle_and_record
+    await worker.run([auctions.creator])
+    assert not worker.failed and not worker.stuck, (worker.failed, worker.stuck)
+    assert worker.stats.settled == len(deleted_rounds)
+    return deleted_rounds
+
+
+async def measure(variant, address, auctions):
+    async with aio.AsyncAlgodClient("a" * 64, address, metrics=AlgodMetrics()) as client:
+        deleted_rounds = await variant(client, auctions)
+        endpoints = client.metrics.snapshot(by_operation=False)
+        return deleted_rounds, sum(stats["calls"] for stats in endpoints.values()), \
+            endpoints["POST /transactions"]["calls"]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    auctions = Auctions(count)
+    print("{} auctions ending over {} rounds, {:.0%} of the winners opting in {} rounds late, block time {:.2f}s"
+          .format(count, SPREAD, LATE_OPT_IN, OPT_IN_DELAY, BLOCK_TIME))
+    for name, variant in [("by hand (Demo scripts)", by_hand), ("SettlementWorker", with_worker)]:
+        process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME, setup=auctions.setup)
+        try:
+            start = perf_counter()
+            deleted_rounds, requests, submissions = asyncio.run(measure(variant, address, auctions))
+            wall = perf_counter() - start
+        finally:
+            process.terminate()
+        assert len(deleted_rounds) == count
+        lags = {False: [], True: []}
+        for app_id, round in deleted_rounds.items():
+            lags[auctions.winners[app_id][1] in auctions.opt_in_rounds].append(round - auctions.ends[app_id])
+        print("{:<24} {:6.2f}s | rounds from end to deletion: opted in {:.1f} (max {}), late {:.1f} (max {}) | "
+              "{:.1f} requests, {:.1f} submissions per auction".format(
+                  name, wall, sum(lags[False]) / len(lags[False]), max(lags[False]),
+                  sum(lags[True]) / len(lags[True]), max(lags[True]), requests / count, submissions / count))
+
+
+if __name__ == "__main__":
+    main()
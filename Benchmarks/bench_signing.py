@@ -0,0 +1,46 @@
+# Benchmark of turning N unsigned transactions into signed msgpack blobs: txn.sign() in the calling process versus
+# a SigningService with 1, 2 and os.cpu_count() worker processes. The speed-up is bounded by the number of cores.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_signing.py [transactions]
+
+import base64
+import os
+import sys
+from time import perf_counter
+
+from algosdk import account, encoding
+from algosdk.future import transaction
+
+from nam.signing import SigningService
+
+SP = transaction.SuggestedParams(1000, 1000, 2000, "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=",
+                                 "standin-v1", False, None, 1000)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    sender_sk, sender = account.generate_account()
+    receiver = account.generate_account()[1]
+    txns = [transaction.PaymentTxn(sender, SP, receiver, i) for i in range(count)]
+    print("{} payment transactions, {} core(s)".format(count, os.cpu_count()))
+
+    start = perf_counter()
+    expected = [base64.b64decode(encoding.msgpack_encode(txn.sign(sender_sk))) for txn in txns]
+    baseline = perf_counter() - start
+    print("in process        {:6.2f}s {:8.0f} txn/s".format(baseline, count / baseline))
+
+    for processes in sorted({1, 2, os.cpu_count()}):
+        with SigningService(processes=processes) as service:
+            handle = service.add_key(sender_sk)
+            # warm up the workers (imports, key registration)
+            service.sign([(handle, txns[0])])
+            start = perf_counter()
+            blobs = service.sign([(handle, txn) for txn in txns])
+            elapsed = perf_counter() - start
+        assert blobs == expected
+        print("{:>2} worker(s)      {:6.2f}s {:8.0f} txn/s | x{:.2f}".format(
+            processes, elapsed, count / elapsed, baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main()
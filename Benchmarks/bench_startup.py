@@ -0,0 +1,47 @@
+# Benchmark of the startup cost of a client process: importing the PyTeal contract module (what the scripts used to
+# star-import) vs. its PyTeal-free interface module, each in a fresh interpreter. Reports the median import time,
+# the whole process wall time and the peak memory of the process.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_startup.py
+
+import statistics
+import subprocess
+import sys
+from time import perf_counter
+
+RUNS = 7
+MODULES = [
+    "SealedAuctionContract.AuctionContractSealed",
+    "SealedAuctionContract.AuctionInterfaceSealed",
+]
+
+CHILD = """
+import resource, sys
+from time import perf_counter
+start = perf_counter()
+import {module}
+print(perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "pyteal" in sys.modules)
+"""
+
+
+def measure(module):
+    imports, walls, rss = [], [], []
+    for _ in range(RUNS):
+        start = perf_counter()
+        out = subprocess.run([sys.executable, "-c", CHILD.format(module=module)], check=True, capture_output=True,
+                             text=True).stdout.split()
+        walls.append(perf_counter() - start)
+        imports.append(float(out[0]))
+        rss.append(int(out[1]))
+    return statistics.median(imports), statistics.median(walls), max(rss), out[2] == "True"
+
+
+def main():
+    for module in MODULES:
+        import_time, wall, rss, pyteal = measure(module)
+        print("{:<46} import {:6.1f} ms | process {:6.1f} ms | peak RSS {:5.1f} MiB | PyTeal loaded: {}".format(
+            module, import_time * 1000, wall * 1000, rss / 1024, pyteal))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Benchmark of decoding auction global states: dict-based format_state versus the slotted StateView classes
+# generated from the contract's state keys. Reports CPU time per state and the memory needed to hold them all.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_state_decode.py
+
+import tracemalloc
+from time import perf_counter
+
+from Benchmarks.algod_standin import sealed_auction_state
+from SealedAuctionContract.AuctionInterfaceSealed import AuctionState
+from util import format_state
+
+STATE_COUNT = 10_000
+
+
+def measure(decode, raw_states):
+    start = perf_counter()
+    for state in raw_states:
+        decode(state)
+    elapsed = perf_counter() - start
+
+    tracemalloc.start()
+    held = [decode(state) for state in raw_states]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return elapsed, memory
+
+
+def main():
+    raw_states = [sealed_auction_state(app_id) for app_id in range(1, STATE_COUNT + 1)]
+    narrow = AuctionState.only("nft_id", "end_round", "lead_bid_account")
+    print("Decoding {} SealedAuctionContract global states".format(STATE_COUNT))
+    for label, decode in [("format_state (dict)", format_state),
+                          ("AuctionState.decode", AuctionState.decode),
+                          ("3-slot view .decode", narrow.decode)]:
+        elapsed, memory = measure(decode, raw_states)
+        print("{:<22} {:6.2f} us/state | {:7.2f} MiB held".format(
+            label, elapsed / STATE_COUNT * 1e6, memory / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
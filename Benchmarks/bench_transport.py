@@ -0,0 +1,48 @@
+# Benchmark of algod requests per second with the SDK's default urllib transport (a new connection per request)
+# versus PooledAlgodClient (persistent keep-alive connections), against a local algod stand-in in its own process.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_transport.py [latency_ms]
+
+import sys
+from time import perf_counter
+
+from algosdk.v2client import algod
+
+from Benchmarks.algod_standin import spawn_standin
+from nam.transport import PooledAlgodClient
+from util import map_concurrently
+
+REQUESTS = 5_000
+WORKERS = [1, 32]
+
+
+def run(client, workers):
+    app_ids = list(range(1, REQUESTS + 1))
+    start = perf_counter()
+    if workers == 1:
+        for app_id in app_ids:
+            client.application_info(app_id)
+    else:
+        _, errors = map_concurrently(client.application_info, app_ids, max_workers=workers)
+        assert not errors
+    return REQUESTS / (perf_counter() - start)
+
+
+def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.0
+    process, address = spawn_standin(latency=latency, app_count=REQUESTS)
+    try:
+        print("Stand-in latency per request: {:.1f} ms, {} requests".format(latency * 1000, REQUESTS))
+        for workers in WORKERS:
+            default = run(algod.AlgodClient("a" * 64, address), workers)
+            with PooledAlgodClient("a" * 64, address, pool_size=workers) as pooled_client:
+                pooled = run(pooled_client, workers)
+                opened = pooled_client.connections_opened
+            print("{:>3} thread(s): urllib {:7.0f} req/s | pooled {:7.0f} req/s ({} connections) | x{:.2f}".format(
+                workers, default, pooled, opened, pooled / default))
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
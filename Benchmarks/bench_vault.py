@@ -0,0 +1,155 @@
+# Benchmark of nam.vault.CommitmentVault, the SQLite store of sealed-bid nonces:
+#  - drawing 100k nonces: randrange(0, 600) like the Demo scripts, new_nonce() per bid and new_nonces() in bulk;
+#  - recording RECORDS commitments one by one (one fsynced transaction each) vs. record_many;
+#  - after reopening a vault of `commitments` commitments spread over APPS apps and REVEAL_SPREAD rounds, fetching
+#    the reveals due at a round through the pending-reveal indexes (the first call also expires the closed
+#    windows) vs. a full table scan;
+#  - a restart: BIDDERS bidders commit through commit_bid against a local algod stand-in, the vault and client are
+#    closed, and a fresh client reveals everything from the reopened vault with reveal_due once commit_end is reached.
+#
+# Usage (from the repository root): PYTHONPATH=. python Benchmarks/bench_vault.py [commitments]
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+
+from algosdk import account
+
+from Benchmarks.algod_standin import sealed_auction_state, spawn_standin, state_entry
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam import aio
+from nam.reveal import LANDED, commitment
+from nam.vault import CommitmentVault, commit_bid, new_nonce, new_nonces, reveal_due
+
+NONCES = 100_000
+RECORDS = 2_000
+APPS = 5_000
+REVEAL_SPREAD = 10_000
+BIDDERS = 50
+LATENCY = 0.002
+BLOCK_TIME = 0.1
+APP_ID = 1
+CONTRACT = AuctionInterfaceSealed.auction_contract["name"]
+
+
+def timed(fn, *args):
+    start = perf_counter()
+    result = fn(*args)
+    return perf_counter() - start, result
+
+
+def bench_nonces():
+    print("drawing {} nonces".format(NONCES))
+    rng = random.Random(42)
+    for name, draw in [("randrange(0, 600)", lambda: [rng.randrange(0, 600) for _ in range(NONCES)]),
+                       ("new_nonce() per bid", lambda: [new_nonce() for _ in range(NONCES)]),
+                       ("new_nonces()", lambda: new_nonces(NONCES))]:
+        elapsed, nonces = timed(draw)
+        print("  {:<22} {:8.1f} ms | {} distinct values".format(name, elapsed * 1000, len(set(nonces))))
+
+
+def bids(count, apps, rng):
+    out = []
+    for i in range(count):
+        reveal_round = 1000 + rng.randrange(REVEAL_SPREAD)
+        out.append((1 + i % apps, CONTRACT, "BIDDER{}".format(i), rng.randrange(100_000, 10_000_000),
+                    new_nonce(), 300_000, reveal_round, reveal_round + 20))
+    return out
+
+
+def bench_records(directory):
+    print("recording {} commitments".format(RECORDS))
+    rows = bids(RECORDS, 100, random.Random(1))
+    with CommitmentVault(os.path.join(directory, "one_by_one.db")) as vault:
+        elapsed, _ = timed(lambda: [vault.record(*row) for row in rows])
+    print("  {:<22} {:8.1f} ms | {:.3f} ms per commitment".format("record()", elapsed * 1000,
+                                                                    elapsed * 1000 / RECORDS))
+    with CommitmentVault(os.path.join(directory, "bulk.db")) as vault:
+        elapsed, _ = timed(vault.record_many, rows)
+    print("  {:<22} {:8.1f} ms | {:.3f} ms per commitment".format("record_many()", elapsed * 1000,
+                                                                    elapsed * 1000 / RECORDS))
+
+
+def bench_due(directory, count):
+    path = os.path.join(directory, "large.db")
+    with CommitmentVault(path) as vault:
+        elapsed, _ = timed(vault.record_many, bids(count, APPS, random.Random(2)))
+    print("{} commitments over {} apps recorded in {:.2f}s; pending reveals due at one round, after reopening"
+          .format(count, APPS, elapsed))
+    round = 1000 + REVEAL_SPREAD // 2
+    with CommitmentVault(path) as vault:
+        elapsed, due = timed(vault.due, round)
+        print("  {:<22} {:8.2f} ms | {} reveals".format("first due() (expiring)", elapsed * 1000, len(due)))
+        elapsed, due = timed(vault.due, round + 1)
+        print("  {:<22} {:8.2f} ms | {} reveals".format("next round due()", elapsed * 1000, len(due)))
+        elapsed, rows = timed(lambda: vault._db.execute(
+            "SELECT * FROM commitments NOT INDEXED WHERE status = 'pending' AND reveal_round <= ? AND end_round > ?",
+            (round + 1, round + 1)).fetchall())
+        print("  {:<22} {:8.2f} ms | {} reveals".format("full scan", elapsed * 1000, len(rows)))
+
+
+class Bidders:
+    def __init__(self):
+        rng = random.Random(3)
+        self.keys = dict((address, sk) for sk, address in (account.generate_account() for _ in range(BIDDERS)))
+        self.bids = {address: (rng.randrange(200_000, 10_000_000), nonce)
+                     for address, nonce in zip(self.keys, new_nonces(BIDDERS))}
+
+    # runs in the stand-in process, which does not run the contracts: the commitments are set up front
+    def setup(self, standin):
+        standin.apps[APP_ID] = sealed_auction_state(APP_ID, standin.round - 10, standin.round + 10,
+                                                    standin.round + 500)
+        for address, (amount, nonce) in self.bids.items():
+            standin.local_states[(address, APP_ID)] = [state_entry("commitment", commitment(amount, nonce))]
+
+
+def bench_restart(directory):
+    bidders = Bidders()
+    path = os.path.join(directory, "restart.db")
+    process, address = spawn_standin(latency=LATENCY, block_time=BLOCK_TIME, setup=bidders.setup)
+    try:
+        async def commit_all():
+            async with aio.AsyncAlgodClient("a" * 64, address) as client:
+                ops = aio.AuctionOperations(client, AuctionInterfaceSealed)
+                with CommitmentVault(path) as vault:
+                    async def commit(bidder):
+                        amount, nonce = bidders.bids[bidder]
+                        await commit_bid(vault, ops, APP_ID, bidders.keys[bidder], amount, 300_000, nonce)
+                    _, errors = await aio.gather_by_item(commit, bidders.keys)
+                    assert not errors, errors
+
+        async def reveal_all():
+            async with aio.AsyncAlgodClient("a" * 64, address) as client:
+                with CommitmentVault(path) as vault:
+                    await client.wait_for_round(vault.next_reveal_round())
+                    start = perf_counter()
+                    results = await reveal_due(client, vault, bidders.keys)
+                    elapsed = perf_counter() - start
+                    reveals = [reveal for reveals in results.values() for reveal in reveals]
+                    return elapsed, reveals, len(vault.due(client.last_round))
+
+        asyncio.run(commit_all())
+        elapsed, reveals, left = asyncio.run(reveal_all())
+    finally:
+        process.terminate()
+    landed = [reveal for reveal in reveals if reveal.status == LANDED]
+    print("restart: {} bidders committed, vault reopened by a new client at commit_end".format(BIDDERS))
+    print("  reveal_due {:8.2f} ms | {} landed in rounds {}, {} skipped (not taking the lead), {} left pending"
+          .format(elapsed * 1000, len(landed), sorted({reveal.round for reveal in landed}),
+                  len(reveals) - len(landed), left))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as directory:
+        bench_nonces()
+        bench_records(directory)
+        bench_due(directory, count)
+        bench_restart(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,110 +8,134 @@ seed(42)
 # user declared account mnemonics
 with open('../mnemonic.txt','r') as f:
     creator_mnemonic = f.read()
-# user declared algod connection parameters. Node must have EnableDeveloperAPI set to true in its config
-algod_address = "http://localhost:4001"
+# user declared algod connection parameters. Programs are assembled locally, so the developer API is not needed
+# one or more algod nodes: reads are spread over the healthy ones
+algod_addresses = ["http://localhost:4001"]
 algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-
-from AuctionContractSealed import *
+# per-endpoint latency and error metrics of the algod calls made by main() are written there
+metrics_path = "algod_metrics.json"
+
+import os
+import sys
+# the shared nam package lives in the repository root
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from AuctionInterfaceSealed import *
+import AuctionInterfaceSealed
+from nam.mirror import AuctionMirror, Call
+from nam.metrics import InstrumentedAlgodClient, operation
+from nam.multinode import MultiNodeAlgodClient
 # from src.committingAuction.AuctionContract import *
 from algosdk.atomic_transaction_composer import AtomicTransactionComposer
 from algosdk.logic import get_application_address
 
+# state of the auctions written to by this module, updated from its confirmed calls instead of read back
+mirror = AuctionMirror(AuctionInterfaceSealed)
+
+@operation("claimWinner")
 def claimWinner(
         client: algod.AlgodClient,
         app_id: int,
         winner_sk: str
 ) -> None:
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     winner_addr = account.address_from_private_key(winner_sk)
     winner_signer = AccountTransactionSigner(winner_sk)
 
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
+    def claim(global_state):
+        nft_id = global_state.nft_id
 
-    atc.add_method_call(app_id=app_id,
-                        method=get_method('payWinner', js),
-                        sender=winner_addr,
-                        sp=suggestedParams,
-                        signer=winner_signer,
-                        foreign_assets=[nft_id],
-                        )
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
+        atc = AtomicTransactionComposer()
 
-    global_state = read_global_state(client, app_id)
-    winnerClaimed = global_state['winner_paid']
+        atc.add_method_call(app_id=app_id,
+                            method=auction_methods.get('payWinner'),
+                            sender=winner_addr,
+                            sp=suggestedParams,
+                            signer=winner_signer,
+                            foreign_assets=[nft_id],
+                            )
+
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, claim)
+    mirror.confirmed_response(app_id, result, [Call('payWinner', winner_addr)])
+
+    global_state = mirror.read(client, app_id).state
+    winnerClaimed = global_state.winner_has_been_paid
     print("Winner claimed: ", winnerClaimed)
 
+@operation("claimSeller")
 def claimSeller(
         client: algod.AlgodClient,
         app_id: int,
         seller_sk: str
 ) -> None:
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     seller_addr = account.address_from_private_key(seller_sk)
     seller_signer = AccountTransactionSigner(seller_sk)
 
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
+    def claim(global_state):
+        nft_id = global_state.nft_id
 
-    atc.add_method_call(app_id=app_id,
-                        method=get_method('paySeller', js),
-                        sender=seller_addr,
-                        sp=suggestedParams,
-                        signer=seller_signer,
-                        foreign_assets=[nft_id],
-                        )
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
+        atc = AtomicTransactionComposer()
 
-    global_state = read_global_state(client, app_id)
-    sellerClaimed = global_state['seller_paid']
+        atc.add_method_call(app_id=app_id,
+                            method=auction_methods.get('paySeller'),
+                            sender=seller_addr,
+                            sp=suggestedParams,
+                            signer=seller_signer,
+                            foreign_assets=[nft_id],
+                            )
+
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, claim)
+    mirror.confirmed_response(app_id, result, [Call('paySeller', seller_addr)])
+
+    global_state = mirror.read(client, app_id).state
+    sellerClaimed = global_state.seller_has_been_paid
     print("Seller claimed: ", sellerClaimed)
 
+@operation("closeAuction")
 def closeAuction(
         client: algod.AlgodClient,
         app_id: int,
         closer: str,
 ):
-    app_addr = client.application_info(app_id).get('params').get('creator')
+    app_addr = mirror.read(client, app_id, with_creator=True).creator
 
-    global_state = read_global_state(client, app_id)
+    def close(global_state):
+        nft_id = global_state.nft_id
 
-    nft_id = global_state['nft_id']
+        accounts: List[str] = [encoding.encode_address(global_state.seller)]
 
-    accounts: List[str] = [encoding.encode_address(global_state["seller"])]
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            accounts.append(encoding.encode_address(global_state.lead_bid_account))
 
-    if any(global_state["bid_account"]):
-        # if "bid_account" is not the zero address
-        accounts.append(encoding.encode_address(global_state["bid_account"]))
+        # Not sure why this is needed
+        accounts.append(app_addr)
 
-    # Not sure why this is needed
-    accounts.append(app_addr)
+        deleteTxn = transaction.ApplicationDeleteTxn(
+            sender=account.address_from_private_key(closer),
+            index=app_id,
+            accounts=accounts,
+            foreign_assets=[nft_id],
+            sp=suggested_params(client),
+        )
+        signedDeleteTxn = deleteTxn.sign(closer)
 
-    deleteTxn = transaction.ApplicationDeleteTxn(
-        sender=account.address_from_private_key(closer),
-        index=app_id,
-        accounts=accounts,
-        foreign_assets=[nft_id],
-        sp=client.suggested_params(),
-    )
-    signedDeleteTxn = deleteTxn.sign(closer)
+        client.send_transaction(signedDeleteTxn)
+        transaction.wait_for_confirmation(client, signedDeleteTxn.get_txid())
+        return signedDeleteTxn
 
-    client.send_transaction(signedDeleteTxn)
-    transaction.wait_for_confirmation(client, signedDeleteTxn.get_txid())
+    signedDeleteTxn = mirror.write(client, app_id, close)
+    mirror.deleted(app_id)
     print(signedDeleteTxn.get_txid())
 
+@operation("placeBid")
 def placeBid(
         client: algod.AlgodClient,
         app_id: int,
@@ -121,55 +145,59 @@ def placeBid(
 ) -> None:
     app_addr = get_application_address(app_id)
 
-    suggestedParams = client.suggested_params()
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    if any(global_state["bid_account"]):
-        # if "bid_account" is not the zero address
-        prevBidLeader = global_state["bid_account"]
-    else:
-        prevBidLeader = None
-
-    atc = AtomicTransactionComposer()
     bidder_addr = account.address_from_private_key(bidder_sk)
     bidder_signer = AccountTransactionSigner(bidder_sk)
 
-    ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, bid_amount)
-    tws = TransactionWithSigner(ptxn, bidder_signer)
-    atc.add_transaction(tws)
-
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
     nonceHex = nonce#.to_bytes(8, 'big')
     app_args = [
         nonceHex
     ]
-    if prevBidLeader == None:
-        atc.add_method_call(app_id=app_id,
-                            method=get_method('on_bid', js),
-                            sender=bidder_addr,
-                            sp=suggestedParams,
-                            signer=bidder_signer,
-                            method_args=app_args,
-                            foreign_assets=[nft_id],
-                            )
-    else:
-        atc.add_method_call(app_id=app_id,
-                            method=get_method('on_bid', js),
-                            sender=bidder_addr,
-                            sp=suggestedParams,
-                            signer=bidder_signer,
-                            method_args=app_args,
-                            foreign_assets=[nft_id],
-                            accounts=[prevBidLeader]
-                            )
-    result = atc.execute(client, 10)
-
-    print("Global state:", read_global_state(client, app_id))
-    print("Local state:", read_local_state(client, bidder_addr, app_id))
-
 
+    def bid(global_state):
+        suggestedParams = suggested_params(client)
+        nft_id = global_state.nft_id
+
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            prevBidLeader = global_state.lead_bid_account
+        else:
+            prevBidLeader = None
+
+        atc = AtomicTransactionComposer()
+
+        ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, bid_amount)
+        tws = TransactionWithSigner(ptxn, bidder_signer)
+        atc.add_transaction(tws)
+
+        if prevBidLeader == None:
+            atc.add_method_call(app_id=app_id,
+                                method=auction_methods.get('on_bid'),
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                method_args=app_args,
+                                foreign_assets=[nft_id],
+                                )
+        else:
+            atc.add_method_call(app_id=app_id,
+                                method=auction_methods.get('on_bid'),
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                method_args=app_args,
+                                foreign_assets=[nft_id],
+                                accounts=[prevBidLeader]
+                                )
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, bid)
+    mirror.confirmed_response(app_id, result, [Call('on_bid', bidder_addr, app_args, bid_amount)])
+
+    print("Global state:", mirror.read(client, app_id).state.as_dict())
+    print("Local state:", mirror.read_local(client, app_id, bidder_addr))
+
+
+@operation("commitAuctionApp")
 def commitAuctionApp(
         client: algod.AlgodClient,
         app_id: int,
@@ -179,21 +207,9 @@ def commitAuctionApp(
         deposit: int
 ):
     app_addr = get_application_address(app_id)
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     bidder_addr = account.address_from_private_key(bidder_sk)
     bidder_signer = AccountTransactionSigner(bidder_sk)
 
-    ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, deposit)
-    tws = TransactionWithSigner(ptxn, bidder_signer)
-    atc.add_transaction(tws)
-
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
-
     commitment = bytes(bytearray.fromhex(
         sha256(value.to_bytes(8, 'big')+nonce.to_bytes(8, 'big')).hexdigest()))
     app_args = [
@@ -202,23 +218,37 @@ def commitAuctionApp(
     print("Commitment: " + commitment.hex())
     print(commitment)
 
-    atc.add_method_call(
-        app_id=app_id,
-        method=get_method("on_commit", js),
-        sender=account.address_from_private_key(bidder_sk),
-        sp=suggestedParams,
-        signer=bidder_signer,
-        method_args=app_args,
-        on_complete=transaction.OnComplete.OptInOC,
-        foreign_assets=[nft_id]
-    )
+    def commit(global_state):
+        nft_id = global_state.nft_id
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
-    print(transaction.wait_for_confirmation(client, result.tx_ids[1]))
-    print("Local state:", read_local_state(client, bidder_addr, app_id))
+        atc = AtomicTransactionComposer()
 
+        ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, deposit)
+        tws = TransactionWithSigner(ptxn, bidder_signer)
+        atc.add_transaction(tws)
 
+        atc.add_method_call(
+            app_id=app_id,
+            method=auction_methods.get("on_commit"),
+            sender=account.address_from_private_key(bidder_sk),
+            sp=suggestedParams,
+            signer=bidder_signer,
+            method_args=app_args,
+            on_complete=transaction.OnComplete.OptInOC,
+            foreign_assets=[nft_id]
+        )
 
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, commit)
+    mirror.confirmed_response(app_id, result, [Call('on_commit', bidder_addr, app_args, deposit)])
+    print(result.abi_results[0].tx_info)
+    print("Local state:", mirror.read_local(client, app_id, bidder_addr))
+
+
+
+@operation("setupAuctionApp")
 def setupAuctionApp(
         client: algod.AlgodClient,
         app_id: int,
@@ -228,7 +258,7 @@ def setupAuctionApp(
 ):
     app_addr = get_application_address(app_id)
 
-    suggestedParams = client.suggested_params()
+    suggestedParams = suggested_params(client)
 
     fundingAmount = (
         # min account balance
@@ -249,9 +279,7 @@ def setupAuctionApp(
     tws = TransactionWithSigner(ptxn, signer_funder)
     atc.add_transaction(tws)
 
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
-    atc.add_method_call(app_id=app_id, method=get_method('on_setup', js), sender=funder_addr,
+    atc.add_method_call(app_id=app_id, method=auction_methods.get('on_setup'), sender=funder_addr,
                         sp=suggestedParams, signer=signer_funder, foreign_assets=[nft_id])
 
     atxn = transaction.AssetTransferTxn(nft_holder_addr, suggestedParams, app_addr, 1, nft_id)
@@ -264,6 +292,7 @@ def setupAuctionApp(
 
 
 
+@operation("createAuctionApp")
 def createAuctionApp(
         algod_client: algod.AlgodClient,
         senderSK: str,
@@ -286,27 +315,8 @@ def createAuctionApp(
     global_schema = transaction.StateSchema(global_ints, global_bytes)
     local_schema = transaction.StateSchema(local_ints, local_bytes)
 
-    # Compile the program
-    router = getRouter()
-    approval_program, clear_program, contract = router.compile_program(version=6,
-                                                                       optimize=OptimizeOptions(scratch_slots=True))
-
-    with open("./com_auction_approval.teal", "w") as f:
-        f.write(approval_program)
-
-    with open("./com_auction_clear.teal", "w") as f:
-        f.write(clear_program)
-
-    with open("./com_auction_contract.json", "w") as f:
-        import json
-
-        f.write(json.dumps(contract.dictify()))
-
-    # compile program to binary
-    approval_program_compiled = compile_program(algod_client, approval_program)
-
-    # compile program to binary
-    clear_state_program_compiled = compile_program(algod_client, clear_program)
+    # Load the programs from the prebuilt artifact bundle, or compile the PyTeal contract when there is none
+    approval_program_compiled, clear_state_program_compiled = auction_programs(algod_client)
 
     print("--------------------------------------------")
     print("Deploying Auction application......")
@@ -326,16 +336,13 @@ def createAuctionApp(
 
     atc = AtomicTransactionComposer()
     signer = AccountTransactionSigner(senderSK)
-    sp = algod_client.suggested_params()
-
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
+    sp = suggested_params(algod_client)
 
     # Simple call to the `create_app` method, method_args can be any type but _must_
     # match those in the method signature of the contract
     atc.add_method_call(
         app_id=0,
-        method=get_method("create_app", js),
+        method=auction_methods.get("create_app"),
         sender=account.address_from_private_key(senderSK),
         sp=sp,
         signer=signer,
@@ -347,15 +354,15 @@ def createAuctionApp(
     )
 
     result = atc.execute(algod_client, 10)
-    app_id = transaction.wait_for_confirmation(algod_client, result.tx_ids[0])['application-index']
+    app_id = mirror.created(result.abi_results[0].tx_info, account.address_from_private_key(senderSK))
 
     for res in result.abi_results:
         print(res.return_value)
 
-    print("Global state:", read_global_state(algod_client, app_id))
+    print("Global state:", mirror.read(algod_client, app_id).state.as_dict())
 
     assert app_id is not None and app_id > 0
-    return app_id, contract
+    return app_id, auction_methods.contract
 
 def main():
     # user declared account mnemonics
@@ -365,8 +372,8 @@ def main():
     creator_address = account.address_from_private_key(creator_private_key)
     print("Creator address",creator_address)
 
-    # initialize an algodClient
-    algod_client = algod.AlgodClient(algod_token, algod_address)
+    # initialize an algodClient that keeps its connections to the nodes alive and records metrics of every call
+    algod_client = InstrumentedAlgodClient(MultiNodeAlgodClient.from_addresses(algod_token, algod_addresses))
     seller_sk = account.generate_account()[0]
     seller = account.address_from_private_key(seller_sk)
 
@@ -378,28 +385,9 @@ def main():
     # assert creator_address == "7JMQUHTDHI5MIEEK4MT7CT3H4TMH7FW22PRVIBLWCC7UTMF6Z6GILV7SYI"
 
     amt = 1000000
-    print(f"\nwanting to transfer {amt} microalgos from creator to seller\n")
-    txn = transaction.PaymentTxn(
-        sender=creator_address,
-        receiver=seller,
-        amt=amt,
-        sp=algod_client.suggested_params(),
-    )
-    signedTxn = txn.sign(creator_private_key)
-    algod_client.send_transaction(signedTxn)
-    transaction.wait_for_confirmation(algod_client, signedTxn.get_txid())
-
-    amt = 1000000
-    print(f"\nwanting to transfer {amt} microalgos from creator to bidder\n")
-    txn = transaction.PaymentTxn(
-        sender=creator_address,
-        receiver=bidder,
-        amt=amt,
-        sp=algod_client.suggested_params(),
-    )
-    signedTxn = txn.sign(creator_private_key)
-    algod_client.send_transaction(signedTxn)
-    transaction.wait_for_confirmation(algod_client, signedTxn.get_txid())
+    print(f"\nwanting to transfer {amt} microalgos from creator to seller and to bidder\n")
+    failures = fundAccounts(algod_client, creator_address, creator_private_key, [(seller, amt), (bidder, amt)])
+    assert not failures, failures
 
     nftAmount = 1
     nftID = createDummyAsset(algod_client, nftAmount, seller, seller_sk)
@@ -481,5 +469,8 @@ def main():
     print("Closing the Auction application......")
     closeAuction(algod_client, app_id, creator_private_key)
 
+    print(algod_client.metrics.report())
+    algod_client.metrics.dump(metrics_path)
+
 if __name__ == "__main__":
     main()
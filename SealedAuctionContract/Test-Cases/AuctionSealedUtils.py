@@ -4,20 +4,26 @@ from random import randrange, seed
 # Set seed of random generator for nonce - for testing purposes only!
 seed(42)
 
-from SealedAuctionContract.AuctionContractSealed import *
+from SealedAuctionContract.AuctionInterfaceSealed import *
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam.mirror import AuctionMirror, Call
+from nam.pipeline import TransactionPipeline
 # from src.committingAuction.AuctionContract import *
 from algosdk.atomic_transaction_composer import AtomicTransactionComposer
 from algosdk.logic import get_application_address
 
+# state of the auctions written to by this module, updated from its confirmed calls instead of read back
+mirror = AuctionMirror(AuctionInterfaceSealed)
+
 def getWinner(
         client: algod.AlgodClient,
         app_id: int,
         bidders_sk: List[str],
         bidders_addr: List[str],
 ):
-    global_state = read_global_state(client, app_id)
+    global_state = mirror.read(client, app_id).state
 
-    winner_addr = encoding.encode_address(global_state["bid_account"])
+    winner_addr = encoding.encode_address(global_state.lead_bid_account)
     winner_sk = bidders_sk[bidders_addr.index(winner_addr)]
     return winner_sk, winner_addr
 
@@ -26,32 +32,33 @@ def claimWinner(
         app_id: int,
         winner_sk: str
 ) -> None:
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     winner_addr = account.address_from_private_key(winner_sk)
     winner_signer = AccountTransactionSigner(winner_sk)
 
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
+    def claim(global_state):
+        nft_id = global_state.nft_id
 
-    atc.add_method_call(app_id=app_id,
-                        method=get_method('payWinner', js),
-                        sender=winner_addr,
-                        sp=suggestedParams,
-                        signer=winner_signer,
-                        foreign_assets=[nft_id],
-                        )
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
+        atc = AtomicTransactionComposer()
+
+        atc.add_method_call(app_id=app_id,
+                            method=auction_methods.get('payWinner'),
+                            sender=winner_addr,
+                            sp=suggestedParams,
+                            signer=winner_signer,
+                            foreign_assets=[nft_id],
+                            )
+
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, claim)
+    mirror.confirmed_response(app_id, result, [Call('payWinner', winner_addr)])
     for res in result.tx_ids:
         print("\tTx ID:" + res)
 
-    global_state = read_global_state(client, app_id)
-    winnerClaimed = global_state['winner_paid']
+    global_state = mirror.read(client, app_id).state
+    winnerClaimed = global_state.winner_has_been_paid
     print("\tWinner claimed: ", winnerClaimed)
 
 def claimSeller(
@@ -59,32 +66,33 @@ def claimSeller(
         app_id: int,
         seller_sk: str
 ) -> None:
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     seller_addr = account.address_from_private_key(seller_sk)
     seller_signer = AccountTransactionSigner(seller_sk)
 
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
+    def claim(global_state):
+        nft_id = global_state.nft_id
 
-    atc.add_method_call(app_id=app_id,
-                        method=get_method('paySeller', js),
-                        sender=seller_addr,
-                        sp=suggestedParams,
-                        signer=seller_signer,
-                        foreign_assets=[nft_id],
-                        )
+        suggestedParams = suggested_params(client)
 
-    result = atc.execute(client, 10)
+        atc = AtomicTransactionComposer()
+
+        atc.add_method_call(app_id=app_id,
+                            method=auction_methods.get('paySeller'),
+                            sender=seller_addr,
+                            sp=suggestedParams,
+                            signer=seller_signer,
+                            foreign_assets=[nft_id],
+                            )
+
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, claim)
+    mirror.confirmed_response(app_id, result, [Call('paySeller', seller_addr)])
     for res in result.tx_ids:
         print("\tTx ID:" + res)
 
-    global_state = read_global_state(client, app_id)
-    sellerClaimed = global_state['seller_paid']
+    global_state = mirror.read(client, app_id).state
+    sellerClaimed = global_state.seller_has_been_paid
     print("\tSeller claimed: ", sellerClaimed)
 
 def closeAuction(
@@ -92,31 +100,34 @@ def closeAuction(
         app_id: int,
         closer: str,
 ):
-    app_addr = client.application_info(app_id).get('params').get('creator')
+    app_addr = mirror.read(client, app_id, with_creator=True).creator
 
-    global_state = read_global_state(client, app_id)
+    def close(global_state):
+        nft_id = global_state.nft_id
 
-    nft_id = global_state['nft_id']
+        accounts: List[str] = [encoding.encode_address(global_state.seller)]
 
-    accounts: List[str] = [encoding.encode_address(global_state["seller"])]
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            accounts.append(encoding.encode_address(global_state.lead_bid_account))
 
-    if any(global_state["bid_account"]):
-        # if "bid_account" is not the zero address
-        accounts.append(encoding.encode_address(global_state["bid_account"]))
+        accounts.append(app_addr)
 
-    accounts.append(app_addr)
+        deleteTxn = transaction.ApplicationDeleteTxn(
+            sender=account.address_from_private_key(closer),
+            index=app_id,
+            accounts=accounts,
+            foreign_assets=[nft_id],
+            sp=suggested_params(client),
+        )
+        signedDeleteTxn = deleteTxn.sign(closer)
 
-    deleteTxn = transaction.ApplicationDeleteTxn(
-        sender=account.address_from_private_key(closer),
-        index=app_id,
-        accounts=accounts,
-        foreign_assets=[nft_id],
-        sp=client.suggested_params(),
-    )
-    signedDeleteTxn = deleteTxn.sign(closer)
+        client.send_transaction(signedDeleteTxn)
+        transaction.wait_for_confirmation(client, signedDeleteTxn.get_txid())
+        return signedDeleteTxn
 
-    client.send_transaction(signedDeleteTxn)
-    transaction.wait_for_confirmation(client, signedDeleteTxn.get_txid())
+    signedDeleteTxn = mirror.write(client, app_id, close)
+    mirror.deleted(app_id)
     print("\t Tx ID:" + signedDeleteTxn.get_txid())
 
 def placeBid(
@@ -128,55 +139,58 @@ def placeBid(
 ) -> None:
     app_addr = get_application_address(app_id)
 
-    suggestedParams = client.suggested_params()
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-
-    if any(global_state["bid_account"]):
-        # if "bid_account" is not the zero address
-        prevBidLeader = [encoding.encode_address(global_state["bid_account"])]
-    else:
-        prevBidLeader = None
-
-    atc = AtomicTransactionComposer()
     bidder_addr = account.address_from_private_key(bidder_sk)
     bidder_signer = AccountTransactionSigner(bidder_sk)
 
-    ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, bid_amount)
-    tws = TransactionWithSigner(ptxn, bidder_signer)
-    atc.add_transaction(tws)
-
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
     nonceHex = nonce#.to_bytes(8, 'big')
     app_args = [
         nonceHex
     ]
-    if prevBidLeader == None:
-        atc.add_method_call(app_id=app_id,
-                            method=get_method('on_bid', js),
-                            sender=bidder_addr,
-                            sp=suggestedParams,
-                            signer=bidder_signer,
-                            method_args=app_args,
-                            foreign_assets=[nft_id],
-                            )
-    else:
-        atc.add_method_call(app_id=app_id,
-                            method=get_method('on_bid', js),
-                            sender=bidder_addr,
-                            sp=suggestedParams,
-                            signer=bidder_signer,
-                            method_args=app_args,
-                            foreign_assets=[nft_id],
-                            accounts=prevBidLeader
-                            )
-    result = atc.execute(client, 10)
+
+    def bid(global_state):
+        suggestedParams = suggested_params(client)
+        nft_id = global_state.nft_id
+
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            prevBidLeader = [encoding.encode_address(global_state.lead_bid_account)]
+        else:
+            prevBidLeader = None
+
+        atc = AtomicTransactionComposer()
+
+        ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, bid_amount)
+        tws = TransactionWithSigner(ptxn, bidder_signer)
+        atc.add_transaction(tws)
+
+        if prevBidLeader == None:
+            atc.add_method_call(app_id=app_id,
+                                method=auction_methods.get('on_bid'),
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                method_args=app_args,
+                                foreign_assets=[nft_id],
+                                )
+        else:
+            atc.add_method_call(app_id=app_id,
+                                method=auction_methods.get('on_bid'),
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                method_args=app_args,
+                                foreign_assets=[nft_id],
+                                accounts=prevBidLeader
+                                )
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, bid)
+    mirror.confirmed_response(app_id, result, [Call('on_bid', bidder_addr, app_args, bid_amount)])
     for res in result.tx_ids:
         print("\tTx ID:" + res)
 
-    print("\tGlobal state:", read_global_state(client, app_id))
-    print("\tLocal state:", read_local_state(client, bidder_addr, app_id))
+    print("\tGlobal state:", mirror.read(client, app_id).state.as_dict())
+    print("\tLocal state:", mirror.read_local(client, app_id, bidder_addr))
 
 
 def commitAuctionApp(
@@ -185,24 +199,13 @@ def commitAuctionApp(
         bidder_sk: str,
         value: int,
         nonce: int,
-        deposit: int
+        deposit: int,
+        pipeline: TransactionPipeline = None
 ):
     app_addr = get_application_address(app_id)
-    global_state = read_global_state(client, app_id)
-    nft_id = global_state['nft_id']
-    suggestedParams = client.suggested_params()
-
-    atc = AtomicTransactionComposer()
     bidder_addr = account.address_from_private_key(bidder_sk)
     bidder_signer = AccountTransactionSigner(bidder_sk)
 
-    ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, deposit)
-    tws = TransactionWithSigner(ptxn, bidder_signer)
-    atc.add_transaction(tws)
-
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
-
     commitment = bytes(bytearray.fromhex(
         sha256(value.to_bytes(8, 'big')+nonce.to_bytes(8, 'big')).hexdigest()))
     app_args = [
@@ -210,21 +213,40 @@ def commitAuctionApp(
     ]
     print("\tCommitment (hex): " + commitment.hex())
 
-    atc.add_method_call(
-        app_id=app_id,
-        method=get_method("on_commit", js),
-        sender=account.address_from_private_key(bidder_sk),
-        sp=suggestedParams,
-        signer=bidder_signer,
-        method_args=app_args,
-        on_complete=transaction.OnComplete.OptInOC,
-        foreign_assets=[nft_id]
-    )
-
-    result = atc.execute(client, 10)
+    def commit(global_state):
+        nft_id = global_state.nft_id
+        suggestedParams = suggested_params(client)
+
+        atc = AtomicTransactionComposer()
+
+        ptxn = transaction.PaymentTxn(bidder_addr, suggestedParams, app_addr, deposit)
+        tws = TransactionWithSigner(ptxn, bidder_signer)
+        atc.add_transaction(tws)
+
+        atc.add_method_call(
+            app_id=app_id,
+            method=auction_methods.get("on_commit"),
+            sender=account.address_from_private_key(bidder_sk),
+            sp=suggestedParams,
+            signer=bidder_signer,
+            method_args=app_args,
+            on_complete=transaction.OnComplete.OptInOC,
+            foreign_assets=[nft_id]
+        )
+
+        if pipeline is not None:
+            # commits of different bidders are independent: submit now, confirm together with the others
+            return pipeline.submit(atc)
+
+        return atc.execute(client, 10)
+
+    result = mirror.write(client, app_id, commit)
+    if pipeline is not None:
+        return result
+    mirror.confirmed_response(app_id, result, [Call('on_commit', bidder_addr, app_args, deposit)])
     for res in result.tx_ids:
         print("\tTx ID:" + res)
-    print("\tLocal state:", read_local_state(client, bidder_addr, app_id))
+    print("\tLocal state:", mirror.read_local(client, app_id, bidder_addr))
 
 
 
@@ -237,7 +259,7 @@ def setupAuctionApp(
 ):
     app_addr = get_application_address(app_id)
 
-    suggestedParams = client.suggested_params()
+    suggestedParams = suggested_params(client)
 
     fundingAmount = (
         # min account balance
@@ -258,9 +280,7 @@ def setupAuctionApp(
     tws = TransactionWithSigner(ptxn, signer_funder)
     atc.add_transaction(tws)
 
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
-    atc.add_method_call(app_id=app_id, method=get_method('on_setup', js), sender=funder_addr,
+    atc.add_method_call(app_id=app_id, method=auction_methods.get('on_setup'), sender=funder_addr,
                         sp=suggestedParams, signer=signer_funder, foreign_assets=[nft_id])
 
     atxn = transaction.AssetTransferTxn(nft_holder_addr, suggestedParams, app_addr, 1, nft_id)
@@ -295,27 +315,8 @@ def createAuctionApp(
     global_schema = transaction.StateSchema(global_ints, global_bytes)
     local_schema = transaction.StateSchema(local_ints, local_bytes)
 
-    # Compile the program
-    router = getRouter()
-    approval_program, clear_program, contract = router.compile_program(version=6,
-                                                                       optimize=OptimizeOptions(scratch_slots=True))
-
-    with open("./com_auction_approval.teal", "w") as f:
-        f.write(approval_program)
-
-    with open("./com_auction_clear.teal", "w") as f:
-        f.write(clear_program)
-
-    with open("./com_auction_contract.json", "w") as f:
-        import json
-
-        f.write(json.dumps(contract.dictify()))
-
-    # compile program to binary
-    approval_program_compiled = compile_program(algod_client, approval_program)
-
-    # compile program to binary
-    clear_state_program_compiled = compile_program(algod_client, clear_program)
+    # Load the programs from the prebuilt artifact bundle, or compile the PyTeal contract when there is none
+    approval_program_compiled, clear_state_program_compiled = auction_programs(algod_client)
 
     app_args = [
         seller,
@@ -332,16 +333,13 @@ def createAuctionApp(
 
     atc = AtomicTransactionComposer()
     signer = AccountTransactionSigner(senderSK)
-    sp = algod_client.suggested_params()
-
-    with open("./com_auction_contract.json") as f:
-        js = f.read()
+    sp = suggested_params(algod_client)
 
     # Simple call to the `create_app` method, method_args can be any type but _must_
     # match those in the method signature of the contract
     atc.add_method_call(
         app_id=0,
-        method=get_method("create_app", js),
+        method=auction_methods.get("create_app"),
         sender=account.address_from_private_key(senderSK),
         sp=sp,
         signer=signer,
@@ -353,11 +351,11 @@ def createAuctionApp(
     )
 
     result = atc.execute(algod_client, 10)
-    app_id = transaction.wait_for_confirmation(algod_client, result.tx_ids[0])['application-index']
+    app_id = mirror.created(result.abi_results[0].tx_info, account.address_from_private_key(senderSK))
 
     for res in result.tx_ids:
         print("\tTx ID: " + res)
-    print("\tGlobal state:", read_global_state(algod_client, app_id))
+    print("\tGlobal state:", mirror.read(algod_client, app_id).state.as_dict())
 
     assert app_id is not None and app_id > 0
-    return app_id, contract
+    return app_id, auction_methods.contract
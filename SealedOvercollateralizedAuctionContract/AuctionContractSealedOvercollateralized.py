@@ -466,3 +466,14 @@ def getRouter():
         )
 
     return router
+
+
+# State views, ABI methods and state schemas live in the PyTeal-free client interface
+try:
+    from .AuctionInterfaceSealedOvercollateralized import (
+        AuctionState, BidderState, auction_global_schema, auction_local_schema, auction_methods, compile_auction)
+except ImportError:
+    from AuctionInterfaceSealedOvercollateralized import (
+        AuctionState, BidderState, auction_global_schema, auction_local_schema, auction_methods, compile_auction)
+
+check_state_views(globals(), AuctionState, BidderState)
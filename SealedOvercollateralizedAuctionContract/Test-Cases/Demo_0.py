@@ -12,6 +12,8 @@
 # -----------------           Imports          -----------------
 from random import randrange, seed
 from AuctionSealedOvercollateralizedUtils import *
+from nam.backoff import ThrottledAlgodClient
+from nam.multinode import MultiNodeAlgodClient
 
 # -----------------   User defined variables   -----------------
 # Main account mnemonic.
@@ -22,8 +24,9 @@ with open('../../mnemonic.txt', 'r') as f:
 # Number of bidder accounts
 NUM_BID_ACCS = 3
 
-# Algod connection parameters. Node must have EnableDeveloperAPI set to true in its config
-algod_address = "https://node.testnet.algoexplorerapi.io"  # "http://localhost:4001"  # "https://node.testnet.algoexplorerapi.io"
+# Algod connection parameters. Programs are assembled locally, so any node (including public ones) will do
+# one or more algod nodes: reads are spread over the healthy ones
+algod_addresses = ["https://node.testnet.algoexplorerapi.io"]  # ["http://localhost:4001"]
 algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
 
 # Auction type. Possible options:
@@ -72,8 +75,8 @@ REVEAL_DURATION = 41  # 21  # 41
 
 def main():
 
-    # Initialize an algodClient
-    algod_client = algod.AlgodClient(algod_token, algod_address)
+    # Initialize an algodClient that keeps its connections to the nodes alive and retries throttled requests
+    algod_client = ThrottledAlgodClient(MultiNodeAlgodClient.from_addresses(algod_token, algod_addresses))
 
     print("Relevant addresses:")
     creator_private_key = get_private_key_from_mnemonic(creator_mnemonic)
@@ -93,9 +96,9 @@ def main():
 
     # Fund seller and bidder accounts
     print(f"Creator address funding other relevant accounts with {AMT} microAlgo...")
-    fundAccount(algod_client, creator_address, seller, creator_private_key, AMT)
-    for b in bidders:
-        fundAccount(algod_client, creator_address, b, creator_private_key, AMT)
+    failures = fundAccounts(algod_client, creator_address, creator_private_key,
+                            [(addr, AMT) for addr in [seller] + bidders])
+    assert not failures, failures
 
     print("\n--------------------------------------------")
     # Seller creates an NFT
@@ -136,8 +139,12 @@ def main():
     waitUntilRound(algod_client, startRound)
     print("--------------------------------------------")
     print("Committing bids to the auction ...")
+    pipeline = TransactionPipeline(algod_client)
     for i, bsk in enumerate(bidders_sk):
-        commitAuctionApp(algod_client, app_id, bsk, BID_AMOUNTS[i], NONCES[i], DEPOSITS[i])
+        commitAuctionApp(algod_client, app_id, bsk, BID_AMOUNTS[i], NONCES[i], DEPOSITS[i], pipeline)
+    for commit in pipeline.flush():
+        result = commit.result()
+        print("\tCommit {} confirmed in round {}".format(result.tx_ids[-1], result.confirmed_round))
     # Wait for the commit period to end
     waitUntilRound(algod_client, commitEndRound)
     print("Commit phase ended.")
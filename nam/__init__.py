@@ -0,0 +1 @@
+# NFT auction manager (NAM) runtime shared by the three auction contracts
@@ -0,0 +1,596 @@
+import asyncio
+import base64
+import copy
+import json
+from hashlib import sha256
+from random import randint
+from time import perf_counter, time
+from urllib import parse
+
+from algosdk import account, constants, encoding, error
+from algosdk.atomic_transaction_composer import (AccountTransactionSigner, AtomicTransactionComposer,
+                                                 AtomicTransactionResponse, TransactionWithSigner)
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+from algosdk.v2client.algod import api_version_path_prefix
+
+from nam.metrics import endpoint_name
+from nam.mirror import AuctionMirror, Call, stale_state_refusal
+from nam.pipeline import atc_response
+from util import format_state
+
+# asyncio counterpart of util.py and of the AuctionMain operations: every call that talks to algod is a
+# coroutine, so a single event loop can drive thousands of bidders and auctions at once.
+#
+# AsyncAlgodClient speaks HTTP/1.1 to algod over asyncio streams and keeps a pool of persistent connections.
+# Like the blocking helpers, all coroutines sharing a client share one wait-for-block long-poll and one
+# round-scoped suggested params cache. Unlike them they do not print: results are returned instead.
+
+
+class AsyncAlgodClient:
+    def __init__(self, algod_token, algod_address, headers=None, pool_size: int = 64, timeout: float = 30.0,
+                 params_max_age: float = 3.5, metrics=None):
+        url = parse.urlsplit(algod_address)
+        if url.scheme not in ("http", "https"):
+            raise ValueError("unsupported algod address {}".format(algod_address))
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+        self.timeout = timeout
+        self.params_max_age = params_max_age
+        # optional nam.metrics.AlgodMetrics recording every request
+        self.metrics = metrics
+        self._ssl = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port or (443 if self._ssl else 80)
+        self._base_path = url.path.rstrip("/")
+        self._slots = asyncio.Semaphore(pool_size)
+        # idle (reader, writer) pairs, most recently used last
+        self._idle = []
+        self.connections_opened = 0
+        # shared wait-for-block long-poll
+        self.last_round = None
+        self._round_changed = asyncio.Condition()
+        self._waiting = 0
+        self._poller = None
+        self._poll_error = None
+        # round-scoped suggested params
+        self._params = None
+        self._params_fetched_at = 0
+        self._params_lock = asyncio.Lock()
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        if self._poller is not None:
+            self._poller.cancel()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _open(self):
+        self.connections_opened += 1
+        return await asyncio.open_connection(self._host, self._port, ssl=self._ssl or None)
+
+    async def _exchange(self, conn, request: bytes):
+        reader, writer = conn
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("algod closed the connection")
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, value = line.decode("latin-1").split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        else:
+            body = await reader.read()
+            headers["connection"] = "close"
+        keep_alive = version != "HTTP/1.0" and headers.get("connection", "").lower() != "close"
+        return int(status), body, keep_alive
+
+    async def _send(self, method, url, data, header):
+        head = ["{} {} HTTP/1.1".format(method, url), "Host: {}".format(self._host)]
+        head += ["{}: {}".format(k, v) for k, v in header.items()]
+        if data is not None or method == "POST":
+            head.append("Content-Length: {}".format(len(data or b"")))
+        request = ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + (data or b"")
+
+        async with self._slots:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._open()
+            try:
+                try:
+                    status, body, keep_alive = await asyncio.wait_for(self._exchange(conn, request), self.timeout)
+                except (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError):
+                    # the node closed the idle connection in the meantime, retry once on a fresh one
+                    if not reused:
+                        raise
+                    conn[1].close()
+                    conn = await self._open()
+                    status, body, keep_alive = await asyncio.wait_for(self._exchange(conn, request), self.timeout)
+            except BaseException:
+                conn[1].close()
+                raise
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+        return status, body
+
+    # Same request building and error mapping as AlgodClient.algod_request
+    async def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        if self.metrics is None:
+            return await self._algod_request(method, requrl, params, data, headers, response_format)
+        endpoint = endpoint_name(method, requrl)
+        request_size = len(data) if data else 0
+        start = perf_counter()
+        try:
+            response, size = await self._algod_request(method, requrl, params, data, headers, response_format,
+                                                        with_size=True)
+        except Exception as err:
+            self.metrics.record(endpoint, perf_counter() - start, request_size, err=err)
+            raise
+        self.metrics.record(endpoint, perf_counter() - start, request_size, size)
+        return response
+
+    async def _algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json",
+                             with_size=False):
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        if requrl not in constants.unversioned_paths:
+            requrl = api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        status, body = await self._send(method, self._base_path + requrl, data, header)
+        if status >= 400:
+            message = body.decode("utf-8", errors="replace")
+            try:
+                message = json.loads(message)["message"]
+            except Exception:
+                pass
+            raise error.AlgodHTTPError(message, status)
+        response = body
+        if response_format == "json":
+            try:
+                response = json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return (response, len(body)) if with_size else response
+
+    async def status(self):
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num: int):
+        return await self.algod_request("GET", "/status/wait-for-block-after/" + str(block_num))
+
+    async def application_info(self, application_id: int):
+        return await self.algod_request("GET", "/applications/" + str(application_id))
+
+    async def account_info(self, address: str):
+        return await self.algod_request("GET", "/accounts/" + address)
+
+    async def account_application_info(self, address: str, application_id: int):
+        return await self.algod_request("GET", "/accounts/" + address + "/applications/" + str(application_id))
+
+    async def pending_transaction_info(self, transaction_id: str):
+        return await self.algod_request("GET", "/transactions/pending/" + transaction_id, params={"format": "json"})
+
+    async def send_transactions(self, txns) -> str:
+        data = b"".join(base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns)
+        response = await self.algod_request("POST", "/transactions", data=data,
+                                            headers={"Content-Type": "application/x-binary"})
+        return response["txId"]
+
+    async def send_transaction(self, txn) -> str:
+        return await self.send_transactions([txn])
+
+    # Waits until the given round has been accepted and returns the number of seconds waited.
+    # One long-poll task follows the chain for as long as any coroutine is waiting.
+    async def wait_for_round(self, round: int) -> float:
+        start = time()
+        async with self._round_changed:
+            self._waiting += 1
+            try:
+                while self.last_round is None or self.last_round < round:
+                    # a poller cancelled with the loop it ran on is done without having cleared itself
+                    if self._poller is None or self._poller.done():
+                        self._poll_error = None
+                        self._poller = asyncio.create_task(self._poll())
+                    await self._round_changed.wait()
+                    if self._poll_error is not None:
+                        raise self._poll_error
+            finally:
+                self._waiting -= 1
+        return time() - start
+
+    async def _publish(self, last_round: int):
+        async with self._round_changed:
+            if self.last_round is None or last_round > self.last_round:
+                self.last_round = last_round
+            self._round_changed.notify_all()
+
+    async def _poll(self):
+        try:
+            last_round = (await self.status()).get("last-round")
+            await self._publish(last_round)
+            while self._waiting:
+                last_round = (await self.status_after_block(last_round)).get("last-round")
+                await self._publish(last_round)
+            self._poller = None
+        except Exception as err:
+            # wake the waiters, which re-raise the error; the next wait starts a new poller
+            async with self._round_changed:
+                self._poll_error = err
+                self._poller = None
+                self._round_changed.notify_all()
+
+    def _params_stale(self) -> bool:
+        if self._params is None or time() - self._params_fetched_at > self.params_max_age:
+            return True
+        return self.last_round is not None and self.last_round > self._params.first
+
+    # Suggested params fetched at most once per round, handed out as copies
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        async with self._params_lock:
+            if self._params_stale():
+                res = await self.algod_request("GET", "/transactions/params")
+                self._params = transaction.SuggestedParams(
+                    res["fee"], res["last-round"], res["last-round"] + 1000, res["genesis-hash"],
+                    res["genesis-id"], False, res["consensus-version"], res["min-fee"])
+                self._params_fetched_at = time()
+            return copy.copy(self._params)
+
+    def invalidate_params(self):
+        self._params = None
+
+
+async def waitUntilRound(client: AsyncAlgodClient, round: int) -> float:
+    return await client.wait_for_round(round)
+
+
+# Waits for a transaction to be confirmed within wait_rounds rounds and returns its pending info.
+# The rounds are counted from a fresh status, as the shared poller's last_round stops moving while nobody waits.
+async def wait_for_confirmation(client: AsyncAlgodClient, txid: str, wait_rounds: int = 10) -> dict:
+    start_round = (await client.status()).get("last-round")
+    current_round = start_round
+    while True:
+        info = await client.pending_transaction_info(txid)
+        if info.get("confirmed-round", 0) > 0:
+            return info
+        if info.get("pool-error"):
+            raise error.TransactionRejectedError("Transaction rejected: " + info["pool-error"])
+        if current_round >= start_round + wait_rounds:
+            raise error.ConfirmationTimeoutError(
+                "Wait for transaction id {} timed out after {} rounds".format(txid, wait_rounds))
+        current_round += 1
+        await client.wait_for_round(current_round)
+
+
+# Signs, submits and confirms the group of an AtomicTransactionComposer, decoding the ABI return values
+# the same way AtomicTransactionComposer.execute does
+async def execute(client: AsyncAlgodClient, atc: AtomicTransactionComposer,
+                  wait_rounds: int = 10) -> AtomicTransactionResponse:
+    signed = atc.gather_signatures()
+    await client.send_transactions(signed)
+    tx_ids = atc.tx_ids
+    response = await wait_for_confirmation(client, tx_ids[0], wait_rounds)
+
+    method_txids = [tx_ids[i] for i in atc.method_dict if tx_ids[i] != tx_ids[0]]
+    infos = await asyncio.gather(*(client.pending_transaction_info(tx_id) for tx_id in method_txids))
+    tx_infos = dict(zip(method_txids, infos))
+    tx_infos[tx_ids[0]] = response
+    return atc_response(atc, response["confirmed-round"], tx_infos)
+
+
+async def read_global_state(client: AsyncAlgodClient, app_id: int, view=None):
+    app = await client.application_info(app_id)
+    global_state = app["params"].get("global-state", [])
+    if view is not None:
+        return view.decode(global_state)
+    return format_state(global_state)
+
+
+async def read_local_state(client: AsyncAlgodClient, addr: str, app_id: int, view=None):
+    try:
+        info = await client.account_application_info(addr, app_id)
+    except error.AlgodHTTPError as err:
+        if err.code == 404:
+            return None
+        raise
+    local_state = info.get("app-local-state", {}).get("key-value", [])
+    if view is not None:
+        return view.decode(local_state)
+    return format_state(local_state)
+
+
+# Runs the coroutine function fn(item) for every item, at most `limit` at a time.
+# Returns (results, errors) keyed by item, like util.map_concurrently.
+async def gather_by_item(fn, items, limit: int = 256):
+    items = list(dict.fromkeys(items))
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(item):
+        async with semaphore:
+            return await fn(item)
+
+    outcomes = await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+    results = {}
+    errors = {}
+    for item, outcome in zip(items, outcomes):
+        if isinstance(outcome, Exception):
+            errors[item] = outcome
+        else:
+            results[item] = outcome
+    return results, errors
+
+
+async def read_global_states(client: AsyncAlgodClient, app_ids, view=None, limit: int = 256):
+    return await gather_by_item(lambda app_id: read_global_state(client, app_id, view), app_ids, limit)
+
+
+async def read_local_states(client: AsyncAlgodClient, addrs, app_id: int, view=None, limit: int = 256):
+    return await gather_by_item(lambda addr: read_local_state(client, addr, app_id, view), addrs, limit)
+
+
+async def _send_and_confirm(client: AsyncAlgodClient, signedTxn) -> dict:
+    await client.send_transaction(signedTxn)
+    return await wait_for_confirmation(client, signedTxn.get_txid())
+
+
+async def optInToAsset(client: AsyncAlgodClient, assetID: int, sk: str) -> dict:
+    txn = transaction.AssetOptInTxn(
+        sender=account.address_from_private_key(sk),
+        index=assetID,
+        sp=await client.suggested_params(),
+    )
+    return await _send_and_confirm(client, txn.sign(sk))
+
+
+async def fundAccount(client: AsyncAlgodClient, sender: str, receiver: str, sender_sk: str, amt: int) -> dict:
+    txn = transaction.PaymentTxn(sender=sender, receiver=receiver, amt=amt, sp=await client.suggested_params())
+    return await _send_and_confirm(client, txn.sign(sender_sk))
+
+
+async def createDummyAsset(client: AsyncAlgodClient, total: int, account: str, sk: str) -> int:
+    txn = transaction.AssetCreateTxn(
+        sender=account,
+        total=total,
+        decimals=0,
+        default_frozen=False,
+        manager=account,
+        reserve=account,
+        freeze=account,
+        clawback=account,
+        unit_name="ALGOT",
+        asset_name="AlgorandGOT",
+        url="https://github.com/algorand-school/handson-contract/blob/main/image/algorand_throne.jpg",
+        # this random note reduces the likelihood of this transaction looking like a duplicate
+        note=bytes(randint(0, 255) for _ in range(20)),
+        sp=await client.suggested_params(),
+    )
+    response = await _send_and_confirm(client, txn.sign(sk))
+    assert response['asset-index'] is not None and response['asset-index'] > 0
+    return response['asset-index']
+
+
+# The AuctionMain operations of one of the three contracts as coroutines. `contract` is the PyTeal-free interface
+# module of the contract (e.g. SealedAuctionContract.AuctionInterfaceSealed), which provides the ABI methods, state
+# views and schemas; PyTeal is only imported by createAuctionApp when no artifact bundle is built.
+# Whether a bid carries a payment and the previous lead bidder follows from the arguments of its on_bid method:
+# none (open auction) or the nonce (sealed auction) do, nonce and amount (overcollateralized auction) do not.
+class AuctionOperations:
+    def __init__(self, client: AsyncAlgodClient, contract, mirror: AuctionMirror = None):
+        self.client = client
+        self.contract = contract
+        self.methods = contract.auction_methods
+        self.AuctionState = contract.AuctionState
+        self.BidderState = contract.BidderState
+        # with a mirror, the global states are read from it instead of algod before every call
+        self.mirror = mirror
+
+    async def _global_state(self, app_id: int):
+        if self.mirror is None:
+            return await read_global_state(self.client, app_id, self.AuctionState)
+        return (await self.mirror.read_async(self.client, app_id)).state
+
+    # Runs write(global_state). A call the node refuses at evaluation may have been built against a mirrored state
+    # behind the chain: the app is then read again, and the call retried once if its state did change (as
+    # AuctionMirror.write does).
+    async def _write(self, app_id: int, write):
+        mirrored = self.mirror is not None and self.mirror.get(app_id) is not None
+        state = await self._global_state(app_id)
+        try:
+            return await write(state)
+        except error.AlgodHTTPError as err:
+            if not mirrored or not stale_state_refusal(err):
+                raise
+            self.mirror.invalidate(app_id)
+            fresh = await self._global_state(app_id)
+            if fresh == state:
+                raise
+        return await write(fresh)
+
+    async def _execute(self, app_id: int, atc: AtomicTransactionComposer, *calls) -> AtomicTransactionResponse:
+        response = await execute(self.client, atc)
+        if self.mirror is not None:
+            self.mirror.confirmed_response(app_id, response, calls)
+        return response
+
+    async def createAuctionApp(self, senderSK: str, *app_args) -> int:
+        approval_program, clear_program = self.contract.auction_programs()
+        atc = AtomicTransactionComposer()
+        sender = account.address_from_private_key(senderSK)
+        atc.add_method_call(
+            app_id=0,
+            method=self.methods.get("create_app"),
+            sender=sender,
+            sp=await self.client.suggested_params(),
+            signer=AccountTransactionSigner(senderSK),
+            approval_program=approval_program,
+            clear_program=clear_program,
+            local_schema=self.contract.auction_local_schema,
+            global_schema=self.contract.auction_global_schema,
+            method_args=list(app_args),
+        )
+        result = await execute(self.client, atc)
+        if self.mirror is not None:
+            return self.mirror.created(result.abi_results[0].tx_info, sender)
+        return result.abi_results[0].tx_info["application-index"]
+
+    async def setupAuctionApp(self, app_id: int, funder_sk: str, nft_holder_sk: str, nft_id: int):
+        app_addr = get_application_address(app_id)
+        suggestedParams = await self.client.suggested_params()
+        # min account balance + additional min balance to opt into NFT + 3 * min txn fee
+        fundingAmount = 100_000 + 100_000 + 3 * 1_000
+
+        atc = AtomicTransactionComposer()
+        funder_addr = account.address_from_private_key(funder_sk)
+        signer_funder = AccountTransactionSigner(funder_sk)
+        atc.add_transaction(TransactionWithSigner(
+            transaction.PaymentTxn(funder_addr, suggestedParams, app_addr, fundingAmount), signer_funder))
+        atc.add_method_call(app_id=app_id, method=self.methods.get('on_setup'), sender=funder_addr,
+                            sp=suggestedParams, signer=signer_funder, foreign_assets=[nft_id])
+        atc.add_transaction(TransactionWithSigner(
+            transaction.AssetTransferTxn(account.address_from_private_key(nft_holder_sk), suggestedParams,
+                                         app_addr, 1, nft_id),
+            AccountTransactionSigner(nft_holder_sk)))
+        return await self._execute(app_id, atc, Call("on_setup", funder_addr))
+
+    async def commitAuctionApp(self, app_id: int, bidder_sk: str, value: int, nonce: int, deposit: int):
+        bidder_addr = account.address_from_private_key(bidder_sk)
+        bidder_signer = AccountTransactionSigner(bidder_sk)
+        commitment = sha256(value.to_bytes(8, 'big') + nonce.to_bytes(8, 'big')).digest()
+
+        async def commit(global_state):
+            suggestedParams = await self.client.suggested_params()
+            atc = AtomicTransactionComposer()
+            atc.add_transaction(TransactionWithSigner(
+                transaction.PaymentTxn(bidder_addr, suggestedParams, get_application_address(app_id), deposit),
+                bidder_signer))
+            atc.add_method_call(
+                app_id=app_id,
+                method=self.methods.get("on_commit"),
+                sender=bidder_addr,
+                sp=suggestedParams,
+                signer=bidder_signer,
+                method_args=[commitment],
+                on_complete=transaction.OnComplete.OptInOC,
+                foreign_assets=[global_state.nft_id],
+            )
+            return await self._execute(app_id, atc, Call("on_commit", bidder_addr, [commitment], deposit))
+        return await self._write(app_id, commit)
+
+    async def placeBid(self, app_id: int, bidder_sk: str, bid_amount: int, nonce: int = None):
+        method = self.methods.get('on_bid')
+        bidder_addr = account.address_from_private_key(bidder_sk)
+        bidder_signer = AccountTransactionSigner(bidder_sk)
+
+        async def bid(global_state):
+            suggestedParams = await self.client.suggested_params()
+            atc = AtomicTransactionComposer()
+            accounts = None
+            payment = None
+            if len(method.args) == 2:
+                app_args = [nonce, bid_amount]
+            else:
+                app_args = [nonce] if method.args else []
+                payment = bid_amount
+                atc.add_transaction(TransactionWithSigner(
+                    transaction.PaymentTxn(bidder_addr, suggestedParams, get_application_address(app_id),
+                                           bid_amount),
+                    bidder_signer))
+            if any(global_state.lead_bid_account):
+                # if the lead bidder is not the zero address, it is repaid when the bid takes the lead
+                accounts = [encoding.encode_address(global_state.lead_bid_account)]
+            atc.add_method_call(app_id=app_id,
+                                method=method,
+                                sender=bidder_addr,
+                                sp=suggestedParams,
+                                signer=bidder_signer,
+                                method_args=app_args,
+                                foreign_assets=[global_state.nft_id],
+                                accounts=accounts,
+                                )
+            return await self._execute(app_id, atc, Call("on_bid", bidder_addr, app_args, payment))
+        return await self._write(app_id, bid)
+
+    async def _pay(self, app_id: int, sk: str, method_name: str):
+        sender = account.address_from_private_key(sk)
+
+        async def pay(global_state):
+            atc = AtomicTransactionComposer()
+            atc.add_method_call(app_id=app_id,
+                                method=self.methods.get(method_name),
+                                sender=sender,
+                                sp=await self.client.suggested_params(),
+                                signer=AccountTransactionSigner(sk),
+                                foreign_assets=[global_state.nft_id],
+                                )
+            return await self._execute(app_id, atc, Call(method_name, sender))
+        return await self._write(app_id, pay)
+
+    async def claimWinner(self, app_id: int, winner_sk: str):
+        return await self._pay(app_id, winner_sk, 'payWinner')
+
+    async def claimSeller(self, app_id: int, seller_sk: str):
+        return await self._pay(app_id, seller_sk, 'paySeller')
+
+    async def closeAuction(self, app_id: int, closer: str) -> dict:
+        if self.mirror is not None:
+            auction = await self.mirror.read_async(self.client, app_id, with_creator=True)
+            global_state, creator = auction.state, auction.creator
+        else:
+            app = await self.client.application_info(app_id)
+            global_state = self.AuctionState.decode(app["params"].get("global-state", []))
+            creator = app["params"]["creator"]
+
+        accounts = [encoding.encode_address(global_state.seller)]
+        if any(global_state.lead_bid_account):
+            # if the lead bidder is not the zero address
+            accounts.append(encoding.encode_address(global_state.lead_bid_account))
+        accounts.append(creator)
+
+        deleteTxn = transaction.ApplicationDeleteTxn(
+            sender=account.address_from_private_key(closer),
+            index=app_id,
+            accounts=accounts,
+            foreign_assets=[global_state.nft_id],
+            sp=await self.client.suggested_params(),
+        )
+        try:
+            info = await _send_and_confirm(self.client, deleteTxn.sign(closer))
+        except error.AlgodHTTPError:
+            if self.mirror is not None:
+                self.mirror.invalidate(app_id)
+            raise
+        if self.mirror is not None:
+            self.mirror.deleted(app_id)
+        return info
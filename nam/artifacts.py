@@ -0,0 +1,173 @@
+import base64
+import hashlib
+import importlib
+import importlib.metadata
+import json
+import os
+import sys
+import threading
+
+from algosdk.abi import Contract
+from algosdk.future import transaction
+
+from util import compile_program
+
+# Prebuilt contract artifact bundles, so that deployers need neither PyTeal nor a compile step.
+#
+# `python -m nam.artifacts [directory]` compiles every contract and writes one bundle per contract,
+# <directory>/<contract name>.json: approval and clear TEAL and bytecode, ABI, state schemas, and the hash of the
+# PyTeal source it was built from. Bundles are versioned by FORMAT_VERSION and by that source hash.
+# The interface modules' auction_programs() deploy from the bundle when it matches the interface (ABI, schemas)
+# and the contract source next to it, and only compile otherwise.
+
+FORMAT_VERSION = 1
+
+# Directory of the bundles, `artifacts` in the repository root unless NAM_ARTIFACTS points elsewhere
+ARTIFACTS_DIR = os.environ.get(
+    "NAM_ARTIFACTS", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "artifacts"))
+
+# Interface modules of the contracts built by default, by contract name (auction_contract["name"])
+CONTRACT_INTERFACES = {
+    "AuctionContract": "AuctionContract.AuctionInterface",
+    "SealedAuctionContract": "SealedAuctionContract.AuctionInterfaceSealed",
+    "SealedOvercollateralizedAuctionContract":
+        "SealedOvercollateralizedAuctionContract.AuctionInterfaceSealedOvercollateralized",
+}
+INTERFACES = list(CONTRACT_INTERFACES.values())
+
+
+class StaleBundleError(Exception):
+    pass
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _schema(schema: transaction.StateSchema) -> dict:
+    return {"num_uints": schema.num_uints, "num_byte_slices": schema.num_byte_slices}
+
+
+# Interface module of a contract from its name, e.g. as stored by nam.vault
+def interface_module(contract_name: str):
+    if contract_name not in CONTRACT_INTERFACES:
+        raise ValueError("unknown contract {}: expected one of {}".format(
+            contract_name, ", ".join(CONTRACT_INTERFACES)))
+    return importlib.import_module(CONTRACT_INTERFACES[contract_name])
+
+
+# Path of the PyTeal source of the contract described by an interface module
+def contract_source_path(interface) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(interface.__file__)), interface.auction_contract_module + ".py")
+
+
+def source_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return _sha256(f.read())
+
+
+class ContractBundle:
+    def __init__(self, manifest: dict):
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise StaleBundleError("unsupported bundle format {}".format(manifest.get("format_version")))
+        self.manifest = manifest
+        self.name = manifest["name"]
+        self.source_hash = manifest["source_hash"]
+        self.approval_teal = manifest["approval_teal"]
+        self.clear_teal = manifest["clear_teal"]
+        self.approval_program = base64.b64decode(manifest["approval_program"])
+        self.clear_program = base64.b64decode(manifest["clear_program"])
+        if (_sha256(self.approval_program) != manifest["approval_sha256"]
+                or _sha256(self.clear_program) != manifest["clear_sha256"]):
+            raise StaleBundleError("corrupted bytecode in the bundle of {}".format(self.name))
+        self.abi = manifest["abi"]
+        self.global_schema = transaction.StateSchema(**manifest["global_schema"])
+        self.local_schema = transaction.StateSchema(**manifest["local_schema"])
+
+    @property
+    def contract(self) -> Contract:
+        return Contract.undictify(self.abi)
+
+    # Raises StaleBundleError unless the bundle has the ABI and schemas of the interface and, when the PyTeal
+    # source is present, was built from it
+    def check(self, interface):
+        if self.contract.dictify() != interface.auction_methods.contract.dictify():
+            raise StaleBundleError("the ABI of the {} bundle does not match its interface".format(self.name))
+        if (_schema(self.global_schema) != _schema(interface.auction_global_schema)
+                or _schema(self.local_schema) != _schema(interface.auction_local_schema)):
+            raise StaleBundleError("the state schemas of the {} bundle do not match its interface".format(self.name))
+        path = contract_source_path(interface)
+        if os.path.exists(path) and source_hash(path) != self.source_hash:
+            raise StaleBundleError("the {} bundle was built from another version of {}".format(self.name, path))
+
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+# Reads a bundle file, once per process
+def load_bundle(path: str) -> ContractBundle:
+    path = os.path.abspath(path)
+    with _bundles_lock:
+        bundle = _bundles.get(path)
+        if bundle is None:
+            with open(path, "rb") as f:
+                bundle = _bundles[path] = ContractBundle(json.loads(f.read()))
+        return bundle
+
+
+def bundle_path(name: str, directory: str = None) -> str:
+    return os.path.join(directory or ARTIFACTS_DIR, name + ".json")
+
+
+# Returns the bundle of the contract described by an interface module if one was built and is up to date, else None
+def find_bundle(interface, directory: str = None):
+    path = bundle_path(interface.auction_contract["name"], directory)
+    if not os.path.exists(path):
+        return None
+    try:
+        bundle = load_bundle(path)
+        bundle.check(interface)
+    except StaleBundleError:
+        return None
+    return bundle
+
+
+# Compiles the contract of an interface module (imports PyTeal) and writes its bundle. Returns the bundle path.
+def build_bundle(interface, directory: str = None) -> str:
+    approval_teal, clear_teal, contract = interface.compile_auction()
+    approval_program = compile_program(None, approval_teal)
+    clear_program = compile_program(None, clear_teal)
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "name": contract.name,
+        "source_hash": source_hash(contract_source_path(interface)),
+        "pyteal_version": importlib.metadata.version("pyteal"),
+        "approval_teal": approval_teal,
+        "clear_teal": clear_teal,
+        "approval_program": base64.b64encode(approval_program).decode("ascii"),
+        "clear_program": base64.b64encode(clear_program).decode("ascii"),
+        "approval_sha256": _sha256(approval_program),
+        "clear_sha256": _sha256(clear_program),
+        "abi": contract.dictify(),
+        "global_schema": _schema(interface.auction_global_schema),
+        "local_schema": _schema(interface.auction_local_schema),
+    }
+    path = bundle_path(contract.name, directory)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+    return path
+
+
+def main(argv):
+    directory = argv[0] if argv else None
+    for name in INTERFACES:
+        print(build_bundle(importlib.import_module(name), directory))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
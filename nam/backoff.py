@@ -0,0 +1,179 @@
+import http.client
+import random
+import threading
+import urllib.error
+from time import monotonic, sleep
+
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+# Request layer for throttled or overloaded nodes (public nodes answer 429 Too Many Requests past their rate limit).
+#
+# ThrottledAlgodClient wraps any AlgodClient and tells apart:
+#  - throttling (429): every request sharing the token bucket pauses for a jittered backoff, then it is retried;
+#  - transient errors (503, and for reads 500/502/504, timeouts and dropped connections): the request is retried
+#    alone after a jittered backoff. Transaction submissions are only retried when the node did not take them
+#    (429, 503, connection refused), so a signed transaction is never sent twice by this layer;
+#  - anything else, e.g. a 400 rejecting a transaction the contract fails: raised right away.
+# The token bucket paces all requests of the clients sharing it to `rate` per second (bursts of `burst`).
+# client.stats counts retries and the time lost to them.
+
+THROTTLED = "throttled"
+TRANSIENT = "transient"
+
+# statuses meaning the node did not process the request
+_NOT_PROCESSED_STATUSES = {503}
+# statuses worth retrying for requests that are safe to repeat
+_TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+
+def _refused(err: Exception) -> bool:
+    if isinstance(err, urllib.error.URLError):
+        err = err.reason
+    return isinstance(err, ConnectionRefusedError)
+
+
+# Returns THROTTLED, TRANSIENT, or None for errors that retrying would not fix
+def classify_error(method: str, err: Exception):
+    if isinstance(err, AlgodHTTPError):
+        if err.code == 429:
+            return THROTTLED
+        statuses = _TRANSIENT_STATUSES if method == "GET" else _NOT_PROCESSED_STATUSES
+        return TRANSIENT if err.code in statuses else None
+    if _refused(err):
+        return TRANSIENT
+    if method == "GET" and isinstance(err, (urllib.error.URLError, http.client.HTTPException, ConnectionError,
+                                            TimeoutError)):
+        return TRANSIENT
+    return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float = None, burst: int = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate or 1))
+        self._tokens = float(self.burst)
+        self._updated = monotonic()
+        # requests wait until then after a throttled response
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    # Takes a token, waiting for it and for any pause in progress. Returns (seconds paused, seconds rate limited).
+    def acquire(self):
+        with self._lock:
+            now = monotonic()
+            paused = max(0.0, self._paused_until - now)
+            limited = 0.0
+            if self.rate:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                self._tokens -= 1
+                if self._tokens < 0:
+                    limited = max(0.0, -self._tokens / self.rate - paused)
+        if paused + limited:
+            sleep(paused + limited)
+        return paused, limited
+
+    # Pauses every request sharing the bucket for `seconds`
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+
+class BackoffStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # requests made through the layer, and attempts sent to the node
+            self.requests = 0
+            self.attempts = 0
+            self.throttled = 0
+            self.transient = 0
+            self.retries = 0
+            # requests failed after max_retries, and failed with an error not worth retrying
+            self.gave_up = 0
+            self.rejected = 0
+            self.request_seconds = 0.0
+            # time spent in attempts that were retried and waiting for backoffs
+            self.failed_attempt_seconds = 0.0
+            self.backoff_seconds = 0.0
+            # time waiting for a token of the bucket
+            self.rate_limited_seconds = 0.0
+
+    def add(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    # Counters, with the share of the time spent in requests that was lost to throttling and transient errors
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = {name: value for name, value in vars(self).items() if not name.startswith("_")}
+        lost = out["failed_attempt_seconds"] + out["backoff_seconds"]
+        out["lost_seconds"] = lost
+        out["lost_fraction"] = lost / out["request_seconds"] if out["request_seconds"] else 0.0
+        return out
+
+
+class ThrottledAlgodClient(algod.AlgodClient):
+    def __init__(self, client: algod.AlgodClient, rate: float = None, burst: int = None, max_retries: int = 6,
+                 base_delay: float = 0.1, max_delay: float = 10.0, bucket: TokenBucket = None):
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.client = client
+        self.bucket = bucket if bucket is not None else TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = BackoffStats()
+
+    # Full jitter: uniform between 0 and the exponential backoff of the attempt
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        start = monotonic()
+        attempt = 0
+        try:
+            while True:
+                paused, limited = self.bucket.acquire()
+                self.stats.add(attempts=1, backoff_seconds=paused, rate_limited_seconds=limited)
+                attempt_start = monotonic()
+                try:
+                    return self.client.algod_request(method, requrl, params, data, headers, response_format)
+                except Exception as err:
+                    kind = classify_error(method, err)
+                    if kind is None:
+                        self.stats.add(rejected=1)
+                        raise
+                    self.stats.add(**{kind: 1})
+                    if attempt >= self.max_retries:
+                        self.stats.add(gave_up=1)
+                        raise
+                    delay = self._delay(attempt)
+                    attempt += 1
+                    self.stats.add(retries=1, failed_attempt_seconds=monotonic() - attempt_start)
+                    if kind == THROTTLED:
+                        # waited (and counted) by the next acquire
+                        self.bucket.pause(delay)
+                    else:
+                        self.stats.add(backoff_seconds=delay)
+                        sleep(delay)
+        finally:
+            self.stats.add(requests=1, request_seconds=monotonic() - start)
+
+    # everything else (close, metrics...) is the wrapped client's
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
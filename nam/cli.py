@@ -0,0 +1,91 @@
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Thin command line client of the NAM daemon (nam.daemon). It only imports the standard library, so a command
+# costs an interpreter start and one round-trip on the daemon's socket.
+#
+#   python -m nam.cli new_account fund=10000000
+#   python -m nam.cli create contract=sealed seller=<address> nftID=12 startRound=100 ...
+#   python -m nam.cli bid app_id=34 bidder=<address> amount=1000000 nonce=7
+#   python -m nam.cli reveal app_id=34 'reveals=[["<address>", 1000000, 7], ["<address>", 1200000, 9]]'
+#
+# Parameters are key=value pairs; values are parsed as JSON when they can be (numbers...), else kept as strings.
+
+# same default as nam.daemon.SOCKET_PATH
+SOCKET_PATH = os.environ.get("NAM_SOCKET", os.path.join(tempfile.gettempdir(), "nam-{}.sock".format(os.getuid())))
+
+
+class DaemonError(Exception):
+    def __init__(self, message: str, error_type: str):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+# Connection to the daemon, kept open for any number of requests
+class DaemonClient:
+    def __init__(self, socket_path: str = SOCKET_PATH):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rwb")
+
+    # Sends a command and returns its result, raising DaemonError when it failed
+    def request(self, command: str, **params):
+        self._file.write(json.dumps(dict(params, command=command)).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("the daemon closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise DaemonError(response["error"], response["type"])
+        return response["result"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def parse_params(args) -> dict:
+    params = {}
+    for arg in args:
+        key, sep, value = arg.partition("=")
+        if not sep:
+            raise ValueError("expected key=value, got {}".format(arg))
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return params
+
+
+def main(argv) -> int:
+    socket_path = SOCKET_PATH
+    if argv[:1] == ["--socket"]:
+        socket_path, argv = argv[1], argv[2:]
+    if not argv:
+        print("usage: python -m nam.cli [--socket path] command [key=value ...]", file=sys.stderr)
+        return 2
+    try:
+        with DaemonClient(socket_path) as client:
+            result = client.request(argv[0], **parse_params(argv[1:]))
+    except DaemonError as err:
+        print("{}: {}".format(err.error_type, err), file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as err:
+        print(err, file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
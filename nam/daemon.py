@@ -0,0 +1,296 @@
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+import os
+import tempfile
+
+from algosdk import account, encoding, mnemonic
+
+from nam.aio import AsyncAlgodClient, AuctionOperations, createDummyAsset, fundAccount, optInToAsset
+from nam.metrics import AlgodMetrics, operation
+from nam.mirror import AuctionMirror
+from nam.reveal import reveal_bids
+from nam.vault import CommitmentVault, commit_bid, reveal_due
+
+# Resident auction manager: one process keeping the algod connections, suggested params, contract artifacts and
+# private keys warm, serving auction commands over a local Unix socket (see nam.cli for the command line client).
+#
+# Protocol: one JSON object per line, {"command": name, ...parameters}, answered by one JSON line,
+# {"ok": true, "result": ...} or {"ok": false, "error": message, "type": exception class}. Accounts are given by
+# address and must have been registered (new_account, add_account, or "creator" for the account of the mnemonic
+# the daemon was started with). create_app arguments are passed by their ABI names, e.g. seller, nftID, startRound.
+# The socket is only accessible to the user running the daemon.
+
+# Socket path unless NAM_SOCKET points elsewhere
+SOCKET_PATH = os.environ.get("NAM_SOCKET", os.path.join(tempfile.gettempdir(), "nam-{}.sock".format(os.getuid())))
+
+# contract name -> interface module
+CONTRACTS = {
+    "open": "AuctionContract.AuctionInterface",
+    "sealed": "SealedAuctionContract.AuctionInterfaceSealed",
+    "overcollateralized": "SealedOvercollateralizedAuctionContract.AuctionInterfaceSealedOvercollateralized",
+}
+
+
+class CommandError(Exception):
+    pass
+
+
+def _jsonable(value):
+    if isinstance(value, bytes):
+        # addresses are shown in their usual form
+        return encoding.encode_address(value) if len(value) == 32 else base64.b64encode(value).decode("ascii")
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def _transaction_result(response) -> dict:
+    return {"confirmed_round": response.confirmed_round, "tx_ids": response.tx_ids}
+
+
+class AuctionDaemon:
+    def __init__(self, client: AsyncAlgodClient, creator_sk: str = None, vault: CommitmentVault = None):
+        self.client = client
+        # commitments of the sealed bids made through the daemon, when it has a vault
+        self.vault = vault
+        self.keys = {}
+        self.creator = self.add_key(creator_sk) if creator_sk else None
+        self.operations = {}
+        for name, module in CONTRACTS.items():
+            interface = importlib.import_module(module)
+            # loads the artifact bundle (or compiles the contract) once, now
+            interface.auction_programs()
+            # the calls made through the daemon update the mirrored states, which it does not read back
+            self.operations[name] = AuctionOperations(client, interface, AuctionMirror(interface))
+        # app ID -> contract name, for the apps created through the daemon
+        self.apps = {}
+        self.commands = {name[len("cmd_"):]: getattr(self, name) for name in dir(self) if name.startswith("cmd_")}
+
+    def add_key(self, sk: str) -> str:
+        address = account.address_from_private_key(sk)
+        self.keys[address] = sk
+        return address
+
+    def _sk(self, address: str) -> str:
+        if address == "creator" and self.creator:
+            address = self.creator
+        try:
+            return self.keys[address]
+        except KeyError:
+            raise CommandError("no key registered for account {}".format(address)) from None
+
+    def _ops(self, params: dict) -> AuctionOperations:
+        name = params.get("contract") or self.apps.get(params.get("app_id"))
+        if name is None:
+            raise CommandError("unknown app {}: pass contract ({})".format(params.get("app_id"), ", ".join(CONTRACTS)))
+        try:
+            return self.operations[name]
+        except KeyError:
+            raise CommandError("unknown contract {}: expected one of {}".format(name, ", ".join(CONTRACTS))) from None
+
+    async def handle(self, request: dict):
+        command = self.commands.get(request.get("command"))
+        if command is None:
+            raise CommandError("unknown command {}: expected one of {}".format(
+                request.get("command"), ", ".join(sorted(self.commands))))
+        params = {k: v for k, v in request.items() if k != "command"}
+        with operation(request["command"]):
+            try:
+                return await command(params)
+            except KeyError as err:
+                raise CommandError("missing parameter {}".format(err)) from None
+
+    # Commands: each takes the request parameters and returns a JSON-serializable result
+
+    async def cmd_ping(self, params):
+        last_round = self.client.last_round
+        if last_round is None:
+            # nothing is watching the rounds yet
+            last_round = (await self.client.status()).get("last-round")
+        return {"round": last_round, "accounts": len(self.keys), "apps": len(self.apps)}
+
+    async def cmd_accounts(self, params):
+        return {"creator": self.creator, "accounts": sorted(self.keys)}
+
+    async def cmd_new_account(self, params):
+        address = self.add_key(account.generate_account()[0])
+        if params.get("fund"):
+            await fundAccount(self.client, self.creator, address, self._sk("creator"), int(params["fund"]))
+        return {"address": address}
+
+    async def cmd_add_account(self, params):
+        return {"address": self.add_key(mnemonic.to_private_key(params["mnemonic"]))}
+
+    async def cmd_fund(self, params):
+        sender = params.get("sender", "creator")
+        info = await fundAccount(self.client, self.creator if sender == "creator" else sender, params["receiver"],
+                                 self._sk(sender), int(params["amount"]))
+        return {"confirmed_round": info["confirmed-round"]}
+
+    async def cmd_create_nft(self, params):
+        owner = params["account"]
+        sk = self._sk(owner)
+        return {"nft_id": await createDummyAsset(self.client, int(params.get("total", 1)),
+                                                 account.address_from_private_key(sk), sk)}
+
+    async def cmd_opt_in_nft(self, params):
+        info = await optInToAsset(self.client, int(params["nft_id"]), self._sk(params["account"]))
+        return {"confirmed_round": info["confirmed-round"]}
+
+    async def cmd_create(self, params):
+        ops = self._ops(params)
+        create_app = ops.methods.get("create_app")
+        missing = [arg.name for arg in create_app.args if arg.name not in params]
+        if missing:
+            raise CommandError("missing create_app arguments: {}".format(", ".join(missing)))
+        app_id = await ops.createAuctionApp(self._sk(params.get("sender", "creator")),
+                                            *(params[arg.name] for arg in create_app.args))
+        self.apps[app_id] = params["contract"]
+        return {"app_id": app_id}
+
+    async def cmd_setup(self, params):
+        ops = self._ops(params)
+        return _transaction_result(await ops.setupAuctionApp(
+            params["app_id"], self._sk(params.get("funder", "creator")), self._sk(params["nft_holder"]),
+            params["nft_id"]))
+
+    # without a nonce, the daemon's vault draws one and keeps it for reveal_due
+    async def cmd_commit(self, params):
+        ops = self._ops(params)
+        if self.vault is not None:
+            stored = await commit_bid(self.vault, ops, params["app_id"], self._sk(params["bidder"]), params["value"],
+                                      params["deposit"], params.get("nonce"))
+            return {"nonce": stored.nonce, "reveal_round": stored.reveal_round}
+        return _transaction_result(await ops.commitAuctionApp(
+            params["app_id"], self._sk(params["bidder"]), params["value"], params["nonce"], params["deposit"]))
+
+    async def cmd_bid(self, params):
+        ops = self._ops(params)
+        return _transaction_result(await ops.placeBid(
+            params["app_id"], self._sk(params["bidder"]), params["amount"], params.get("nonce")))
+
+    # reveals: [[bidder, amount, nonce], ...], sent at once by nam.reveal
+    async def cmd_reveal(self, params):
+        ops = self._ops(params)
+        reveals = [(self._sk(bidder), amount, nonce) for bidder, amount, nonce in params["reveals"]]
+        results = await reveal_bids(self.client, ops.contract, params["app_id"], reveals)
+        ops.mirror.invalidate(params["app_id"])
+        return [reveal.as_dict() for reveal in results]
+
+    # reveals the vault's commitments due at the last round
+    async def cmd_reveal_due(self, params):
+        if self.vault is None:
+            raise CommandError("the daemon has no vault: start it with --vault")
+        results = await reveal_due(self.client, self.vault, self.keys)
+        for ops in self.operations.values():
+            for app_id in results:
+                ops.mirror.invalidate(app_id)
+        return {app_id: [reveal.as_dict() for reveal in reveals] for app_id, reveals in results.items()}
+
+    async def cmd_claim_winner(self, params):
+        ops = self._ops(params)
+        return _transaction_result(await ops.claimWinner(params["app_id"], self._sk(params["winner"])))
+
+    async def cmd_claim_seller(self, params):
+        ops = self._ops(params)
+        return _transaction_result(await ops.claimSeller(params["app_id"], self._sk(params["seller"])))
+
+    async def cmd_close(self, params):
+        ops = self._ops(params)
+        info = await ops.closeAuction(params["app_id"], self._sk(params.get("closer", "creator")))
+        self.apps.pop(params["app_id"], None)
+        return {"confirmed_round": info["confirmed-round"]}
+
+    # the mirrored state of the app, or the chain's with fresh=true
+    async def cmd_state(self, params):
+        ops = self._ops(params)
+        if params.get("fresh"):
+            ops.mirror.invalidate(params["app_id"])
+        return _jsonable((await ops.mirror.read_async(self.client, params["app_id"])).state.as_dict())
+
+    async def cmd_mirror(self, params):
+        return {name: ops.mirror.stats.snapshot() for name, ops in self.operations.items()}
+
+    async def cmd_metrics(self, params):
+        metrics = self.client.metrics
+        return metrics.snapshot() if metrics is not None else {}
+
+    # One connection can send any number of requests, answered in order
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = {"ok": True, "result": await self.handle(json.loads(line))}
+                except Exception as err:
+                    response = {"ok": False, "error": str(err) or repr(err), "type": type(err).__name__}
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+# Removes a socket left over by a daemon that did not shut down cleanly, and refuses to take the socket of one
+# still answering on it
+async def _claim_socket(socket_path: str):
+    try:
+        _, writer = await asyncio.open_unix_connection(socket_path)
+    except FileNotFoundError:
+        return
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    writer.close()
+    raise RuntimeError("a daemon is already listening on {}".format(socket_path))
+
+
+async def serve(daemon: AuctionDaemon, socket_path: str = SOCKET_PATH):
+    await _claim_socket(socket_path)
+    old_umask = os.umask(0o077)
+    try:
+        server = await asyncio.start_unix_server(daemon.serve_connection, socket_path)
+    finally:
+        os.umask(old_umask)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+async def run(algod_token: str, algod_address: str, mnemonic_path: str = None, socket_path: str = SOCKET_PATH,
+              vault_path: str = None):
+    creator_sk = None
+    if mnemonic_path:
+        with open(mnemonic_path) as f:
+            creator_sk = mnemonic.to_private_key(f.read().strip())
+    async with AsyncAlgodClient(algod_token, algod_address, metrics=AlgodMetrics()) as client:
+        daemon = AuctionDaemon(client, creator_sk, CommitmentVault(vault_path) if vault_path else None)
+        print("NAM daemon listening on", socket_path, flush=True)
+        await serve(daemon, socket_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident NFT auction manager serving commands on a Unix socket")
+    parser.add_argument("--algod-address", default="http://localhost:4001")
+    parser.add_argument("--algod-token", default="a" * 64)
+    parser.add_argument("--mnemonic", help="file holding the mnemonic of the creator account")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--vault", help="SQLite file keeping the nonces of the sealed bids committed")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run(args.algod_token, args.algod_address, args.mnemonic, args.socket, args.vault))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
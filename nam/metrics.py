@@ -0,0 +1,241 @@
+import bisect
+import contextlib
+import contextvars
+import json
+import re
+import threading
+from time import perf_counter
+
+from algosdk import error
+from algosdk.v2client import algod
+
+# Per-endpoint instrumentation of algod calls: call counts, latency and response size histograms and error
+# classes, recorded in an AlgodMetrics registry.
+#
+# InstrumentedAlgodClient wraps any AlgodClient (the SDK's, a PooledAlgodClient...) and records every request it
+# forwards; AsyncAlgodClient records into the registry given as `metrics=`. Endpoints are named after their
+# method and path template, e.g. "GET /applications/{id}". Response sizes are the body lengths read by the
+# transport: AsyncAlgodClient and PooledAlgodClient (also behind a MultiNodeAlgodClient or ThrottledAlgodClient)
+# report them, the SDK's urllib transport does not, and its responses are left out of the size histogram.
+#
+# Calls are attributed to the innermost enclosing operation(name) block, or decorated function, of the calling
+# thread or task ("-" outside of any). map_concurrently carries the operation over to its worker threads.
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+# upper bounds of the response size histogram buckets, in bytes
+SIZE_BUCKETS = (128, 512, 2048, 8192, 32768, 131072, 524288, 2097152)
+
+UNATTRIBUTED = "-"
+
+_operation = contextvars.ContextVar("algod_operation", default=UNATTRIBUTED)
+# length of the last response body read by the transport, in the context of the request
+_response_size = contextvars.ContextVar("algod_response_size", default=None)
+
+# path segments replaced by a placeholder in endpoint names: transaction IDs, addresses, and rounds/IDs
+_PATH_PARAMS = re.compile(r"/(?:([A-Z2-7]{52})|([A-Z2-7]{58})|(\d+))(?=/|$)")
+
+
+# Attributes the algod calls made inside the block (or the decorated function) to the named operation
+@contextlib.contextmanager
+def operation(name: str):
+    token = _operation.set(name)
+    try:
+        yield
+    finally:
+        _operation.reset(token)
+
+
+def current_operation() -> str:
+    return _operation.get()
+
+
+def endpoint_name(method: str, requrl: str) -> str:
+    def placeholder(match):
+        if match.group(1):
+            return "/{txid}"
+        if match.group(2):
+            return "/{address}"
+        return "/{id}"
+    return "{} {}".format(method.upper(), _PATH_PARAMS.sub(placeholder, requrl.split("?")[0]))
+
+
+def error_class(err: Exception) -> str:
+    if isinstance(err, error.AlgodHTTPError):
+        return "{}({})".format(type(err).__name__, err.code)
+    return type(err).__name__
+
+
+def _bucket_labels(bounds):
+    return [str(bound) for bound in bounds] + ["+Inf"]
+
+
+# Upper bound of the bucket holding the q-quantile, capped by the maximum
+def _quantile(histogram, bounds, q, maximum):
+    rank = q * sum(histogram)
+    seen = 0
+    for i, n in enumerate(histogram):
+        seen += n
+        if n and seen >= rank:
+            return min(bounds[i], maximum) if i < len(bounds) else maximum
+    return 0
+
+
+class EndpointStats:
+    __slots__ = ("calls", "errors", "total_seconds", "max_seconds", "latency_histogram",
+                 "request_bytes", "response_bytes", "max_response_bytes", "size_histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = {}
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.latency_histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.max_response_bytes = 0
+        self.size_histogram = [0] * (len(SIZE_BUCKETS) + 1)
+
+    def record(self, seconds: float, request_size: int, response_size: int, err: Exception = None):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.latency_histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.request_bytes += request_size
+        if err is not None:
+            name = error_class(err)
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return
+        if response_size is None:
+            # not reported by the transport
+            return
+        self.response_bytes += response_size
+        self.max_response_bytes = max(self.max_response_bytes, response_size)
+        self.size_histogram[bisect.bisect_left(SIZE_BUCKETS, response_size)] += 1
+
+    def merge(self, other: "EndpointStats"):
+        self.calls += other.calls
+        for name, n in other.errors.items():
+            self.errors[name] = self.errors.get(name, 0) + n
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.latency_histogram = [a + b for a, b in zip(self.latency_histogram, other.latency_histogram)]
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        self.max_response_bytes = max(self.max_response_bytes, other.max_response_bytes)
+        self.size_histogram = [a + b for a, b in zip(self.size_histogram, other.size_histogram)]
+
+    def copy(self) -> "EndpointStats":
+        copy = EndpointStats()
+        copy.merge(self)
+        return copy
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "p50_seconds": _quantile(self.latency_histogram, LATENCY_BUCKETS, 0.5, self.max_seconds),
+            "p99_seconds": _quantile(self.latency_histogram, LATENCY_BUCKETS, 0.99, self.max_seconds),
+            "max_seconds": self.max_seconds,
+            "latency_histogram": dict(zip(_bucket_labels(LATENCY_BUCKETS), self.latency_histogram)),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "max_response_bytes": self.max_response_bytes,
+            "size_histogram": dict(zip(_bucket_labels(SIZE_BUCKETS), self.size_histogram)),
+        }
+
+
+class AlgodMetrics:
+    def __init__(self):
+        # (operation, endpoint) -> EndpointStats
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, request_size: int = 0, response_size: int = 0,
+               err: Exception = None):
+        key = (_operation.get(), endpoint)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = EndpointStats()
+            stats.record(seconds, request_size, response_size, err)
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    # Returns {operation: {endpoint: stats}}, or {endpoint: stats} summed over all operations with by_operation=False
+    def snapshot(self, by_operation: bool = True) -> dict:
+        with self._lock:
+            items = [(key, stats.copy()) for key, stats in self._stats.items()]
+        if by_operation:
+            out = {}
+            for (op, endpoint), stats in sorted(items, key=lambda item: item[0]):
+                out.setdefault(op, {})[endpoint] = stats.to_dict()
+            return out
+        totals = {}
+        for (_, endpoint), stats in items:
+            totals.setdefault(endpoint, EndpointStats()).merge(stats)
+        return {endpoint: totals[endpoint].to_dict() for endpoint in sorted(totals)}
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"endpoints": self.snapshot(by_operation=False), "operations": self.snapshot()}, f, indent=2)
+
+    # One line per (operation, endpoint): calls, errors, mean / p50 / p99 / max latency and response bytes
+    def report(self) -> str:
+        lines = ["{:<20} {:<44} {:>7} {:>6} {:>9} {:>9} {:>9} {:>9} {:>11}".format(
+            "operation", "endpoint", "calls", "errors", "mean ms", "p50 ms", "p99 ms", "max ms", "resp bytes")]
+        for op, endpoints in self.snapshot().items():
+            for endpoint, stats in endpoints.items():
+                lines.append("{:<20} {:<44} {:>7} {:>6} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>11}".format(
+                    op, endpoint, stats["calls"], sum(stats["errors"].values()), stats["mean_seconds"] * 1000,
+                    stats["p50_seconds"] * 1000, stats["p99_seconds"] * 1000, stats["max_seconds"] * 1000,
+                    stats["response_bytes"]))
+        return "\n".join(lines)
+
+
+# Called by transports with the length of each response body they read, for the InstrumentedAlgodClient
+# wrapping them to record
+def response_received(size: int):
+    _response_size.set(size)
+
+
+# AlgodClient forwarding every request to `client` and recording it in `metrics`
+class InstrumentedAlgodClient(algod.AlgodClient):
+    def __init__(self, client: algod.AlgodClient, metrics: AlgodMetrics = None):
+        super().__init__(client.algod_token, client.algod_address, client.headers)
+        self.client = client
+        self.metrics = metrics if metrics is not None else AlgodMetrics()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        endpoint = endpoint_name(method, requrl)
+        request_size = len(data) if data else 0
+        token = _response_size.set(None)
+        start = perf_counter()
+        try:
+            response = self.client.algod_request(method, requrl, params, data, headers, response_format)
+        except Exception as err:
+            self.metrics.record(endpoint, perf_counter() - start, request_size, err=err)
+            raise
+        else:
+            self.metrics.record(endpoint, perf_counter() - start, request_size, _response_size.get())
+        finally:
+            _response_size.reset(token)
+        return response
+
+    # everything else (close, connections_opened...) is the wrapped client's
+    def __getattr__(self, name):
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,338 @@
+import base64
+import copy
+
+from algosdk import encoding, error
+
+from nam.backoff import classify_error
+
+# Client-side mirror of the state of the auctions an account writes to, so operations do not read back from algod
+# what their own confirmed calls just wrote.
+#
+# AuctionMirror(contract) keeps, per app of one contract (its interface module), the decoded global state, the
+# creator and the local states of the bidders it has seen. An app is read from algod once (read / read_async);
+# after that the state changes through:
+#  - the eval-delta of each confirmed call (global-state-delta and local-state-delta of its pending transaction
+#    info, which the ATC responses already carry), applied as the node computed it;
+#  - the contract's transition rules (_RULES, mirroring the PyTeal of each method), applied to the same call from
+#    the state it was built against.
+# Both must agree: a delta that differs from the rule's outcome means someone else changed the app since it was
+# mirrored, so the app is dropped and read again on next use (a reconcile only on mismatch). A confirmed call
+# without a delta (nodes returning none) is applied by its rule alone, and one without a rule, or whose rule needs
+# a local state the mirror does not hold, drops the app too. invalidate() drops an app by hand, e.g. after the
+# node refused a call built against the mirrored state, which write() does before retrying the call once when the
+# app's state did change.
+# mirror.stats counts hits, loads from algod, deltas, rule-only updates and mismatches.
+
+# eval-delta actions
+_SET_BYTES = 1
+_SET_UINT = 2
+_DELETE = 3
+
+
+# algod's reasons for refusing a transaction when evaluating it, before taking it into the pool
+_EVALUATION_ERRORS = ("logic eval error", "rejected by logic", "unavailable Account", "invalid Account reference")
+
+
+# Whether the node refused a call when evaluating it (400: the program failed, or referenced an account the call
+# does not), which a state newer than the one the call was built against can explain. Throttling, 5xx and
+# timeouts are not: the call may have been taken, and sending it again could apply it twice.
+def stale_state_refusal(err: Exception) -> bool:
+    return (isinstance(err, error.AlgodHTTPError) and err.code == 400 and classify_error("POST", err) is None
+            and any(reason in str(err) for reason in _EVALUATION_ERRORS))
+
+
+class MirrorStats:
+    def __init__(self):
+        self.hits = 0
+        self.loads = 0
+        self.local_hits = 0
+        self.local_loads = 0
+        self.deltas = 0
+        self.rule_updates = 0
+        self.mismatches = 0
+        self.invalidations = 0
+
+    def snapshot(self) -> dict:
+        out = dict(vars(self))
+        reads = self.hits + self.loads
+        out["hit_rate"] = self.hits / reads if reads else 0.0
+        return out
+
+
+class MirroredAuction:
+    __slots__ = ("app_id", "state", "creator", "local_states", "round")
+
+    def __init__(self, app_id: int, state, creator: str = None, round: int = None):
+        self.app_id = app_id
+        self.state = state
+        self.creator = creator
+        # bidder address -> decoded local state, None when the bidder has not opted in
+        self.local_states = {}
+        # round of the last confirmed call applied, or of the read
+        self.round = round
+
+
+# Applies an eval-delta to a decoded state view, in place
+def _apply_delta(view, delta: list):
+    fields = view._fields
+    for item in delta:
+        name = fields.get(item["key"])
+        if name is None:
+            continue
+        value = item["value"]
+        if value["action"] == _SET_BYTES:
+            setattr(view, name, base64.b64decode(value.get("bytes", "")))
+        elif value["action"] == _SET_UINT:
+            setattr(view, name, value.get("uint", 0))
+        else:
+            setattr(view, name, None)
+
+
+# A confirmed method call: method name, sender address, ABI arguments and the amount of the payment before it
+class Call:
+    __slots__ = ("method", "sender", "args", "payment")
+
+    def __init__(self, method: str, sender: str, args=(), payment: int = None):
+        self.method = method
+        self.sender = sender
+        self.args = tuple(args)
+        self.payment = payment
+
+
+# Transition rules of the confirmed calls: rule(contract, state, local, call) updates the copies of the global and
+# local state of the app (local is None when unknown) and returns False when it cannot tell the outcome.
+
+def _take_lead(state, amount: int, sender: str, count: bool = True):
+    state.lead_bid_amount = amount
+    state.lead_bid_account = encoding.decode_address(sender)
+    if count:
+        state.num_bids = (state.num_bids or 0) + 1
+
+
+def _open_bid(contract, state, local, call) -> bool:
+    # confirmed, so the bid took the lead
+    _take_lead(state, call.payment, call.sender)
+    return True
+
+
+def _sealed_bid(contract, state, local, call) -> bool:
+    state.second_highest_bid_amount = state.lead_bid_amount
+    _take_lead(state, call.payment, call.sender)
+    if local is not None:
+        local.commitment = None
+        local.value = call.payment
+    return True
+
+
+def _overcollateralized_bid(contract, state, local, call) -> bool:
+    if local is None or local.deposit is None:
+        return False
+    amount = call.args[1]
+    if amount <= local.deposit:
+        if amount > state.lead_bid_amount:
+            state.second_highest_bid_amount = state.lead_bid_amount
+            _take_lead(state, amount, call.sender, count=False)
+        elif amount > state.second_highest_bid_amount:
+            state.second_highest_bid_amount = amount
+    local.deposit = None
+    return True
+
+
+def _commit(contract, state, local, call) -> bool:
+    if local is None:
+        return False
+    local.commitment = call.args[0]
+    if "deposit" in local.__slots__:
+        local.deposit = call.payment
+    return True
+
+
+def _pay_seller(contract, state, local, call) -> bool:
+    state.seller_has_been_paid = contract.HAS_BEEN_PAID
+    return True
+
+
+def _pay_winner(contract, state, local, call) -> bool:
+    state.winner_has_been_paid = contract.HAS_BEEN_PAID
+    return True
+
+
+def _no_change(contract, state, local, call) -> bool:
+    return True
+
+
+# contract name -> method -> rule
+_RULES = {
+    "AuctionContract": {"on_setup": _no_change, "on_bid": _open_bid, "paySeller": _pay_seller,
+                        "payWinner": _pay_winner},
+    "SealedAuctionContract": {"on_setup": _no_change, "on_commit": _commit, "on_bid": _sealed_bid,
+                              "paySeller": _pay_seller, "payWinner": _pay_winner},
+    "SealedOvercollateralizedAuctionContract": {"on_setup": _no_change, "on_commit": _commit,
+                                                "on_bid": _overcollateralized_bid, "paySeller": _pay_seller,
+                                                "payWinner": _pay_winner},
+}
+
+
+class AuctionMirror:
+    def __init__(self, contract):
+        # interface module of the contract
+        self.contract = contract
+        self.rules = _RULES.get(contract.auction_contract["name"], {})
+        self.auctions = {}
+        self.stats = MirrorStats()
+
+    def __len__(self) -> int:
+        return len(self.auctions)
+
+    def get(self, app_id: int):
+        return self.auctions.get(app_id)
+
+    def invalidate(self, app_id: int):
+        if self.auctions.pop(app_id, None) is not None:
+            self.stats.invalidations += 1
+
+    # Mirrors an app from its application_info response
+    def load(self, app_id: int, app: dict) -> MirroredAuction:
+        params = app.get("params", {})
+        auction = MirroredAuction(app_id, self.contract.AuctionState.decode(params.get("global-state", [])),
+                                  params.get("creator"))
+        self.auctions[app_id] = auction
+        self.stats.loads += 1
+        return auction
+
+    # Mirrors the local state of a bidder from its account_application_info response, None if not opted in
+    def load_local(self, auction: MirroredAuction, addr: str, info):
+        local = None
+        if info is not None:
+            local = self.contract.BidderState.decode(info.get("app-local-state", {}).get("key-value", []))
+        auction.local_states[addr] = local
+        self.stats.local_loads += 1
+        return local
+
+    def _hit(self, app_id: int, with_creator: bool):
+        auction = self.auctions.get(app_id)
+        if auction is None or (with_creator and auction.creator is None):
+            return None
+        self.stats.hits += 1
+        return auction
+
+    # The mirrored app, read from algod (AlgodClient) when not mirrored, or when its creator is wanted and unknown
+    def read(self, client, app_id: int, with_creator: bool = False) -> MirroredAuction:
+        return self._hit(app_id, with_creator) or self.load(app_id, client.application_info(app_id))
+
+    async def read_async(self, client, app_id: int, with_creator: bool = False) -> MirroredAuction:
+        return self._hit(app_id, with_creator) or self.load(app_id, await client.application_info(app_id))
+
+    def _local_hit(self, auction: MirroredAuction, addr: str):
+        if addr in auction.local_states:
+            self.stats.local_hits += 1
+            return True
+        return False
+
+    # Local state of a bidder in an app, None when not opted in; read from algod when not mirrored
+    def read_local(self, client, app_id: int, addr: str):
+        auction = self.read(client, app_id)
+        if self._local_hit(auction, addr):
+            return auction.local_states[addr]
+        try:
+            info = client.account_application_info(addr, app_id)
+        except error.AlgodHTTPError as err:
+            if err.code != 404:
+                raise
+            info = None
+        return self.load_local(auction, addr, info)
+
+    async def read_local_async(self, client, app_id: int, addr: str):
+        auction = await self.read_async(client, app_id)
+        if self._local_hit(auction, addr):
+            return auction.local_states[addr]
+        try:
+            info = await client.account_application_info(addr, app_id)
+        except error.AlgodHTTPError as err:
+            if err.code != 404:
+                raise
+            info = None
+        return self.load_local(auction, addr, info)
+
+    # Runs write(global_state) with the state of the app (AlgodClient) and returns its result. A call the node
+    # refuses at evaluation (see stale_state_refusal) may have been built against a mirrored state behind the chain
+    # (another client bid since): the app is then read again, and write retried once if its state did change.
+    def write(self, client, app_id: int, write):
+        mirrored = app_id in self.auctions
+        state = self.read(client, app_id).state
+        try:
+            return write(state)
+        except error.AlgodHTTPError as err:
+            if not mirrored or not stale_state_refusal(err):
+                raise
+            self.invalidate(app_id)
+            fresh = self.read(client, app_id).state
+            if fresh == state:
+                raise
+        return write(fresh)
+
+    # Mirrors an app created by `creator` from the pending info of its create_app call, when it carries the
+    # initial state; returns the app ID
+    def created(self, info: dict, creator: str) -> int:
+        app_id = info["application-index"]
+        if "global-state-delta" in info:
+            state = self.contract.AuctionState.decode([])
+            _apply_delta(state, info["global-state-delta"])
+            self.auctions[app_id] = MirroredAuction(app_id, state, creator, info.get("confirmed-round"))
+            self.stats.deltas += 1
+        return app_id
+
+    def deleted(self, app_id: int):
+        self.auctions.pop(app_id, None)
+
+    # Applies a confirmed call to its mirrored app (see the top of the module); `info` is its pending transaction
+    # info. Returns whether the app is still mirrored.
+    def confirmed(self, app_id: int, call: Call, info: dict = None) -> bool:
+        auction = self.auctions.get(app_id)
+        if auction is None:
+            return False
+        known_local = call.sender in auction.local_states
+        local = auction.local_states.get(call.sender)
+        if call.method == "on_commit" and local is None:
+            # the opt-in of the commit creates the local state
+            local = self.contract.BidderState.decode([])
+            known_local = True
+        expected_state, expected_local = copy.copy(auction.state), copy.copy(local)
+        rule = self.rules.get(call.method)
+        predicted = rule is not None and rule(self.contract, expected_state, expected_local, call)
+
+        has_delta = info is not None and ("global-state-delta" in info or "local-state-delta" in info)
+        if not has_delta:
+            if not predicted:
+                self.invalidate(app_id)
+                return False
+            state, local = expected_state, expected_local
+            self.stats.rule_updates += 1
+        else:
+            state, local = copy.copy(auction.state), copy.copy(local)
+            _apply_delta(state, info.get("global-state-delta", []))
+            for account_delta in info.get("local-state-delta", []):
+                if account_delta["address"] == call.sender and local is not None:
+                    _apply_delta(local, account_delta["delta"])
+            self.stats.deltas += 1
+            if predicted and (state != expected_state or (known_local and local != expected_local)):
+                # the mirrored state was behind the chain
+                self.stats.mismatches += 1
+                self.invalidate(app_id)
+                return False
+        auction.state = state
+        if known_local:
+            auction.local_states[call.sender] = local
+        else:
+            auction.local_states.pop(call.sender, None)
+        if info is not None and info.get("confirmed-round"):
+            auction.round = info["confirmed-round"]
+        return True
+
+    # Applies the method calls of a confirmed AtomicTransactionResponse, `calls` being the Call of each method call
+    # of the group in order
+    def confirmed_response(self, app_id: int, response, calls) -> bool:
+        mirrored = True
+        for result, call in zip(response.abi_results, calls):
+            mirrored = self.confirmed(app_id, call, result.tx_info) and mirrored
+        return mirrored
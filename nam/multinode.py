@@ -0,0 +1,155 @@
+import random
+import threading
+from time import monotonic
+
+from algosdk.v2client import algod
+
+from nam.backoff import classify_error
+from nam.transport import PooledAlgodClient
+from util import map_concurrently
+
+# AlgodClient spreading requests over several algod nodes.
+#
+# A monitor thread checks the status of every node each `health_interval` seconds, tracking whether it answers,
+# its latency (moving average, also fed by the requests it serves) and its last round.
+#  - Reads (status, apps, accounts, params, compile...) go to nodes at most `max_lag` rounds behind the most
+#    advanced one, picking the less loaded of two random candidates (latency x requests in flight x lag).
+#  - Submissions, pending transaction lookups and wait-for-block long-polls go to the best-synced node, so a
+#    transaction is looked up on the node it was sent to.
+# A node that fails with an error worth retrying (see nam.backoff.classify_error) is marked down until its next
+# successful check and the request is sent to the next node, so callers only see an error when every node failed
+# or the error is not the node's fault (e.g. a transaction the contract rejects).
+
+
+class _Node:
+    __slots__ = ("client", "address", "healthy", "latency", "last_round", "inflight", "requests", "failures")
+
+    def __init__(self, client: algod.AlgodClient):
+        self.client = client
+        self.address = client.algod_address
+        self.healthy = False
+        self.latency = None
+        self.last_round = 0
+        self.inflight = 0
+        self.requests = 0
+        self.failures = 0
+
+
+def _sticky(method: str, requrl: str) -> bool:
+    return ((method == "POST" and requrl == "/transactions") or requrl.startswith("/transactions/pending/")
+            or requrl.startswith("/status/wait-for-block-after/"))
+
+
+class MultiNodeAlgodClient(algod.AlgodClient):
+    def __init__(self, nodes, max_lag: int = 2, health_interval: float = 2.0, smoothing: float = 0.2):
+        nodes = list(nodes)
+        if not nodes:
+            raise ValueError("at least one algod node is needed")
+        super().__init__(nodes[0].algod_token, nodes[0].algod_address, nodes[0].headers)
+        self.nodes = [_Node(client) for client in nodes]
+        self.max_lag = max_lag
+        self.health_interval = health_interval
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self.check_health()
+        self._monitor = threading.Thread(target=self._watch_health, daemon=True)
+        self._monitor.start()
+
+    # One PooledAlgodClient per address, all sharing the token and headers
+    @classmethod
+    def from_addresses(cls, algod_token, algod_addresses, headers=None, **kwargs):
+        return cls([PooledAlgodClient(algod_token, address, headers) for address in algod_addresses], **kwargs)
+
+    def _observe(self, node: _Node, seconds: float):
+        node.latency = seconds if node.latency is None else (
+            (1 - self.smoothing) * node.latency + self.smoothing * seconds)
+
+    def _check(self, node: _Node):
+        start = monotonic()
+        try:
+            status = node.client.status()
+        except Exception:
+            with self._lock:
+                node.healthy = False
+            return
+        with self._lock:
+            self._observe(node, monotonic() - start)
+            node.last_round = max(node.last_round, status.get("last-round", 0))
+            node.healthy = True
+
+    # Checks every node now, concurrently
+    def check_health(self):
+        map_concurrently(self._check, self.nodes)
+
+    def _watch_health(self):
+        while not self._closed.wait(self.health_interval):
+            self.check_health()
+
+    def _by_sync(self, nodes):
+        return sorted(nodes, key=lambda n: (not n.healthy, -n.last_round, n.latency or 0))
+
+    def _score(self, node: _Node, best_round: int) -> float:
+        return (node.latency or 0.001) * (1 + node.inflight) * (1 + best_round - node.last_round)
+
+    # Nodes to try, in order: the chosen one first, then the others as fallbacks
+    def _route(self, method: str, requrl: str):
+        with self._lock:
+            if _sticky(method, requrl):
+                return self._by_sync(self.nodes)
+            best_round = max(n.last_round for n in self.nodes if n.healthy) if any(
+                n.healthy for n in self.nodes) else 0
+            candidates = [n for n in self.nodes if n.healthy and best_round - n.last_round <= self.max_lag]
+            rest = self._by_sync([n for n in self.nodes if n not in candidates])
+            candidates.sort(key=lambda n: self._score(n, best_round))
+            if len(candidates) > 1:
+                # power of two choices: spreads the load while favouring fast, synced nodes
+                a, b = random.sample(range(len(candidates)), 2)
+                candidates.insert(0, candidates.pop(min(a, b)))
+            return candidates + rest
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        last_err = None
+        for node in self._route(method, requrl):
+            with self._lock:
+                node.inflight += 1
+                node.requests += 1
+            start = monotonic()
+            try:
+                response = node.client.algod_request(method, requrl, params, data, headers, response_format)
+            except Exception as err:
+                with self._lock:
+                    node.inflight -= 1
+                    if classify_error(method, err) is None:
+                        raise
+                    node.failures += 1
+                    node.healthy = False
+                last_err = err
+                continue
+            with self._lock:
+                node.inflight -= 1
+                if not requrl.startswith("/status/wait-for-block-after/"):
+                    self._observe(node, monotonic() - start)
+                if isinstance(response, dict) and "last-round" in response:
+                    node.last_round = max(node.last_round, response["last-round"])
+            return response
+        raise last_err
+
+    # Per node: address, health, latency, last round, requests served and failures
+    def node_stats(self) -> list:
+        with self._lock:
+            return [{"address": n.address, "healthy": n.healthy, "latency": n.latency, "last_round": n.last_round,
+                     "requests": n.requests, "failures": n.failures} for n in self.nodes]
+
+    def close(self):
+        self._closed.set()
+        for node in self.nodes:
+            close = getattr(node.client, "close", None)
+            if close is not None:
+                close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,177 @@
+import base64
+import threading
+from concurrent.futures import Future, wait
+
+from algosdk import abi, error
+from algosdk.atomic_transaction_composer import (ABI_RETURN_HASH, ABIResult, AtomicTransactionComposer,
+                                                 AtomicTransactionComposerStatus, AtomicTransactionResponse)
+from algosdk.error import ConfirmationTimeoutError, TransactionRejectedError
+
+from util import get_round_waiter, map_concurrently
+
+# Submit-all-then-confirm transaction pipeline.
+#
+# submit() sends signed transactions, groups or AtomicTransactionComposers right away and returns a Future, so
+# independent operations (opt-ins, commits of different bidders, claims across auctions...) go out back-to-back.
+# A single watcher thread then checks every pending transaction once per round, following the chain on the
+# client's shared RoundWaiter, and resolves the futures as their transactions are confirmed, rejected, or not
+# confirmed within wait_rounds rounds. Throughput is bounded by what fits in a block, not by the round time.
+
+
+# Builds the AtomicTransactionComposer response of a confirmed group from the pending info of its transactions,
+# decoding the ABI return values the same way AtomicTransactionComposer.execute does
+def atc_response(atc: AtomicTransactionComposer, confirmed_round: int, tx_infos: dict) -> AtomicTransactionResponse:
+    method_results = []
+    for i, tx_id in enumerate(atc.tx_ids):
+        if i not in atc.method_dict:
+            continue
+        method = atc.method_dict[i]
+        tx_info = tx_infos.get(tx_id)
+        raw_value = return_value = decode_error = None
+        try:
+            if tx_info is None:
+                raise error.AtomicTransactionComposerError("no pending info for transaction {}".format(tx_id))
+            if method.returns.type != abi.Returns.VOID:
+                logs = tx_info.get("logs", [])
+                result_bytes = base64.b64decode(logs[-1]) if logs else b""
+                if len(result_bytes) < 4 or result_bytes[:4] != ABI_RETURN_HASH:
+                    raise error.AtomicTransactionComposerError("app call transaction did not log a return value")
+                raw_value = result_bytes[4:]
+                return_value = method.returns.type.decode(raw_value)
+        except Exception as e:
+            decode_error = e
+        method_results.append(ABIResult(tx_id=tx_id, raw_value=raw_value, return_value=return_value,
+                                        decode_error=decode_error, tx_info=tx_info, method=method))
+    atc.status = AtomicTransactionComposerStatus.COMMITTED
+    return AtomicTransactionResponse(confirmed_round=confirmed_round, tx_ids=atc.tx_ids, results=method_results)
+
+
+class _Pending:
+    __slots__ = ("future", "atc", "tx_ids", "deadline")
+
+    def __init__(self, future, atc, tx_ids, deadline):
+        self.future = future
+        self.atc = atc
+        self.tx_ids = tx_ids
+        self.deadline = deadline
+
+
+class TransactionPipeline:
+    def __init__(self, client, wait_rounds: int = 10, max_workers: int = 32):
+        self.client = client
+        self.wait_rounds = wait_rounds
+        self.max_workers = max_workers
+        # first txid of each submitted transaction or group -> _Pending
+        self._pending = {}
+        self._futures = []
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    # Submits a SignedTransaction, a list of signed transactions forming a group, or an AtomicTransactionComposer.
+    # Returns a Future resolving to the pending info of the (first) transaction, or to the
+    # AtomicTransactionResponse for a composer; a rejected submission fails the Future right away.
+    def submit(self, item) -> Future:
+        atc = None
+        if isinstance(item, AtomicTransactionComposer):
+            atc = item
+            signed = atc.gather_signatures()
+        elif isinstance(item, (list, tuple)):
+            signed = list(item)
+        else:
+            signed = [item]
+
+        future = Future()
+        try:
+            self.client.send_transactions(signed)
+        except Exception as err:
+            future.set_exception(err)
+            return future
+        if atc is not None:
+            atc.status = AtomicTransactionComposerStatus.SUBMITTED
+
+        last_round = get_round_waiter(self.client).last_round
+        first_valid = signed[0].transaction.first_valid_round
+        deadline = max(last_round or first_valid, first_valid) + self.wait_rounds
+        tx_ids = [stxn.get_txid() for stxn in signed]
+        with self._lock:
+            self._pending[tx_ids[0]] = _Pending(future, atc, tx_ids, deadline)
+            self._futures.append(future)
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, daemon=True)
+                self._watcher.start()
+        return future
+
+    # Submits independent items concurrently, over up to max_workers connections, and returns their futures in order
+    def submit_all(self, items) -> list:
+        items = list(items)
+        futures, errors = map_concurrently(lambda i: self.submit(items[i]), range(len(items)), self.max_workers)
+        for i, err in errors.items():
+            futures[i] = Future()
+            futures[i].set_exception(err)
+        return [futures[i] for i in range(len(items))]
+
+    # Waits until every transaction submitted so far is resolved and returns their futures
+    def flush(self, timeout: float = None) -> list:
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures, timeout)
+        return futures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def _resolve(self, txid: str, pending: _Pending, info: dict):
+        if pending.atc is None:
+            pending.future.set_result(info)
+            return
+        method_txids = [pending.atc.tx_ids[i] for i in pending.atc.method_dict]
+        tx_infos, _ = map_concurrently(self.client.pending_transaction_info,
+                                       [t for t in method_txids if t != txid], self.max_workers)
+        tx_infos[txid] = info
+        pending.future.set_result(atc_response(pending.atc, info["confirmed-round"], tx_infos))
+
+    def _watch(self):
+        waiter = get_round_waiter(self.client)
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._watcher = None
+                    return
+                batch = dict(self._pending)
+            # a failed lookup is retried next round, like transaction.wait_for_confirmation does
+            infos, _ = map_concurrently(self.client.pending_transaction_info, batch, self.max_workers)
+            current_round = waiter.last_round
+            done = []
+            for txid, pending in batch.items():
+                info = infos.get(txid, {})
+                try:
+                    if info.get("confirmed-round", 0) > 0:
+                        self._resolve(txid, pending, info)
+                    elif info.get("pool-error"):
+                        pending.future.set_exception(
+                            TransactionRejectedError("Transaction rejected: " + info["pool-error"]))
+                    elif current_round is not None and current_round >= pending.deadline:
+                        pending.future.set_exception(ConfirmationTimeoutError(
+                            "Wait for transaction id {} timed out".format(txid)))
+                    else:
+                        continue
+                except Exception as err:
+                    pending.future.set_exception(err)
+                done.append(txid)
+            with self._lock:
+                for txid in done:
+                    del self._pending[txid]
+                if not self._pending:
+                    continue
+            try:
+                waiter.wait((current_round or 0) + 1)
+            except Exception as err:
+                with self._lock:
+                    failed, self._pending = self._pending, {}
+                    self._watcher = None
+                for pending in failed.values():
+                    pending.future.set_exception(err)
+                return
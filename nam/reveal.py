@@ -0,0 +1,204 @@
+import asyncio
+from hashlib import sha256
+
+from algosdk import account, encoding, error
+from algosdk.atomic_transaction_composer import (AccountTransactionSigner, AtomicTransactionComposer,
+                                                 TransactionWithSigner)
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+
+from nam.aio import AsyncAlgodClient, read_global_state, read_local_states, wait_for_confirmation
+from util import MAX_GROUP_SIZE
+
+# Bulk reveal of sealed bids (on_bid during the reveal window, from commit_end to end_round).
+#
+# A reveal that takes the lead repays the previous lead bidder, so it has to reference that account, and the
+# SealedAuctionContract rejects reveals that do not take the lead (at least the lead bid plus the minimum
+# increment). Independent reveals sent at once would therefore mostly fail: reveal_bids instead
+#  - checks each (amount, nonce) against the bidder's commitment in local state, so a wrong one cannot sink
+#    the others, and leaves out the SealedAuctionContract reveals that could not take the lead. The same read gives
+#    the deposits of the overcollateralized contract, whose reveals above their deposit are refunded and never take
+#    the lead;
+#  - orders the reveals by increasing amount, each referencing the lead bidder before it, and packs them into
+#    atomic groups of up to 16 transactions (8 reveals with their payment for SealedAuctionContract, 16 for the
+#    overcollateralized contract, whose reveals carry no payment), all built against one set of suggested params;
+#  - submits the groups back-to-back without waiting for confirmations (the node validates each against the
+#    pending state left by the previous ones), then confirms them all at once. The reveals of a group the node
+#    refuses are resubmitted one at a time, so only the faulty ones are reported.
+# Every reveal is reported: LANDED with its confirmed round and transaction ID, SKIPPED before sending with the
+# reason, or REJECTED with the node's error.
+
+LANDED = "landed"
+SKIPPED = "skipped"
+REJECTED = "rejected"
+
+
+class Reveal:
+    __slots__ = ("bidder_sk", "bidder", "amount", "nonce", "deposit", "status", "round", "tx_id", "reason")
+
+    def __init__(self, bidder_sk: str, amount: int, nonce: int):
+        self.bidder_sk = bidder_sk
+        self.bidder = account.address_from_private_key(bidder_sk)
+        self.amount = amount
+        self.nonce = nonce
+        # collateral of an overcollateralized bid, from the bidder's local state; None when not read
+        self.deposit = None
+        self.status = None
+        self.round = None
+        self.tx_id = None
+        self.reason = None
+
+    def _finish(self, status: str, reason=None, round: int = None):
+        self.status = status
+        self.reason = reason
+        self.round = round
+
+    def as_dict(self) -> dict:
+        return {"bidder": self.bidder, "amount": self.amount, "status": self.status, "round": self.round,
+                "tx_id": self.tx_id, "reason": None if self.reason is None else str(self.reason)}
+
+    def __repr__(self):
+        return "Reveal({})".format(", ".join("{}={!r}".format(k, v) for k, v in self.as_dict().items()))
+
+
+def commitment(amount: int, nonce: int) -> bytes:
+    return sha256(amount.to_bytes(8, 'big') + nonce.to_bytes(8, 'big')).digest()
+
+
+class _Lead:
+    # the lead bid as the reveals sent so far leave it
+    def __init__(self, state):
+        self.account = encoding.encode_address(state.lead_bid_account) if any(state.lead_bid_account) else None
+        self.amount = state.lead_bid_amount
+        # None for the overcollateralized contract, where any higher bid takes the lead
+        self.increment = getattr(state, "min_bid_increment", None)
+
+    def taken_by(self, reveal: Reveal) -> bool:
+        if self.increment is None:
+            # a bid above its deposit is refunded; without a deposit read it is assumed covered
+            return reveal.amount > self.amount and (reveal.deposit is None or reveal.amount <= reveal.deposit)
+        return reveal.amount >= self.amount + self.increment
+
+
+class _RevealBatch:
+    def __init__(self, client: AsyncAlgodClient, contract, app_id: int, state, sp):
+        self.client = client
+        self.app_id = app_id
+        self.method = contract.auction_methods.get("on_bid")
+        # on_bid(nonce) paid by the preceding payment (SealedAuctionContract), or on_bid(nonce, amount)
+        self.with_payment = len(self.method.args) == 1
+        self.nft_id = state.nft_id
+        self.app_address = get_application_address(app_id)
+        self.lead = _Lead(state)
+        self.sp = sp
+
+    # Adds a reveal to the composer, referencing the lead bidder it repays when it takes the lead
+    def add(self, atc: AtomicTransactionComposer, reveal: Reveal):
+        signer = AccountTransactionSigner(reveal.bidder_sk)
+        accounts = None
+        if self.lead.taken_by(reveal):
+            if self.lead.account is not None:
+                accounts = [self.lead.account]
+            self.lead.account, self.lead.amount = reveal.bidder, reveal.amount
+        if self.with_payment:
+            atc.add_transaction(TransactionWithSigner(
+                transaction.PaymentTxn(reveal.bidder, self.sp, self.app_address, reveal.amount), signer))
+            app_args = [reveal.nonce]
+        else:
+            app_args = [reveal.nonce, reveal.amount]
+        atc.add_method_call(app_id=self.app_id, method=self.method, sender=reveal.bidder, sp=self.sp,
+                            signer=signer, method_args=app_args, foreign_assets=[self.nft_id], accounts=accounts)
+
+    # Signs and submits reveals as one group; returns the ID of its first transaction
+    async def send(self, reveals) -> str:
+        atc = AtomicTransactionComposer()
+        for reveal in reveals:
+            self.add(atc, reveal)
+        signed = atc.gather_signatures()
+        per_reveal = len(signed) // len(reveals)
+        for i, reveal in enumerate(reveals):
+            reveal.tx_id = signed[i * per_reveal + per_reveal - 1].get_txid()
+        await self.client.send_transactions(signed)
+        return signed[0].get_txid()
+
+
+# Reveals sealed bids in app_id, `reveals` being (bidder private key, amount, nonce) triples; contract is the
+# interface module of the app's contract. Waits for the reveal window to open; returns the Reveal of every triple,
+# in the order given.
+async def reveal_bids(client: AsyncAlgodClient, contract, app_id: int, reveals, check_commitments: bool = True,
+                      wait_rounds: int = 10) -> list:
+    reveals = [Reveal(sk, amount, nonce) for sk, amount, nonce in reveals]
+    if not contract.auction_methods.get("on_bid").args:
+        raise ValueError("{} has no sealed bids to reveal".format(contract.auction_contract["name"]))
+    state = await read_global_state(client, app_id, contract.AuctionState)
+    await client.wait_for_round(state.commit_end)
+    # the round the wait left in client.last_round goes stale as soon as nobody waits
+    if (await client.status()).get("last-round") >= state.end_round:
+        for reveal in reveals:
+            reveal._finish(SKIPPED, "the reveal window closed at round {}".format(state.end_round))
+        return reveals
+
+    pending = reveals
+    if check_commitments:
+        bidder_states, errors = await read_local_states(client, [r.bidder for r in reveals], app_id,
+                                                        contract.BidderState)
+        pending = []
+        for reveal in reveals:
+            if reveal.bidder in errors:
+                reveal._finish(SKIPPED, errors[reveal.bidder])
+            elif bidder_states.get(reveal.bidder) is None or bidder_states[reveal.bidder].commitment is None:
+                reveal._finish(SKIPPED, "no commitment: not committed, or already revealed")
+            elif bidder_states[reveal.bidder].commitment != commitment(reveal.amount, reveal.nonce):
+                reveal._finish(SKIPPED, "amount and nonce do not match the commitment")
+            else:
+                if "deposit" in bidder_states[reveal.bidder].__slots__:
+                    # deleted by a reveal, after which the contract reads it as 0
+                    reveal.deposit = bidder_states[reveal.bidder].deposit or 0
+                pending.append(reveal)
+
+    batch = _RevealBatch(client, contract, app_id, state, await client.suggested_params())
+    plan = _Lead(state)
+    ordered = []
+    for reveal in sorted(pending, key=lambda r: r.amount):
+        if plan.taken_by(reveal):
+            plan.account, plan.amount = reveal.bidder, reveal.amount
+        elif batch.with_payment:
+            # the contract rejects it: the lead bid it would need to beat is revealed before it
+            reveal._finish(SKIPPED, "below the lead bid of {} plus the minimum increment".format(plan.amount))
+            continue
+        ordered.append(reveal)
+
+    per_group = MAX_GROUP_SIZE // (2 if batch.with_payment else 1)
+    # first txid of each submitted group -> its reveals
+    submitted = {}
+    for i in range(0, len(ordered), per_group):
+        group = ordered[i:i + per_group]
+        lead = (batch.lead.account, batch.lead.amount)
+        try:
+            submitted[await batch.send(group)] = group
+            continue
+        except error.AlgodHTTPError as err:
+            batch.lead.account, batch.lead.amount = lead
+            if len(group) == 1:
+                group[0]._finish(REJECTED, err)
+                continue
+        for reveal in group:
+            lead = (batch.lead.account, batch.lead.amount)
+            try:
+                submitted[await batch.send([reveal])] = [reveal]
+            except error.AlgodHTTPError as err:
+                batch.lead.account, batch.lead.amount = lead
+                reveal._finish(REJECTED, err)
+
+    async def confirm(txid):
+        try:
+            info = await wait_for_confirmation(client, txid, wait_rounds)
+        except Exception as err:
+            for reveal in submitted[txid]:
+                reveal._finish(REJECTED, err)
+            return
+        for reveal in submitted[txid]:
+            reveal._finish(LANDED, round=info["confirmed-round"])
+
+    await asyncio.gather(*(confirm(txid) for txid in submitted))
+    return reveals
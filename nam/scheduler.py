@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+
+from nam.aio import AsyncAlgodClient, gather_by_item, read_global_state, read_global_states
+from nam.metrics import operation
+
+# Round-deadline scheduler running the phases of many auctions on one event loop.
+#
+# Every managed auction sits in a min-heap keyed by the round of its next phase, read from its global state:
+#  - START when start_round is reached (commits, or bids in an open auction),
+#  - COMMIT_END when commit_end is reached (reveals; sealed auctions only),
+#  - END when end_round is reached (claims and closing).
+# The scheduler follows the chain on the client's shared wait-for-block long-poll. On each new round it pops the
+# auctions whose deadline has passed and hands them to the handler of their phase in batches of at most
+# `batch_size`, all batches of the round at once, then pushes each auction back under its next deadline once its
+# batch is done: O(log n) per transition, whatever the number of auctions, instead of one blocked thread per
+# auction. Batches run in the background, so handlers waiting for confirmations do not hold up the next rounds.
+#
+# A handler is a coroutine function taking a list of ScheduledAuction and returning None, or a dict
+# {app_id: exception} of the auctions it failed for (use per_auction to run a coroutine once per auction).
+# Failed auctions are retried `retry_delay(attempts)` rounds later (the next round by default), up to
+# `max_attempts` times, then moved to `failed`. A handler may also remove() an auction that it gave up on.
+# An auction whose next deadline has already passed too (added late, or a scheduler that fell behind) skips to
+# the latest phase reached, since the contract would reject the actions of the earlier one.
+
+START = "start"
+COMMIT_END = "commit_end"
+END = "end"
+
+# phase -> global state slot holding its round, in order
+PHASE_ROUNDS = ((START, "start_round"), (COMMIT_END, "commit_end"), (END, "end_round"))
+
+
+# (round, phase) of the phases of an auction, from its decoded global state
+def auction_deadlines(state) -> list:
+    return [(getattr(state, slot), phase) for phase, slot in PHASE_ROUNDS if slot in state._keys]
+
+
+class ScheduledAuction:
+    __slots__ = ("app_id", "contract", "state", "deadlines", "index", "attempts", "data", "_entry")
+
+    def __init__(self, app_id: int, contract, state, data=None):
+        self.app_id = app_id
+        # interface module of the auction's contract
+        self.contract = contract
+        self.state = state
+        self.deadlines = auction_deadlines(state)
+        self.index = 0
+        self.attempts = 0
+        # anything the handlers need: keys, bids to reveal...
+        self.data = data
+        # heap entry of the auction, None when it is not queued
+        self._entry = None
+
+    @property
+    def phase(self) -> str:
+        return self.deadlines[self.index][1] if self.index < len(self.deadlines) else None
+
+    @property
+    def deadline(self) -> int:
+        return self.deadlines[self.index][0] if self.index < len(self.deadlines) else None
+
+    # Skips the phases whose successor is due too; returns how many were skipped
+    def catch_up(self, round: int) -> int:
+        skipped = 0
+        while self.index + 1 < len(self.deadlines) and self.deadlines[self.index + 1][0] <= round:
+            self.index += 1
+            skipped += 1
+        return skipped
+
+
+# Batch handler running `fn(auction)` for every auction of the batch, at most `limit` at a time
+def per_auction(fn, limit: int = 256):
+    async def handler(auctions):
+        by_id = {auction.app_id: auction for auction in auctions}
+        _, errors = await gather_by_item(lambda app_id: fn(by_id[app_id]), by_id, limit)
+        return errors
+    return handler
+
+
+class SchedulerStats:
+    def __init__(self):
+        self.rounds = 0
+        self.batches = 0
+        self.dispatched = 0
+        self.failures = 0
+        self.skipped_phases = 0
+        self.finished = 0
+        # sum and max of the rounds between a deadline and the dispatch of its phase
+        self.lag_rounds = 0
+        self.max_lag_rounds = 0
+
+    def snapshot(self) -> dict:
+        out = dict(vars(self))
+        out["mean_lag_rounds"] = self.lag_rounds / self.dispatched if self.dispatched else 0.0
+        return out
+
+
+class AuctionScheduler:
+    def __init__(self, client: AsyncAlgodClient, handlers: dict, batch_size: int = 256, max_attempts: int = 3,
+                 retry_delay=None):
+        self.client = client
+        # phase -> batch handler; phases without one just pass
+        self.handlers = dict(handlers)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay or (lambda attempts: 1)
+        # [deadline, sequence, auction] entries; removed auctions leave their entry behind with auction None
+        self._heap = []
+        self._sequence = itertools.count()
+        self.auctions = {}
+        # batches being handled
+        self._inflight = set()
+        # app_id -> (phase, exception) of the auctions dropped after max_attempts failures
+        self.failed = {}
+        self.stats = SchedulerStats()
+
+    def __len__(self) -> int:
+        return len(self.auctions)
+
+    def _push(self, auction: ScheduledAuction, round: int):
+        auction._entry = [round, next(self._sequence), auction]
+        heapq.heappush(self._heap, auction._entry)
+
+    # Schedules an auction from its decoded global state
+    def add_state(self, app_id: int, contract, state, data=None) -> ScheduledAuction:
+        self.remove(app_id)
+        auction = self.auctions[app_id] = ScheduledAuction(app_id, contract, state, data)
+        if auction.phase is None:
+            del self.auctions[app_id]
+            raise ValueError("app {} has no phase rounds in its global state".format(app_id))
+        self._push(auction, auction.deadline)
+        return auction
+
+    # Schedules an auction, reading its global state
+    async def add(self, app_id: int, contract, data=None) -> ScheduledAuction:
+        state = await read_global_state(self.client, app_id, contract.AuctionState)
+        return self.add_state(app_id, contract, state, data)
+
+    # Schedules auctions of one contract, reading their global states concurrently. Returns the read errors by
+    # app ID; `data` maps app IDs to the data of their auction.
+    async def add_many(self, app_ids, contract, data: dict = None, limit: int = 256) -> dict:
+        states, errors = await read_global_states(self.client, app_ids, contract.AuctionState, limit)
+        for app_id, state in states.items():
+            self.add_state(app_id, contract, state, (data or {}).get(app_id))
+        return errors
+
+    def remove(self, app_id: int):
+        auction = self.auctions.pop(app_id, None)
+        if auction is not None and auction._entry is not None:
+            # lazy deletion: the entry is skipped when it reaches the top of the heap
+            auction._entry[2] = None
+            auction._entry = None
+
+    # Round of the earliest deadline, None when nothing is scheduled
+    def next_deadline(self):
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    # Pops the auctions due at `round`, grouped by phase
+    def _due(self, round: int) -> dict:
+        due = {}
+        while self._heap and self._heap[0][0] <= round:
+            deadline, _, auction = heapq.heappop(self._heap)
+            if auction is None:
+                continue
+            auction._entry = None
+            if auction.attempts == 0:
+                self.stats.skipped_phases += auction.catch_up(round)
+                lag = round - auction.deadline
+                self.stats.lag_rounds += lag
+                self.stats.max_lag_rounds = max(self.stats.max_lag_rounds, lag)
+            due.setdefault(auction.phase, []).append(auction)
+        return due
+
+    async def _dispatch(self, phase: str, batch: list) -> dict:
+        handler = self.handlers.get(phase)
+        if handler is None:
+            return {}
+        try:
+            with operation("scheduler." + phase):
+                return await handler(batch) or {}
+        except Exception as err:
+            return {auction.app_id: err for auction in batch}
+
+    def _advance(self, auction: ScheduledAuction, round: int, err: Exception = None):
+        if auction.app_id not in self.auctions:
+            # removed by a handler
+            return
+        if err is not None:
+            self.stats.failures += 1
+            auction.attempts += 1
+            if auction.attempts < self.max_attempts:
+                self._push(auction, round + max(1, self.retry_delay(auction.attempts)))
+            else:
+                del self.auctions[auction.app_id]
+                self.failed[auction.app_id] = (auction.phase, err)
+            return
+        auction.attempts = 0
+        auction.index += 1
+        if auction.phase is None:
+            del self.auctions[auction.app_id]
+            self.stats.finished += 1
+        else:
+            self._push(auction, auction.deadline)
+
+    async def _run_batch(self, phase: str, batch: list, round: int):
+        errors = await self._dispatch(phase, batch)
+        # retries count from the round the batch ended in
+        round = max(round, self.client.last_round or round)
+        for auction in batch:
+            self._advance(auction, round, errors.get(auction.app_id))
+
+    # Starts the batches of the phases due at `round` in the background; returns {phase: number of auctions}
+    def tick(self, round: int) -> dict:
+        self.stats.rounds += 1
+        due = self._due(round)
+        for phase, auctions in due.items():
+            self.stats.dispatched += len(auctions)
+            for i in range(0, len(auctions), self.batch_size):
+                self.stats.batches += 1
+                task = asyncio.ensure_future(self._run_batch(phase, auctions[i:i + self.batch_size], round))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+        return {phase: len(auctions) for phase, auctions in due.items()}
+
+    # Waits for the batches in progress
+    async def drain(self):
+        while self._inflight:
+            await asyncio.gather(*self._inflight)
+
+    # Follows the chain round by round, running the due phases, until no auction is left (or forever with
+    # until_idle=False, for auctions added along the way)
+    async def run(self, until_idle: bool = True):
+        round = self.client.last_round
+        if round is None:
+            round = (await self.client.status()).get("last-round")
+        while self.auctions or not until_idle:
+            self.tick(round)
+            if until_idle and not self.auctions:
+                break
+            next_deadline = self.next_deadline()
+            if next_deadline is not None and next_deadline > round + 1 and until_idle and not self._inflight:
+                # nothing can become due before then
+                await self.client.wait_for_round(next_deadline)
+            else:
+                await self.client.wait_for_round(round + 1)
+            round = max(round + 1, self.client.last_round)
+        await self.drain()
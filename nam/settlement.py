@@ -0,0 +1,242 @@
+import asyncio
+import base64
+import importlib
+import re
+
+from algosdk import account, encoding, error
+from algosdk.atomic_transaction_composer import (AccountTransactionSigner, AtomicTransactionComposer,
+                                                 TransactionWithSigner)
+from algosdk.future import transaction
+
+from nam.aio import AsyncAlgodClient, gather_by_item, wait_for_confirmation
+from nam.artifacts import INTERFACES
+from nam.scheduler import END, AuctionScheduler, ScheduledAuction
+
+# Background settlement of ended auctions.
+#
+# Until the seller has been paid (paySeller), the winner has got the NFT (payWinner) and the app has been deleted,
+# the bids, the NFT and the min-balance of the app account stay locked in it. SettlementWorker finds the auctions
+# created by the given accounts (one account read each, `discover_interval` rounds apart) and schedules them on an
+# AuctionScheduler whose only handler settles them once end_round is reached:
+#  - the claims still due and the app deletion go out as one atomic group, signed with the keys of the seller and
+#    the winner (the contracts only pay them when they send the call) and of the closer; the deletion sends what
+#    is left in the app account to the app creator;
+#  - when the group fails, e.g. because the winner has not opted into the NFT yet, the seller's claim is sent
+#    alone and the rest is retried `retry_rounds` rounds later (1, 2, 4... by default).
+# Auctions without a winner cannot be deleted by the contracts once started: the seller gets the NFT back and the
+# auction is listed in `stuck`. Auctions whose seller or winner key is unknown are listed in `stuck` as well.
+# worker.stats counts apps settled per round, claims, groups and failures (of the groups and of the seller's claims
+# sent alone).
+
+# the winner cannot receive the NFT: not opted in yet
+_OPT_IN_ERROR = re.compile(r"must optin|missing from")
+
+# rounds to wait before the successive retries of an auction
+RETRY_ROUNDS = (1, 2, 4, 8, 16, 32)
+
+
+def is_opt_in_error(err: Exception) -> bool:
+    return isinstance(err, error.AlgodHTTPError) and _OPT_IN_ERROR.search(str(err)) is not None
+
+
+class SettlementStats:
+    def __init__(self):
+        self.discovered = 0
+        self.settled = 0
+        self.groups = 0
+        self.seller_claims = 0
+        self.winner_claims = 0
+        self.deletions = 0
+        self.opt_in_failures = 0
+        self.other_failures = 0
+        self.first_round = None
+        self.last_round = None
+        # round -> apps settled (deleted) in it
+        self.settled_by_round = {}
+        # sum and max of the rounds between the end of an auction and its deletion
+        self.lag_rounds = 0
+        self.max_lag_rounds = 0
+
+    def settle(self, round: int, end_round: int):
+        self.settled += 1
+        self.settled_by_round[round] = self.settled_by_round.get(round, 0) + 1
+        self.lag_rounds += round - end_round
+        self.max_lag_rounds = max(self.max_lag_rounds, round - end_round)
+
+    # Counters, with the apps settled per round over the rounds the worker ran
+    def snapshot(self) -> dict:
+        out = dict(vars(self))
+        out["settled_by_round"] = dict(sorted(self.settled_by_round.items()))
+        rounds = self.last_round - self.first_round + 1 if self.first_round is not None else 0
+        out["settled_per_round"] = self.settled / rounds if rounds else 0.0
+        out["max_settled_per_round"] = max(self.settled_by_round.values(), default=0)
+        out["mean_lag_rounds"] = self.lag_rounds / self.settled if self.settled else 0.0
+        return out
+
+
+class SettlementWorker:
+    def __init__(self, client: AsyncAlgodClient, keys: dict, closer_sk: str, contracts=None,
+                 retry_rounds=RETRY_ROUNDS, batch_size: int = 64, discover_interval: int = 10):
+        self.client = client
+        # address -> private key of the sellers and winners the worker claims for
+        self.keys = keys
+        self.closer_sk = closer_sk
+        self.closer = account.address_from_private_key(closer_sk)
+        contracts = contracts if contracts is not None else [importlib.import_module(name) for name in INTERFACES]
+        # approval program -> interface module, to recognise the auctions among the created apps
+        self.contracts = {contract.auction_programs()[0]: contract for contract in contracts}
+        self.retry_rounds = tuple(retry_rounds)
+        self.discover_interval = discover_interval
+        self.scheduler = AuctionScheduler(
+            client, {END: self.settle_batch}, batch_size, max_attempts=len(self.retry_rounds) + 1,
+            retry_delay=lambda attempts: self.retry_rounds[min(attempts, len(self.retry_rounds)) - 1])
+        # app_id -> reason, for the auctions the worker cannot settle
+        self.stuck = {}
+        self.stats = SettlementStats()
+
+    @property
+    def failed(self) -> dict:
+        return self.scheduler.failed
+
+    # Schedules the auctions created by `creators` that are not already; returns how many were added
+    async def discover(self, creators) -> int:
+        infos, errors = await gather_by_item(self.client.account_info, creators)
+        if errors:
+            raise next(iter(errors.values()))
+        added = 0
+        for info in infos.values():
+            for app in info.get("created-apps", []):
+                if app["id"] in self.scheduler.auctions or app["id"] in self.stuck:
+                    continue
+                contract = self.contracts.get(base64.b64decode(app["params"].get("approval-program", "")))
+                if contract is None:
+                    # not an auction
+                    continue
+                state = contract.AuctionState.decode(app["params"].get("global-state", []))
+                self.add_state(app["id"], contract, state, info.get("round"), app["params"].get("creator"))
+                added += 1
+        self.stats.discovered += added
+        return added
+
+    # `round` is the round the state was read at, when known, and `creator` the app creator
+    def add_state(self, app_id: int, contract, state, round: int = None, creator: str = None) -> ScheduledAuction:
+        return self.scheduler.add_state(app_id, contract, state, (round, creator))
+
+    async def add(self, app_id: int, contract) -> ScheduledAuction:
+        return await self.scheduler.add(app_id, contract)
+
+    def _give_up(self, app_id: int, reason: str):
+        self.scheduler.remove(app_id)
+        self.stuck[app_id] = reason
+
+    def _claim(self, atc, auction, state, method_name: str, claimant: bytes, sp):
+        address = encoding.encode_address(claimant)
+        sk = self.keys.get(address)
+        if sk is None:
+            raise KeyError(address)
+        atc.add_method_call(app_id=auction.app_id,
+                            method=auction.contract.auction_methods.get(method_name),
+                            sender=address,
+                            sp=sp,
+                            signer=AccountTransactionSigner(sk),
+                            foreign_assets=[state.nft_id],
+                            )
+
+    def _delete(self, atc, auction, state, creator: str, sp):
+        accounts = [encoding.encode_address(state.seller), encoding.encode_address(state.lead_bid_account), creator]
+        atc.add_transaction(TransactionWithSigner(transaction.ApplicationDeleteTxn(
+            sender=self.closer, index=auction.app_id, accounts=accounts, foreign_assets=[state.nft_id], sp=sp),
+            AccountTransactionSigner(self.closer_sk)))
+
+    # Signs and sends a group, returning the round it was confirmed in (the claims return nothing to decode)
+    async def _send(self, atc) -> int:
+        await self.client.send_transactions(atc.gather_signatures())
+        return (await wait_for_confirmation(self.client, atc.tx_ids[0]))["confirmed-round"]
+
+    # State and creator of an auction about to be settled: the ones it was added with on the first attempt if read
+    # once the auction had ended (bids cannot change it anymore), else read now
+    async def _final_state(self, auction: ScheduledAuction):
+        read_round, creator = auction.data or (None, None)
+        if (auction.attempts == 0 and read_round is not None and creator is not None
+                and read_round >= auction.state.end_round):
+            return auction.state, creator
+        app = await self.client.application_info(auction.app_id)
+        return auction.contract.AuctionState.decode(app["params"].get("global-state", [])), app["params"]["creator"]
+
+    # Sends the claims still due and the deletion of one ended auction as one group; when that fails, the seller's
+    # claim alone. Returns the round the app was deleted in (None if it cannot be), or raises the error of the group
+    # for the auction to be retried.
+    async def settle(self, auction: ScheduledAuction):
+        state, creator = await self._final_state(auction)
+        paid = auction.contract.HAS_BEEN_PAID
+        has_winner = any(state.lead_bid_account)
+        seller_due = state.seller_has_been_paid != paid
+        winner_due = has_winner and state.winner_has_been_paid != paid
+        sp = await self.client.suggested_params()
+
+        atc = AtomicTransactionComposer()
+        try:
+            if seller_due:
+                self._claim(atc, auction, state, "paySeller", state.seller, sp)
+            if winner_due:
+                self._claim(atc, auction, state, "payWinner", state.lead_bid_account, sp)
+        except KeyError as err:
+            self._give_up(auction.app_id, "no key for {}".format(err.args[0]))
+            return
+        if not has_winner:
+            if seller_due:
+                await self._send(atc)
+                self.stats.seller_claims += 1
+            # the contracts only delete started auctions once the winner has been paid
+            self._give_up(auction.app_id, "no winner")
+            return
+        self._delete(atc, auction, state, creator, sp)
+        try:
+            confirmed_round = await self._send(atc)
+        except Exception as err:
+            if is_opt_in_error(err):
+                self.stats.opt_in_failures += 1
+            else:
+                self.stats.other_failures += 1
+            if seller_due and winner_due:
+                seller_atc = AtomicTransactionComposer()
+                self._claim(seller_atc, auction, state, "paySeller", state.seller, sp)
+                try:
+                    await self._send(seller_atc)
+                    self.stats.seller_claims += 1
+                except Exception:
+                    # retried along with the rest; the error raised is the group's
+                    self.stats.other_failures += 1
+            raise
+        self.stats.groups += 1
+        self.stats.seller_claims += seller_due
+        self.stats.winner_claims += winner_due
+        self.stats.deletions += 1
+        self.stats.settle(confirmed_round, state.end_round)
+        return confirmed_round
+
+    async def settle_batch(self, auctions) -> dict:
+        outcomes = await asyncio.gather(*(self.settle(auction) for auction in auctions), return_exceptions=True)
+        return {auction.app_id: outcome for auction, outcome in zip(auctions, outcomes)
+                if isinstance(outcome, Exception)}
+
+    # Follows the chain, discovering the auctions of `creators` every discover_interval rounds and settling them
+    # as they end, until none is left to settle (or forever with until_idle=False)
+    async def run(self, creators, until_idle: bool = True):
+        round = self.client.last_round
+        if round is None:
+            round = (await self.client.status()).get("last-round")
+        next_discovery = round
+        while True:
+            if round >= next_discovery:
+                await self.discover(creators)
+                next_discovery = round + self.discover_interval
+            if self.stats.first_round is None:
+                self.stats.first_round = round
+            self.scheduler.tick(round)
+            self.stats.last_round = round
+            if until_idle and not self.scheduler.auctions:
+                break
+            await self.client.wait_for_round(round + 1)
+            round = self.client.last_round
+        await self.scheduler.drain()
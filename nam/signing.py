@@ -0,0 +1,155 @@
+import base64
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future
+
+import msgpack
+from algosdk import account, constants, encoding
+from nacl.signing import SigningKey
+
+# Signing service backed by a pool of worker processes, for generating large numbers of signed transactions
+# (load tests, large drops) on every core instead of one.
+#
+# Private keys are registered once with add_key(), which hands them to every worker and returns a handle (the
+# account address); batches then only carry (handle, transaction) pairs. Workers encode, sign and serialize the
+# transactions themselves and send back signed msgpack blobs, ready to be concatenated and submitted with
+# send_raw_transaction (see send_signed).
+
+# batches smaller than this are not split between workers
+MIN_CHUNK = 256
+
+
+def _signed_blob(signing_key, sgnr: bytes, txn_bytes: bytes) -> bytes:
+    sig = signing_key.sign(constants.txid_prefix + txn_bytes).signature
+    # same canonical encoding as SignedTransaction: a map with sorted keys (sgnr < sig < txn)
+    head = msgpack.packb("sig") + msgpack.packb(sig, use_bin_type=True) + msgpack.packb("txn")
+    if sgnr is not None:
+        return b"\x83" + msgpack.packb("sgnr") + msgpack.packb(sgnr, use_bin_type=True) + head + txn_bytes
+    return b"\x82" + head + txn_bytes
+
+
+def _worker(tasks, results):
+    keys = {}
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        if task[0] == "key":
+            _, handle, private_key = task
+            keys[handle] = SigningKey(base64.b64decode(private_key)[:constants.key_len_bytes])
+            continue
+        _, batch_id, chunk, items, with_txids = task
+        try:
+            out = []
+            for handle, txn in items:
+                txn_bytes = txn if isinstance(txn, bytes) else base64.b64decode(encoding.msgpack_encode(txn))
+                # a key signing for another sender (rekeyed account) is recorded as the authorizing address
+                sgnr = None if isinstance(txn, bytes) or txn.sender == handle else encoding.decode_address(handle)
+                blob = _signed_blob(keys[handle], sgnr, txn_bytes)
+                if with_txids:
+                    txid = base64.b32encode(encoding.checksum(constants.txid_prefix + txn_bytes)).decode()
+                    out.append((txid.rstrip("="), blob))
+                else:
+                    out.append(blob)
+            results.put((batch_id, chunk, out, None))
+        except Exception as err:
+            results.put((batch_id, chunk, None, err))
+
+
+class SigningService:
+    def __init__(self, processes: int = None):
+        self.processes = processes or os.cpu_count() or 1
+        context = multiprocessing.get_context()
+        self._results = context.Queue()
+        self._tasks = [context.Queue() for _ in range(self.processes)]
+        self._workers = [context.Process(target=_worker, args=(tasks, self._results), daemon=True)
+                         for tasks in self._tasks]
+        for worker in self._workers:
+            worker.start()
+        self._handles = set()
+        self._batches = {}
+        self._batch_ids = itertools.count()
+        self._next_worker = itertools.cycle(range(self.processes))
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+
+    # Hands a private key to every worker, once, and returns its handle (the account address)
+    def add_key(self, private_key: str) -> str:
+        handle = account.address_from_private_key(private_key)
+        with self._lock:
+            if handle not in self._handles:
+                for tasks in self._tasks:
+                    tasks.put(("key", handle, private_key))
+                self._handles.add(handle)
+        return handle
+
+    # Signs a batch of (handle, txn) pairs, txn being a Transaction or its msgpack encoding, and returns a Future
+    # of the signed msgpack blobs in the same order, or of (txid, blob) pairs with with_txids.
+    # Assign group IDs before signing: the blobs are final.
+    def sign_async(self, items, with_txids: bool = False) -> Future:
+        items = list(items)
+        future = Future()
+        if not items:
+            future.set_result([])
+            return future
+        size = max(MIN_CHUNK, -(-len(items) // self.processes))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        with self._lock:
+            unknown = {handle for handle, _ in items} - self._handles
+            if unknown:
+                future.set_exception(KeyError("no key registered for {}".format(", ".join(sorted(unknown)))))
+                return future
+            batch_id = next(self._batch_ids)
+            self._batches[batch_id] = (future, [None] * len(chunks), [len(chunks)])
+            for chunk, chunk_items in enumerate(chunks):
+                self._tasks[next(self._next_worker)].put(("sign", batch_id, chunk, chunk_items, with_txids))
+        return future
+
+    def sign(self, items, with_txids: bool = False) -> list:
+        return self.sign_async(items, with_txids).result()
+
+    def _collect(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            batch_id, chunk, out, err = message
+            with self._lock:
+                batch = self._batches.get(batch_id)
+                if batch is None:
+                    continue
+                future, outputs, remaining = batch
+                if err is not None:
+                    del self._batches[batch_id]
+                else:
+                    outputs[chunk] = out
+                    remaining[0] -= 1
+                    if remaining[0]:
+                        continue
+                    del self._batches[batch_id]
+            if err is not None:
+                future.set_exception(err)
+            else:
+                future.set_result([blob for out in outputs for blob in out])
+
+    def close(self):
+        for tasks in self._tasks:
+            tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._results.put(None)
+        self._collector.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Submits signed msgpack blobs (one transaction or one atomic group) and returns the ID of the first transaction
+def send_signed(client, blobs) -> str:
+    return client.send_raw_transaction(base64.b64encode(b"".join(blobs)))
@@ -0,0 +1,447 @@
+import base64
+import re
+
+from algosdk import encoding
+from algosdk.abi import Method
+
+# Pure-Python TEAL assembler for AVM versions 1 to 6, producing the same bytecode as algod's /compile.
+# Like algod, programs from version 4 on get their `int`/`byte` constants optimized: constants used more than
+# once go to the intcblock/bytecblock ordered by number of uses (ties by first use), single-use constants
+# are emitted as pushint/pushbytes.
+# Explicit intcblock/bytecblock declarations are not supported - PyTeal never emits them.
+
+MAX_VERSION = 6
+# first version where the assembler optimizes constant blocks and allows backward branches
+OPTIMIZE_CONSTANTS_VERSION = 4
+
+
+class TealAssemblyError(Exception):
+    def __init__(self, line: int, message: str):
+        super().__init__("line {}: {}".format(line, message))
+        self.line = line
+
+
+# (name, first version) in field index order
+TXN_FIELDS = [
+    ("Sender", 1), ("Fee", 1), ("FirstValid", 1), ("FirstValidTime", 1), ("LastValid", 1), ("Note", 1),
+    ("Lease", 1), ("Receiver", 1), ("Amount", 1), ("CloseRemainderTo", 1), ("VotePK", 1), ("SelectionPK", 1),
+    ("VoteFirst", 1), ("VoteLast", 1), ("VoteKeyDilution", 1), ("Type", 1), ("TypeEnum", 1), ("XferAsset", 1),
+    ("AssetAmount", 1), ("AssetSender", 1), ("AssetReceiver", 1), ("AssetCloseTo", 1), ("GroupIndex", 1),
+    ("TxID", 1), ("ApplicationID", 2), ("OnCompletion", 2), ("ApplicationArgs", 2), ("NumAppArgs", 2),
+    ("Accounts", 2), ("NumAccounts", 2), ("ApprovalProgram", 2), ("ClearStateProgram", 2), ("RekeyTo", 2),
+    ("ConfigAsset", 2), ("ConfigAssetTotal", 2), ("ConfigAssetDecimals", 2), ("ConfigAssetDefaultFrozen", 2),
+    ("ConfigAssetUnitName", 2), ("ConfigAssetName", 2), ("ConfigAssetURL", 2), ("ConfigAssetMetadataHash", 2),
+    ("ConfigAssetManager", 2), ("ConfigAssetReserve", 2), ("ConfigAssetFreeze", 2), ("ConfigAssetClawback", 2),
+    ("FreezeAsset", 2), ("FreezeAssetAccount", 2), ("FreezeAssetFrozen", 2), ("Assets", 3), ("NumAssets", 3),
+    ("Applications", 3), ("NumApplications", 3), ("GlobalNumUint", 3), ("GlobalNumByteSlice", 3),
+    ("LocalNumUint", 3), ("LocalNumByteSlice", 3), ("ExtraProgramPages", 4), ("Nonparticipation", 5),
+    ("Logs", 5), ("NumLogs", 5), ("CreatedAssetID", 5), ("CreatedApplicationID", 5), ("LastLog", 6),
+    ("StateProofPK", 6),
+]
+TXN_ARRAY_FIELDS = {"ApplicationArgs", "Accounts", "Assets", "Applications", "Logs"}
+GLOBAL_FIELDS = [
+    ("MinTxnFee", 1), ("MinBalance", 1), ("MaxTxnLife", 1), ("ZeroAddress", 1), ("GroupSize", 1),
+    ("LogicSigVersion", 2), ("Round", 2), ("LatestTimestamp", 2), ("CurrentApplicationID", 2),
+    ("CreatorAddress", 3), ("CurrentApplicationAddress", 5), ("GroupID", 5), ("OpcodeBudget", 6),
+    ("CallerApplicationID", 6), ("CallerApplicationAddress", 6),
+]
+ASSET_HOLDING_FIELDS = [("AssetBalance", 2), ("AssetFrozen", 2)]
+ASSET_PARAMS_FIELDS = [
+    ("AssetTotal", 2), ("AssetDecimals", 2), ("AssetDefaultFrozen", 2), ("AssetUnitName", 2), ("AssetName", 2),
+    ("AssetURL", 2), ("AssetMetadataHash", 2), ("AssetManager", 2), ("AssetReserve", 2), ("AssetFreeze", 2),
+    ("AssetClawback", 2), ("AssetCreator", 5),
+]
+APP_PARAMS_FIELDS = [
+    ("AppApprovalProgram", 5), ("AppClearStateProgram", 5), ("AppGlobalNumUint", 5),
+    ("AppGlobalNumByteSlice", 5), ("AppLocalNumUint", 5), ("AppLocalNumByteSlice", 5),
+    ("AppExtraProgramPages", 5), ("AppCreator", 5), ("AppAddress", 5),
+]
+ACCT_PARAMS_FIELDS = [("AcctBalance", 6), ("AcctMinBalance", 6), ("AcctAuthAddr", 6)]
+ECDSA_CURVES = [("Secp256k1", 5)]
+
+# immediate argument kinds
+U8 = "uint8"
+LABEL = "label"
+TXN = "txn field"
+TXNA = "txn array field"
+GLOBAL = "global field"
+ASSET_HOLDING = "asset_holding field"
+ASSET_PARAMS = "asset_params field"
+APP_PARAMS = "app_params field"
+ACCT_PARAMS = "acct_params field"
+CURVE = "curve"
+
+FIELDS = {
+    TXN: TXN_FIELDS, TXNA: TXN_FIELDS, GLOBAL: GLOBAL_FIELDS, ASSET_HOLDING: ASSET_HOLDING_FIELDS,
+    ASSET_PARAMS: ASSET_PARAMS_FIELDS, APP_PARAMS: APP_PARAMS_FIELDS, ACCT_PARAMS: ACCT_PARAMS_FIELDS,
+    CURVE: ECDSA_CURVES,
+}
+FIELD_INDEX = {kind: {name: (i, version) for i, (name, version) in enumerate(fields)}
+               for kind, fields in FIELDS.items()}
+
+# name: (opcode, first version, immediates)
+OPS = {
+    "err": (0x00, 1, ()), "sha256": (0x01, 1, ()), "keccak256": (0x02, 1, ()), "sha512_256": (0x03, 1, ()),
+    "ed25519verify": (0x04, 1, ()), "ecdsa_verify": (0x05, 5, (CURVE,)),
+    "ecdsa_pk_decompress": (0x06, 5, (CURVE,)), "ecdsa_pk_recover": (0x07, 5, (CURVE,)),
+    "+": (0x08, 1, ()), "-": (0x09, 1, ()), "/": (0x0a, 1, ()), "*": (0x0b, 1, ()), "<": (0x0c, 1, ()),
+    ">": (0x0d, 1, ()), "<=": (0x0e, 1, ()), ">=": (0x0f, 1, ()), "&&": (0x10, 1, ()), "||": (0x11, 1, ()),
+    "==": (0x12, 1, ()), "!=": (0x13, 1, ()), "!": (0x14, 1, ()), "len": (0x15, 1, ()), "itob": (0x16, 1, ()),
+    "btoi": (0x17, 1, ()), "%": (0x18, 1, ()), "|": (0x19, 1, ()), "&": (0x1a, 1, ()), "^": (0x1b, 1, ()),
+    "~": (0x1c, 1, ()), "mulw": (0x1d, 1, ()), "addw": (0x1e, 2, ()), "divmodw": (0x1f, 4, ()),
+    "intc": (0x21, 1, (U8,)), "intc_0": (0x22, 1, ()), "intc_1": (0x23, 1, ()), "intc_2": (0x24, 1, ()),
+    "intc_3": (0x25, 1, ()), "bytec": (0x27, 1, (U8,)), "bytec_0": (0x28, 1, ()), "bytec_1": (0x29, 1, ()),
+    "bytec_2": (0x2a, 1, ()), "bytec_3": (0x2b, 1, ()), "arg": (0x2c, 1, (U8,)), "arg_0": (0x2d, 1, ()),
+    "arg_1": (0x2e, 1, ()), "arg_2": (0x2f, 1, ()), "arg_3": (0x30, 1, ()),
+    "txn": (0x31, 1, (TXN,)), "global": (0x32, 1, (GLOBAL,)), "gtxn": (0x33, 1, (U8, TXN)),
+    "load": (0x34, 1, (U8,)), "store": (0x35, 1, (U8,)), "txna": (0x36, 2, (TXNA, U8)),
+    "gtxna": (0x37, 2, (U8, TXNA, U8)), "gtxns": (0x38, 3, (TXN,)), "gtxnsa": (0x39, 3, (TXNA, U8)),
+    "gload": (0x3a, 4, (U8, U8)), "gloads": (0x3b, 4, (U8,)), "gaid": (0x3c, 4, (U8,)), "gaids": (0x3d, 4, ()),
+    "loads": (0x3e, 5, ()), "stores": (0x3f, 5, ()),
+    "bnz": (0x40, 1, (LABEL,)), "bz": (0x41, 2, (LABEL,)), "b": (0x42, 2, (LABEL,)), "return": (0x43, 2, ()),
+    "assert": (0x44, 3, ()), "pop": (0x48, 1, ()), "dup": (0x49, 1, ()), "dup2": (0x4a, 2, ()),
+    "dig": (0x4b, 3, (U8,)), "swap": (0x4c, 3, ()), "select": (0x4d, 3, ()), "cover": (0x4e, 5, (U8,)),
+    "uncover": (0x4f, 5, (U8,)), "concat": (0x50, 2, ()), "substring": (0x51, 2, (U8, U8)),
+    "substring3": (0x52, 2, ()), "getbit": (0x53, 3, ()), "setbit": (0x54, 3, ()), "getbyte": (0x55, 3, ()),
+    "setbyte": (0x56, 3, ()), "extract": (0x57, 5, (U8, U8)), "extract3": (0x58, 5, ()),
+    "extract_uint16": (0x59, 5, ()), "extract_uint32": (0x5a, 5, ()), "extract_uint64": (0x5b, 5, ()),
+    "balance": (0x60, 2, ()), "app_opted_in": (0x61, 2, ()), "app_local_get": (0x62, 2, ()),
+    "app_local_get_ex": (0x63, 2, ()), "app_global_get": (0x64, 2, ()), "app_global_get_ex": (0x65, 2, ()),
+    "app_local_put": (0x66, 2, ()), "app_global_put": (0x67, 2, ()), "app_local_del": (0x68, 2, ()),
+    "app_global_del": (0x69, 2, ()), "asset_holding_get": (0x70, 2, (ASSET_HOLDING,)),
+    "asset_params_get": (0x71, 2, (ASSET_PARAMS,)), "app_params_get": (0x72, 5, (APP_PARAMS,)),
+    "acct_params_get": (0x73, 6, (ACCT_PARAMS,)), "min_balance": (0x78, 3, ()),
+    "callsub": (0x88, 4, (LABEL,)), "retsub": (0x89, 4, ()), "shl": (0x90, 4, ()), "shr": (0x91, 4, ()),
+    "sqrt": (0x92, 4, ()), "bitlen": (0x93, 4, ()), "exp": (0x94, 4, ()), "expw": (0x95, 4, ()),
+    "bsqrt": (0x96, 6, ()), "divw": (0x97, 6, ()),
+    "b+": (0xa0, 4, ()), "b-": (0xa1, 4, ()), "b/": (0xa2, 4, ()), "b*": (0xa3, 4, ()), "b<": (0xa4, 4, ()),
+    "b>": (0xa5, 4, ()), "b<=": (0xa6, 4, ()), "b>=": (0xa7, 4, ()), "b==": (0xa8, 4, ()), "b!=": (0xa9, 4, ()),
+    "b%": (0xaa, 4, ()), "b|": (0xab, 4, ()), "b&": (0xac, 4, ()), "b^": (0xad, 4, ()), "b~": (0xae, 4, ()),
+    "bzero": (0xaf, 4, ()), "log": (0xb0, 5, ()), "itxn_begin": (0xb1, 5, ()), "itxn_field": (0xb2, 5, (TXN,)),
+    "itxn_submit": (0xb3, 5, ()), "itxn": (0xb4, 5, (TXN,)), "itxna": (0xb5, 5, (TXNA, U8)),
+    "itxn_next": (0xb6, 6, ()), "gitxn": (0xb7, 6, (U8, TXN)), "gitxna": (0xb8, 6, (U8, TXNA, U8)),
+    "txnas": (0xc0, 5, (TXNA,)), "gtxnas": (0xc1, 5, (U8, TXNA)), "gtxnsas": (0xc2, 5, (TXNA,)),
+    "args": (0xc3, 5, ()), "gloadss": (0xc4, 6, ()), "itxnas": (0xc5, 6, (TXNA,)),
+    "gitxnas": (0xc6, 6, (U8, TXNA)),
+}
+OP_INTCBLOCK = 0x20
+OP_BYTECBLOCK = 0x26
+OP_PUSHBYTES = 0x80
+OP_PUSHINT = 0x81
+
+# ops taking an array field index as extra argument are assembled as their `a` variant
+ARRAY_VARIANTS = {"txn": "txna", "gtxn": "gtxna", "gtxns": "gtxnsa", "itxn": "itxna", "gitxn": "gitxna"}
+
+# named integer constants accepted by `int`
+NAMED_INTS = {
+    "unknown": 0, "pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6,
+    "NoOp": 0, "OptIn": 1, "CloseOut": 2, "ClearState": 3, "UpdateApplication": 4, "DeleteApplication": 5,
+}
+
+_ESCAPES = {"n": b"\n", "r": b"\r", "t": b"\t", "\\": b"\\", "\"": b"\""}
+
+
+def _uvarint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+# splits a source line into fields, keeping quoted strings whole and dropping `//` comments
+def _fields(line: str):
+    fields = []
+    i, n = 0, len(line)
+    while i < n:
+        if line[i].isspace():
+            i += 1
+            continue
+        if line.startswith("//", i):
+            break
+        start = i
+        in_string = False
+        while i < n and (in_string or not line[i].isspace()):
+            if line[i] == "\\" and in_string:
+                i += 1
+            elif line[i] == "\"":
+                in_string = not in_string
+            i += 1
+        fields.append(line[start:i])
+    return fields
+
+
+def _parse_string(literal: str, line: int) -> bytes:
+    if len(literal) < 2 or not literal.startswith("\"") or not literal.endswith("\""):
+        raise TealAssemblyError(line, "malformed string literal {}".format(literal))
+    body = literal[1:-1]
+    out = bytearray()
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != "\\":
+            out += c.encode("utf-8")
+            i += 1
+            continue
+        escape = body[i + 1:i + 2]
+        if escape in _ESCAPES:
+            out += _ESCAPES[escape]
+            i += 2
+        elif escape == "x" and re.fullmatch(r"[0-9a-fA-F]{2}", body[i + 2:i + 4]):
+            out.append(int(body[i + 2:i + 4], 16))
+            i += 4
+        else:
+            raise TealAssemblyError(line, "invalid escape sequence in {}".format(literal))
+    return bytes(out)
+
+
+# parses the byte-string forms accepted by `byte` and `pushbytes`: "..", 0x.., base64/b64, base32/b32
+def _parse_bytes(args, line: int) -> bytes:
+    if not args:
+        raise TealAssemblyError(line, "byte constant expected")
+    arg = args[0]
+    try:
+        if arg in ("base64", "b64", "base32", "b32"):
+            if len(args) != 2:
+                raise TealAssemblyError(line, "{} needs exactly one value".format(arg))
+            return _decode_base(arg, args[1])
+        if len(args) != 1:
+            raise TealAssemblyError(line, "unexpected arguments after {}".format(arg))
+        match = re.fullmatch(r"(base64|b64|base32|b32)\((.*)\)", arg)
+        if match:
+            return _decode_base(match.group(1), match.group(2))
+        if arg.startswith("0x"):
+            return bytes.fromhex(arg[2:])
+        if arg.startswith("\""):
+            return _parse_string(arg, line)
+    except ValueError as err:
+        raise TealAssemblyError(line, "invalid byte constant {}: {}".format(arg, err)) from None
+    raise TealAssemblyError(line, "invalid byte constant {}".format(arg))
+
+
+def _decode_base(encoding_name: str, value: str) -> bytes:
+    if encoding_name.endswith("64"):
+        return base64.b64decode(value, validate=True)
+    return base64.b32decode(value + "=" * (-len(value) % 8))
+
+
+def _parse_uint(arg: str, line: int) -> int:
+    try:
+        # like Go's strconv.ParseUint with base 0, a leading zero means octal
+        value = int(arg, 8) if re.fullmatch(r"0[0-7]+", arg) else int(arg, 0)
+    except ValueError:
+        raise TealAssemblyError(line, "invalid integer {}".format(arg)) from None
+    if not 0 <= value < 2 ** 64:
+        raise TealAssemblyError(line, "integer {} out of range".format(arg))
+    return value
+
+
+class _Program:
+    def __init__(self, version: int):
+        self.version = version
+        # assembled items: bytes, ("int", value), ("byte", value), ("branch", opcode, label, line)
+        self.items = []
+        self.labels = {}
+        self.ints = []
+        self.bytes = []
+
+    def op(self, name: str, args, line: int):
+        if name in ARRAY_VARIANTS and len(args) == len(OPS[name][2]) + 1:
+            name = ARRAY_VARIANTS[name]
+        opcode, version, immediates = OPS[name]
+        if version > self.version:
+            raise TealAssemblyError(line, "{} opcode was introduced in v{}".format(name, version))
+        if len(args) != len(immediates):
+            raise TealAssemblyError(line, "{} expects {} immediate arguments".format(name, len(immediates)))
+        if immediates == (LABEL,):
+            self.items.append(("branch", opcode, args[0], line))
+            return
+        out = bytearray([opcode])
+        for kind, arg in zip(immediates, args):
+            out.append(self.immediate(name, kind, arg, line))
+        self.items.append(bytes(out))
+
+    def immediate(self, name: str, kind: str, arg: str, line: int) -> int:
+        if kind == U8:
+            value = _parse_uint(arg, line)
+            if value > 255:
+                raise TealAssemblyError(line, "{} immediate {} exceeds 255".format(name, arg))
+            return value
+        field = FIELD_INDEX[kind].get(arg)
+        if field is None:
+            raise TealAssemblyError(line, "{} unknown {}: {}".format(name, kind, arg))
+        index, version = field
+        if version > self.version:
+            raise TealAssemblyError(line, "{} {} available in version {}".format(name, arg, version))
+        if kind == TXN and arg in TXN_ARRAY_FIELDS:
+            raise TealAssemblyError(line, "{} {} field needs an array index".format(name, arg))
+        if kind == TXNA and arg not in TXN_ARRAY_FIELDS:
+            raise TealAssemblyError(line, "{} {} is not an array field".format(name, arg))
+        return index
+
+    def int_constant(self, value: int):
+        if value not in self.ints:
+            self.ints.append(value)
+        self.items.append(("int", value))
+
+    def byte_constant(self, value: bytes):
+        if value not in self.bytes:
+            self.bytes.append(value)
+        self.items.append(("byte", value))
+
+    def label(self, name: str, line: int):
+        if name in self.labels:
+            raise TealAssemblyError(line, "duplicate label {}".format(name))
+        # position is resolved in assemble() once constant references have their final size
+        self.labels[name] = len(self.items)
+
+    # Orders a constant block and returns (block, singletons) following algod's optimization rules
+    def constant_block(self, kind: str, constants):
+        if self.version < OPTIMIZE_CONSTANTS_VERSION:
+            return list(constants), set()
+        uses = {}
+        for item in self.items:
+            if isinstance(item, tuple) and item[0] == kind:
+                uses[item[1]] = uses.get(item[1], 0) + 1
+        # stable sort: equally used constants keep their first-use order
+        ranked = sorted(constants, key=lambda value: -uses[value])
+        return [value for value in ranked if uses[value] > 1], {value for value in ranked if uses[value] == 1}
+
+    def assemble(self) -> bytes:
+        int_block, int_singletons = self.constant_block("int", self.ints)
+        byte_block, byte_singletons = self.constant_block("byte", self.bytes)
+        int_index = {value: i for i, value in enumerate(int_block)}
+        byte_index = {value: i for i, value in enumerate(byte_block)}
+
+        # first pass: encode constant references and record offsets of labels and branches
+        chunks = []
+        offsets = []
+        position = 0
+        for item in self.items:
+            offsets.append(position)
+            if isinstance(item, bytes):
+                chunk = item
+            elif item[0] == "int":
+                if item[1] in int_singletons:
+                    chunk = bytes([OP_PUSHINT]) + _uvarint(item[1])
+                else:
+                    chunk = _constant_reference(0x21, 0x22, int_index[item[1]])
+            elif item[0] == "byte":
+                if item[1] in byte_singletons:
+                    chunk = bytes([OP_PUSHBYTES]) + _uvarint(len(item[1])) + item[1]
+                else:
+                    chunk = _constant_reference(0x27, 0x28, byte_index[item[1]])
+            else:
+                chunk = None
+                position += 3
+                chunks.append(item)
+                continue
+            position += len(chunk)
+            chunks.append(chunk)
+        offsets.append(position)
+
+        # second pass: resolve branch offsets, relative to the end of the branching instruction
+        code = bytearray()
+        for i, chunk in enumerate(chunks):
+            if isinstance(chunk, bytes):
+                code += chunk
+                continue
+            _, opcode, label, line = chunk
+            if label not in self.labels:
+                raise TealAssemblyError(line, "reference to undefined label {}".format(label))
+            offset = offsets[self.labels[label]] - (offsets[i] + 3)
+            if offset < 0 and self.version < OPTIMIZE_CONSTANTS_VERSION:
+                raise TealAssemblyError(line, "label {} is a back reference, back jump support was introduced "
+                                              "in v4".format(label))
+            if not -0x8000 <= offset <= 0x7fff:
+                raise TealAssemblyError(line, "label {} is too far away".format(label))
+            code += bytes([opcode]) + (offset & 0xffff).to_bytes(2, "big")
+
+        program = bytearray(_uvarint(self.version))
+        if int_block:
+            program += bytes([OP_INTCBLOCK]) + _uvarint(len(int_block))
+            for value in int_block:
+                program += _uvarint(value)
+        if byte_block:
+            program += bytes([OP_BYTECBLOCK]) + _uvarint(len(byte_block))
+            for value in byte_block:
+                program += _uvarint(len(value)) + value
+        return bytes(program + code)
+
+
+def _constant_reference(op_indexed: int, op_first: int, index: int) -> bytes:
+    if index < 4:
+        return bytes([op_first + index])
+    if index > 255:
+        raise TealAssemblyError(0, "constant block exceeds 256 entries")
+    return bytes([op_indexed, index])
+
+
+# Assembles TEAL source into program bytecode
+def assemble(source: str) -> bytes:
+    program = None
+    for line_number, line in enumerate(source.splitlines(), start=1):
+        fields = _fields(line)
+        if not fields:
+            continue
+        if fields[0] == "#pragma":
+            if len(fields) != 3 or fields[1] != "version":
+                raise TealAssemblyError(line_number, "unsupported pragma {}".format(" ".join(fields[1:])))
+            if program is not None:
+                raise TealAssemblyError(line_number, "#pragma version is only allowed before instructions")
+            version = _parse_uint(fields[2], line_number)
+            if not 1 <= version <= MAX_VERSION:
+                raise TealAssemblyError(line_number, "unsupported version {}".format(version))
+            program = _Program(version)
+            continue
+        if program is None:
+            # as in algod, programs without a version pragma are version 1
+            program = _Program(1)
+        if fields[0].endswith(":"):
+            program.label(fields[0][:-1], line_number)
+            fields = fields[1:]
+            if not fields:
+                continue
+        name, args = fields[0], fields[1:]
+        if name == "int":
+            if len(args) != 1:
+                raise TealAssemblyError(line_number, "int needs one argument")
+            program.int_constant(NAMED_INTS[args[0]] if args[0] in NAMED_INTS else _parse_uint(args[0], line_number))
+        elif name == "byte":
+            program.byte_constant(_parse_bytes(args, line_number))
+        elif name == "addr":
+            if len(args) != 1:
+                raise TealAssemblyError(line_number, "addr needs one argument")
+            try:
+                program.byte_constant(encoding.decode_address(args[0]))
+            except Exception:
+                raise TealAssemblyError(line_number, "invalid address {}".format(args[0])) from None
+        elif name == "method":
+            if len(args) != 1:
+                raise TealAssemblyError(line_number, "method needs one argument")
+            signature = _parse_string(args[0], line_number).decode("utf-8")
+            try:
+                program.byte_constant(Method.from_signature(signature).get_selector())
+            except Exception:
+                raise TealAssemblyError(line_number, "invalid method signature {}".format(signature)) from None
+        elif name == "pushint":
+            if program.version < 3:
+                raise TealAssemblyError(line_number, "pushint opcode was introduced in v3")
+            if len(args) != 1:
+                raise TealAssemblyError(line_number, "pushint needs one argument")
+            program.items.append(bytes([OP_PUSHINT]) + _uvarint(_parse_uint(args[0], line_number)))
+        elif name == "pushbytes":
+            if program.version < 3:
+                raise TealAssemblyError(line_number, "pushbytes opcode was introduced in v3")
+            value = _parse_bytes(args, line_number)
+            program.items.append(bytes([OP_PUSHBYTES]) + _uvarint(len(value)) + value)
+        elif name in ("intcblock", "bytecblock"):
+            raise TealAssemblyError(line_number, "explicit {} is not supported".format(name))
+        elif name in OPS:
+            program.op(name, args, line_number)
+        else:
+            raise TealAssemblyError(line_number, "unknown opcode: {}".format(name))
+    if program is None:
+        program = _Program(1)
+    return program.assemble()
@@ -0,0 +1,127 @@
+import http.client
+import json
+import queue
+import threading
+from urllib import parse
+
+from algosdk import constants, error
+from algosdk.v2client import algod
+from algosdk.v2client.algod import api_version_path_prefix
+
+from nam.metrics import response_received
+
+# AlgodClient whose requests go through a pool of persistent HTTP/1.1 connections instead of opening a new
+# connection (TCP, and TLS for https nodes) per request like the SDK's urllib transport.
+#
+# At most `pool_size` connections are open at once: a request made while all of them are busy waits up to
+# `pool_timeout` seconds for one to be released (None waits forever). `timeout` is the socket timeout used for
+# connecting and reading. Idle connections closed by the node are reopened transparently. The length of each
+# response body is reported to nam.metrics, for an InstrumentedAlgodClient wrapping the pool to record.
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    def __init__(self, algod_token, algod_address, headers=None, pool_size: int = 32, timeout: float = 30.0,
+                 pool_timeout=None):
+        super().__init__(algod_token, algod_address, headers)
+        url = parse.urlsplit(algod_address)
+        if url.scheme not in ("http", "https"):
+            raise ValueError("unsupported algod address {}".format(algod_address))
+        self._connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        self._host = url.hostname
+        self._port = url.port
+        self._base_path = url.path.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pool_timeout = pool_timeout
+        self._slots = threading.BoundedSemaphore(pool_size)
+        # idle connections, most recently used first so that connections the node timed out are the least reused
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise PoolTimeoutError("no algod connection available after {}s".format(self.pool_timeout))
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            with self._lock:
+                self.connections_opened += 1
+            return self._connection_class(self._host, self._port, timeout=self.timeout), False
+
+    def _release(self, conn, reusable: bool):
+        if reusable:
+            self._idle.put(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, method, url, data, header):
+        conn, reused = self._acquire()
+        try:
+            try:
+                conn.request(method, url, body=data, headers=header)
+                resp = conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # the node closed the idle connection in the meantime, retry once on a fresh one
+                if not reused:
+                    raise
+                conn.close()
+                with self._lock:
+                    self.connections_opened += 1
+                conn.request(method, url, body=data, headers=header)
+                resp = conn.getresponse()
+            body = resp.read()
+        except BaseException:
+            self._release(conn, False)
+            raise
+        self._release(conn, not resp.will_close)
+        return resp.status, body
+
+    # Same request building and error mapping as AlgodClient.algod_request, over a pooled connection
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        header = {"User-Agent": "py-algorand-sdk"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        if requrl not in constants.unversioned_paths:
+            requrl = api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        status, body = self._send(method, self._base_path + requrl, data, header)
+        response_received(len(body))
+        if status >= 400:
+            message = body.decode("utf-8", errors="replace")
+            try:
+                message = json.loads(message)["message"]
+            except Exception:
+                pass
+            raise error.AlgodHTTPError(message, status)
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return body
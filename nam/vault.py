@@ -0,0 +1,212 @@
+import secrets
+import sqlite3
+from collections import defaultdict
+
+from algosdk import account, error
+
+from nam.aio import AsyncAlgodClient, gather_by_item, read_global_state
+from nam.artifacts import interface_module
+from nam.reveal import LANDED, SKIPPED, commitment, reveal_bids
+
+# Durable store of sealed-bid commitments, so the bids can be revealed by whatever process runs at commit_end,
+# including one restarted since the commit.
+#
+# One SQLite file (WAL journal, fsynced commits) holds a row per commitment: app, name of its contract (resolved to
+# its interface module through nam.artifacts, so the file does not depend on the sys.path of the process that wrote
+# it), bidder address, amount, nonce, commitment, deposit and the reveal window [reveal_round, end_round) read from
+# the auction's global state, plus the outcome of its reveal. Rows are indexed by app and, while pending, by
+# reveal_round and end_round: due(round) marks the commitments whose window has closed expired, then fetches every
+# reveal that can be sent at the round with one range scan over the open windows.
+# commit_bid records the bid before sending the commitment, so a crash between the two cannot lose a nonce; a
+# commitment the node refuses is marked failed. Private keys are never stored: reveal_due takes them as an
+# address -> key mapping, like SettlementWorker.
+#
+# Nonces are 64-bit values from the secrets module (the contracts take a uint64), drawn in bulk with new_nonces;
+# SQLite integers being signed, they are stored as 8 big-endian bytes.
+
+PENDING = "pending"
+REVEALED = "revealed"
+FAILED = "failed"
+EXPIRED = "expired"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commitments (
+    id INTEGER PRIMARY KEY,
+    app_id INTEGER NOT NULL,
+    contract TEXT NOT NULL,
+    bidder TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    nonce BLOB NOT NULL,
+    commitment BLOB NOT NULL,
+    deposit INTEGER NOT NULL,
+    reveal_round INTEGER NOT NULL,
+    end_round INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    revealed_round INTEGER,
+    tx_id TEXT,
+    reason TEXT,
+    UNIQUE (app_id, bidder)
+);
+CREATE INDEX IF NOT EXISTS commitments_app ON commitments (app_id);
+CREATE INDEX IF NOT EXISTS commitments_pending_reveal ON commitments (reveal_round) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS commitments_pending_end ON commitments (end_round) WHERE status = 'pending';
+"""
+
+_COLUMNS = ("id", "app_id", "contract", "bidder", "amount", "nonce", "commitment", "deposit", "reveal_round",
+            "end_round", "status", "revealed_round", "tx_id", "reason")
+
+
+def new_nonces(count: int) -> list:
+    data = secrets.token_bytes(8 * count)
+    return [int.from_bytes(data[i:i + 8], 'big') for i in range(0, len(data), 8)]
+
+
+def new_nonce() -> int:
+    return secrets.randbits(64)
+
+
+class Commitment:
+    __slots__ = _COLUMNS
+
+    def __init__(self, row):
+        for name, value in zip(_COLUMNS, row):
+            setattr(self, name, value)
+        self.nonce = int.from_bytes(self.nonce, 'big')
+
+    def as_dict(self) -> dict:
+        out = {name: getattr(self, name) for name in _COLUMNS}
+        out["commitment"] = self.commitment.hex()
+        return out
+
+    def __repr__(self):
+        return "Commitment(app_id={}, bidder={}, amount={}, status={})".format(
+            self.app_id, self.bidder, self.amount, self.status)
+
+
+class CommitmentVault:
+    def __init__(self, path: str):
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM commitments").fetchone()[0]
+
+    # Stores commitments in one transaction; `bids` are (app_id, contract name, bidder, amount, nonce,
+    # deposit, reveal_round, end_round) tuples. A bidder's earlier commitment to the same app is replaced.
+    def record_many(self, bids):
+        rows = [(app_id, contract, bidder, amount, nonce.to_bytes(8, 'big'), commitment(amount, nonce), deposit,
+                 reveal_round, end_round)
+                for app_id, contract, bidder, amount, nonce, deposit, reveal_round, end_round in bids]
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO commitments (app_id, contract, bidder, amount, nonce, commitment, deposit, "
+                "reveal_round, end_round) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def record(self, app_id: int, contract: str, bidder: str, amount: int, nonce: int, deposit: int,
+               reveal_round: int, end_round: int):
+        self.record_many([(app_id, contract, bidder, amount, nonce, deposit, reveal_round, end_round)])
+
+    def _select(self, where: str, args, table: str = "commitments") -> list:
+        rows = self._db.execute("SELECT {} FROM {} WHERE {} ORDER BY id".format(", ".join(_COLUMNS), table, where),
+                                args)
+        return [Commitment(row) for row in rows]
+
+    def get(self, app_id: int, bidder: str):
+        found = self._select("app_id = ? AND bidder = ?", (app_id, bidder))
+        return found[0] if found else None
+
+    def for_app(self, app_id: int) -> list:
+        return self._select("app_id = ?", (app_id,))
+
+    # Pending reveals whose window is open at `round`. The ones whose window has closed are marked expired first,
+    # so the reveal_round range scanned only holds open windows.
+    def due(self, round: int) -> list:
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("UPDATE commitments SET status = ?, reason = 'the reveal window closed at round ' || "
+                             "end_round WHERE status = 'pending' AND end_round <= ?", (EXPIRED, round))
+        # left to itself, SQLite scans end_round > round: every future reveal
+        return self._select("status = 'pending' AND reveal_round <= ? AND end_round > ?", (round, round),
+                            "commitments INDEXED BY commitments_pending_reveal")
+
+    # Round of the earliest pending reveal, None when there is none
+    def next_reveal_round(self):
+        return self._db.execute("SELECT MIN(reveal_round) FROM commitments WHERE status = 'pending'").fetchone()[0]
+
+    # Records the outcomes of nam.reveal Reveals of one app. Landed reveals are marked revealed and skipped ones
+    # failed, with their reason; rejected ones stay pending to be retried.
+    def update_reveals(self, app_id: int, reveals):
+        rows = []
+        for reveal in reveals:
+            reason = None if reveal.reason is None else str(reveal.reason)
+            status = REVEALED if reveal.status == LANDED else FAILED if reveal.status == SKIPPED else PENDING
+            rows.append((status, reveal.round, reveal.tx_id, reason, app_id, reveal.bidder))
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("UPDATE commitments SET status = ?, revealed_round = ?, tx_id = ?, reason = ? "
+                                 "WHERE app_id = ? AND bidder = ?", rows)
+
+    def mark_failed(self, app_id: int, bidder: str, reason: str):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.execute("UPDATE commitments SET status = ?, reason = ? WHERE app_id = ? AND bidder = ?",
+                             (FAILED, reason, app_id, bidder))
+
+
+# Commits a sealed bid through AuctionOperations `ops`, recording it in the vault first; draws a nonce when none is
+# given. Returns the Commitment stored.
+async def commit_bid(vault: CommitmentVault, ops, app_id: int, bidder_sk: str, amount: int, deposit: int,
+                     nonce: int = None) -> Commitment:
+    state = await read_global_state(ops.client, app_id, ops.AuctionState)
+    bidder = account.address_from_private_key(bidder_sk)
+    nonce = new_nonce() if nonce is None else nonce
+    vault.record(app_id, ops.contract.auction_contract["name"], bidder, amount, nonce, deposit, state.commit_end,
+                 state.end_round)
+    try:
+        await ops.commitAuctionApp(app_id, bidder_sk, amount, nonce, deposit)
+    except error.AlgodHTTPError as err:
+        # refused by the node; after any other error the commitment may be on chain, and stays pending for
+        # reveal_bids to check
+        vault.mark_failed(app_id, bidder, str(err))
+        raise
+    return vault.get(app_id, bidder)
+
+
+# Reveals every commitment of the vault due at `round` (the last round seen by default), one reveal_bids per app,
+# all apps at once, with the private keys in `keys` (address -> key). Returns {app_id: [Reveal]}; commitments of
+# bidders without a key are left pending, and those never committed on chain end up failed.
+async def reveal_due(client: AsyncAlgodClient, vault: CommitmentVault, keys: dict, round: int = None) -> dict:
+    if round is None:
+        round = client.last_round
+        if round is None:
+            round = (await client.status()).get("last-round")
+    by_app = defaultdict(list)
+    for due in vault.due(round):
+        if due.bidder in keys:
+            by_app[due.app_id].append(due)
+
+    async def reveal_app(app_id):
+        dues = by_app[app_id]
+        contract = interface_module(dues[0].contract)
+        reveals = await reveal_bids(client, contract, app_id, [(keys[due.bidder], due.amount, due.nonce)
+                                                               for due in dues])
+        vault.update_reveals(app_id, reveals)
+        return reveals
+
+    results, errors = await gather_by_item(reveal_app, by_app)
+    if errors:
+        raise next(iter(errors.values()))
+    return results
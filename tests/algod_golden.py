@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+import sys
+
+# Golden bytecode of the three contracts: their approval and clear TEAL (as in the artifact bundles) compiled by
+# algod's /compile, checked in as tests/golden/<contract name>.json with the hash of the TEAL it was compiled from.
+# test_teal_assembler compares nam.teal_assembler against it. To (re)generate after the contracts changed, run
+#   NAM_ALGOD_ADDRESS=http://localhost:4001 NAM_ALGOD_TOKEN=... python tests/algod_golden.py
+# against a node with EnableDeveloperAPI.
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+
+def golden_path(contract_name: str) -> str:
+    return os.path.join(GOLDEN_DIR, contract_name + ".json")
+
+
+def teal_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+# The golden file of a contract, None when none was generated
+def load_golden(contract_name: str):
+    path = golden_path(contract_name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from algosdk.v2client import algod
+    from nam.artifacts import CONTRACT_INTERFACES, bundle_path
+
+    client = algod.AlgodClient(os.environ.get("NAM_ALGOD_TOKEN", "a" * 64), os.environ["NAM_ALGOD_ADDRESS"])
+    version = client.versions().get("build", {})
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for name in CONTRACT_INTERFACES:
+        with open(bundle_path(name)) as f:
+            bundle = json.load(f)
+        golden = {"algod": "{major}.{minor}.{build_number}".format(**version) if version else None}
+        for program in ("approval", "clear"):
+            source = bundle[program + "_teal"]
+            golden[program + "_teal_sha256"] = teal_hash(source)
+            golden[program + "_program"] = client.compile(source)["result"]
+        with open(golden_path(name), "w") as f:
+            json.dump(golden, f, indent=1)
+            f.write("\n")
+        print("wrote", golden_path(name))
+
+
+if __name__ == "__main__":
+    main()
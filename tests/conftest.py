@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the tests import nam, util and the contract packages from the repository root, like the Benchmarks scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
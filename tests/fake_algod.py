@@ -0,0 +1,244 @@
+import asyncio
+import base64
+import copy
+from hashlib import sha256
+
+from algosdk import encoding, error
+from algosdk.future import transaction
+
+GENESIS_HASH = base64.b64encode(bytes(32)).decode("ascii")
+
+
+def encode_state(view) -> list:
+    out = []
+    for slot, key in view._keys.items():
+        value = getattr(view, slot)
+        if value is None:
+            continue
+        entry = {"key": base64.b64encode(key).decode("ascii")}
+        if isinstance(value, bytes):
+            entry["value"] = {"type": 1, "bytes": base64.b64encode(value).decode("ascii"), "uint": 0}
+        else:
+            entry["value"] = {"type": 2, "bytes": "", "uint": value}
+        out.append(entry)
+    return out
+
+
+# eval-delta of the changes from one state view to another, as algod reports it
+def state_delta(before, after) -> list:
+    out = []
+    for slot, key in after._keys.items():
+        old = None if before is None else getattr(before, slot)
+        new = getattr(after, slot)
+        if old == new:
+            continue
+        item = {"key": base64.b64encode(key).decode("ascii")}
+        if new is None:
+            item["value"] = {"action": 3}
+        elif isinstance(new, bytes):
+            item["value"] = {"action": 1, "bytes": base64.b64encode(new).decode("ascii")}
+        else:
+            item["value"] = {"action": 2, "uint": new}
+        out.append(item)
+    return out
+
+
+def _uint(arg: bytes) -> int:
+    return int.from_bytes(arg, "big")
+
+
+def _deletes_app(txn) -> bool:
+    return (isinstance(txn, transaction.ApplicationCallTxn)
+            and txn.on_complete == transaction.OnComplete.DeleteApplicationOC)
+
+
+# Global state of a sealed auction of `contract` in its reveal window (rounds 1000 to 1100)
+def auction_state(contract, **values):
+    state = contract.AuctionState.decode([])
+    state.seller = bytes(32)
+    state.nft_id = 8
+    state.start_round = 900
+    state.commit_end = 1000
+    state.end_round = 1100
+    state.lead_bid_amount = 100_000
+    state.lead_bid_account = bytes(32)
+    state.second_highest_bid_amount = 100_000
+    for name, value in values.items():
+        setattr(state, name, value)
+    return state
+
+
+# Async algod client stand-in holding one app of an auction contract (contract being its interface module), which
+# runs the state changes of on_commit, on_bid, paySeller and payWinner with the checks that decide whether a group
+# is accepted: the commitment, the minimum increment of AuctionContract and SealedAuctionContract, the deposit of
+# the overcollateralized contract, the previous lead bidder being referenced when it is repaid, the winner being
+# opted into the NFT when paid (from opt_in_rounds[winner], if set) and both claims being paid when the app is
+# deleted. Accepted groups are confirmed in the next round with their eval-deltas (left out with deltas=False, like
+# nodes returning none); refused ones raise AlgodHTTPError like algod.
+class FakeAlgod:
+    def __init__(self, contract, app_id: int, state, round: int = 1000, creator: str = None):
+        self.contract = contract
+        self.app_id = app_id
+        self.state = state
+        self.creator = creator
+        # bidder address -> local state view
+        self.local_states = {}
+        # winner address -> round from which it is opted into the NFT
+        self.opt_in_rounds = {}
+        self.deleted = False
+        self.last_round = round
+        self.pending = {}
+        self.accepted = []
+        self.refused = []
+        self.reads = 0
+        self.deltas = True
+
+    async def status(self):
+        return {"last-round": self.last_round}
+
+    async def wait_for_round(self, round: int) -> float:
+        self.last_round = max(self.last_round, round)
+        # let the tasks in the background run, as a real wait would
+        await asyncio.sleep(0)
+        return 0.0
+
+    async def suggested_params(self):
+        return transaction.SuggestedParams(1000, self.last_round, self.last_round + 1000, GENESIS_HASH,
+                                           "fake", False, "future", 1000)
+
+    def _app(self) -> dict:
+        program = base64.b64encode(self.contract.auction_programs()[0]).decode("ascii")
+        return {"id": self.app_id, "params": {"creator": self.creator, "approval-program": program,
+                                              "global-state": encode_state(self.state)}}
+
+    async def application_info(self, app_id: int):
+        self.reads += 1
+        if app_id != self.app_id or self.deleted:
+            raise error.AlgodHTTPError("application does not exist", 404)
+        return self._app()
+
+    async def account_info(self, address: str):
+        self.reads += 1
+        created = [self._app()] if address == self.creator and not self.deleted else []
+        return {"address": address, "round": self.last_round, "created-apps": created}
+
+    async def account_application_info(self, address: str, app_id: int):
+        self.reads += 1
+        if app_id != self.app_id or address not in self.local_states:
+            raise error.AlgodHTTPError("account application info not found", 404)
+        return {"app-local-state": {"id": app_id, "key-value": encode_state(self.local_states[address])}}
+
+    async def pending_transaction_info(self, txid: str):
+        return self.pending.get(txid, {"pool-error": "", "confirmed-round": 0})
+
+    async def send_transaction(self, signed) -> str:
+        return await self.send_transactions([signed])
+
+    async def send_transactions(self, signed) -> str:
+        txns = [stxn.transaction for stxn in signed]
+        state, local_states = copy.copy(self.state), dict(self.local_states)
+        infos = []
+        try:
+            for i, txn in enumerate(txns):
+                infos.append(self._evaluate(txns, i, state, local_states))
+        except ValueError as err:
+            self.refused.append(txns)
+            raise error.AlgodHTTPError("transaction rejected by logic: {}".format(err), 400) from None
+        self.state, self.local_states = state, local_states
+        self.deleted = self.deleted or any(_deletes_app(txn) for txn in txns)
+        self.accepted.append(txns)
+        for stxn, info in zip(signed, infos):
+            info["confirmed-round"] = self.last_round + 1
+            info["pool-error"] = ""
+            if not self.deltas:
+                info.pop("global-state-delta", None)
+                info.pop("local-state-delta", None)
+            self.pending[stxn.get_txid()] = info
+        self.last_round += 1
+        return signed[0].get_txid()
+
+    def _evaluate(self, txns, i: int, state, local_states) -> dict:
+        txn = txns[i]
+        if not isinstance(txn, transaction.ApplicationCallTxn) or txn.index != self.app_id:
+            return {}
+        if _deletes_app(txn):
+            if (state.seller_has_been_paid != self.contract.HAS_BEEN_PAID
+                    or state.winner_has_been_paid != self.contract.HAS_BEEN_PAID):
+                raise ValueError("auction not settled")
+            return {}
+        method = self.contract.auction_methods.get_by_selector(txn.app_args[0]).name
+        before_state = copy.copy(state)
+        before_local = local_states.get(txn.sender)
+        local = copy.copy(before_local)
+        if method == "on_commit":
+            local = local or self.contract.BidderState.decode([])
+            local.commitment = txn.app_args[1][2:]
+            if "deposit" in local.__slots__:
+                local.deposit = txns[i - 1].amt
+        elif method == "on_bid":
+            self._bid(txns, i, state, local)
+        elif method == "paySeller":
+            state.seller_has_been_paid = self.contract.HAS_BEEN_PAID
+        elif method == "payWinner":
+            if self.last_round < self.opt_in_rounds.get(txn.sender, 0):
+                raise ValueError("asset {} missing from {}".format(state.nft_id, txn.sender))
+            state.winner_has_been_paid = self.contract.HAS_BEEN_PAID
+        info = {"global-state-delta": state_delta(before_state, state)}
+        if local is not None:
+            local_states[txn.sender] = local
+            delta = state_delta(before_local, local)
+            if delta:
+                info["local-state-delta"] = [{"address": txn.sender, "delta": delta}]
+        if not info["global-state-delta"]:
+            del info["global-state-delta"]
+        return info
+
+    def _bid(self, txns, i: int, state, local):
+        txn = txns[i]
+        lead = state.lead_bid_account
+        if len(txn.app_args) == 1:
+            # AuctionContract: the payment is the bid
+            amount = txns[i - 1].amt
+            if amount < state.lead_bid_amount + state.min_bid_increment:
+                raise ValueError("bid too low")
+            takes_lead = True
+            state.num_bids += 1
+        else:
+            nonce = _uint(txn.app_args[1])
+            with_payment = len(txn.app_args) == 2
+            amount = txns[i - 1].amt if with_payment else _uint(txn.app_args[2])
+            if local is None or local.commitment != sha256(amount.to_bytes(8, "big")
+                                                           + nonce.to_bytes(8, "big")).digest():
+                raise ValueError("commitment mismatch")
+            if with_payment:
+                if amount < state.lead_bid_amount + state.min_bid_increment:
+                    raise ValueError("bid too low")
+                takes_lead = True
+                local.commitment = None
+                local.value = amount
+                state.num_bids += 1
+            else:
+                takes_lead = amount <= (local.deposit or 0) and amount > state.lead_bid_amount
+                if not takes_lead and amount <= (local.deposit or 0) and amount > state.second_highest_bid_amount:
+                    state.second_highest_bid_amount = amount
+                local.deposit = None
+            if takes_lead:
+                state.second_highest_bid_amount = state.lead_bid_amount
+        if takes_lead:
+            if any(lead) and encoding.encode_address(lead) not in (txn.accounts or []):
+                raise ValueError("previous lead bidder not referenced")
+            state.lead_bid_amount = amount
+            state.lead_bid_account = encoding.decode_address(txn.sender)
+
+
+# Blocking view of a FakeAlgod, standing in for an algod.AlgodClient
+class SyncAlgod:
+    def __init__(self, fake: FakeAlgod):
+        self.fake = fake
+
+    def __getattr__(self, name):
+        method = getattr(self.fake, name)
+
+        def call(*args):
+            return asyncio.run(method(*args))
+        return call
@@ -0,0 +1,100 @@
+import asyncio
+
+from algosdk import error
+
+from nam.aio import AsyncAlgodClient, wait_for_confirmation
+
+
+# AsyncAlgodClient whose status endpoints are served by `status` and `status_after_block` coroutines
+def client_with_status(status, status_after_block):
+    client = AsyncAlgodClient("a" * 64, "http://127.0.0.1:1")
+    client.status = status
+    client.status_after_block = status_after_block
+    return client
+
+
+async def next_round(last_round):
+    await asyncio.sleep(0.01)
+    return {"last-round": last_round + 1}
+
+
+def test_wait_for_round_shares_one_poller():
+    polls = []
+
+    async def status():
+        polls.append(None)
+        return {"last-round": 10}
+
+    async def run():
+        client = client_with_status(status, next_round)
+        await asyncio.gather(*(client.wait_for_round(round) for round in (11, 12, 12, 13)))
+        return client.last_round
+
+    assert asyncio.run(run()) == 13
+    assert len(polls) == 1
+
+
+def test_wait_for_round_raises_poller_error():
+    async def status():
+        raise error.AlgodHTTPError("down", 503)
+
+    async def run():
+        client = client_with_status(status, next_round)
+        try:
+            await asyncio.gather(client.wait_for_round(11), client.wait_for_round(12))
+        except error.AlgodHTTPError as err:
+            return err
+
+    assert asyncio.run(run()).code == 503
+
+
+def test_wait_for_round_restarts_poller_that_failed_unobserved():
+    calls = []
+
+    async def status():
+        calls.append(None)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise error.AlgodHTTPError("down", 503)
+        return {"last-round": 10}
+
+    async def run():
+        client = client_with_status(status, next_round)
+        try:
+            # the only waiter gives up before the poller fails
+            await asyncio.wait_for(client.wait_for_round(11), 0.01)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.1)
+        await asyncio.wait_for(client.wait_for_round(11), 1)
+        return client.last_round
+
+    assert asyncio.run(run()) == 11
+
+
+def test_wait_for_confirmation_counts_rounds_from_the_chain():
+    chain = {"round": 1050}
+    polls = []
+
+    async def status():
+        return {"last-round": chain["round"]}
+
+    async def after_block(last_round):
+        await asyncio.sleep(0.001)
+        chain["round"] = max(chain["round"], last_round + 1)
+        return {"last-round": chain["round"]}
+
+    async def pending_transaction_info(txid):
+        polls.append(chain["round"])
+        # confirmed three rounds after the wait started
+        return {"confirmed-round": 1053 if chain["round"] >= 1053 else 0, "pool-error": ""}
+
+    async def run():
+        client = client_with_status(status, after_block)
+        client.pending_transaction_info = pending_transaction_info
+        # left behind by a poller that stopped when its waiters were done
+        client.last_round = 1000
+        return await wait_for_confirmation(client, "TXID", wait_rounds=5)
+
+    assert asyncio.run(run())["confirmed-round"] == 1053
+    assert polls == [1050, 1051, 1052, 1053]
@@ -0,0 +1,108 @@
+import http.client
+import socket
+import urllib.error
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+import nam.backoff
+from nam.backoff import THROTTLED, TRANSIENT, ThrottledAlgodClient, TokenBucket, classify_error
+
+
+@pytest.mark.parametrize("method,err,kind", [
+    ("GET", AlgodHTTPError("slow down", 429), THROTTLED),
+    ("POST", AlgodHTTPError("slow down", 429), THROTTLED),
+    ("GET", AlgodHTTPError("unavailable", 503), TRANSIENT),
+    ("POST", AlgodHTTPError("unavailable", 503), TRANSIENT),
+    # the node may have taken a submission it answered 500, 502 or 504 to
+    ("GET", AlgodHTTPError("bad gateway", 502), TRANSIENT),
+    ("POST", AlgodHTTPError("bad gateway", 502), None),
+    ("POST", AlgodHTTPError("internal", 500), None),
+    ("POST", AlgodHTTPError("timeout", 504), None),
+    ("POST", AlgodHTTPError("transaction rejected by logic", 400), None),
+    ("GET", AlgodHTTPError("not found", 404), None),
+    ("POST", urllib.error.URLError(ConnectionRefusedError()), TRANSIENT),
+    ("POST", ConnectionRefusedError(), TRANSIENT),
+    ("GET", socket.timeout(), TRANSIENT),
+    ("POST", socket.timeout(), None),
+    ("GET", urllib.error.URLError("reset"), TRANSIENT),
+    ("POST", urllib.error.URLError("reset"), None),
+    ("GET", http.client.RemoteDisconnected(), TRANSIENT),
+    ("POST", ConnectionResetError(), None),
+    ("GET", ValueError("bad"), None),
+])
+def test_classify_error(method, err, kind):
+    assert classify_error(method, err) == kind
+
+
+@pytest.fixture
+def slept(monkeypatch):
+    slept = []
+    monkeypatch.setattr(nam.backoff, "sleep", slept.append)
+    return slept
+
+
+def test_token_bucket_paces_past_the_burst(slept):
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.acquire() == (0.0, 0.0)
+    assert bucket.acquire() == (0.0, 0.0)
+    paused, limited = bucket.acquire()
+    assert paused == 0.0 and 0.09 < limited <= 0.1
+    assert slept == [limited]
+
+
+def test_token_bucket_pause_is_shared(slept):
+    bucket = TokenBucket()
+    bucket.pause(0.5)
+    bucket.pause(0.1)
+    paused, limited = bucket.acquire()
+    assert 0.49 < paused <= 0.5 and limited == 0.0
+    # sleep is not real here: the next request still waits for the pause
+    assert bucket.acquire()[0] > 0.49
+
+
+def test_delay_is_jittered_within_the_exponential_bound():
+    client = ThrottledAlgodClient(algod.AlgodClient("a" * 64, "http://127.0.0.1:1"), base_delay=0.1, max_delay=1.0)
+    for attempt, bound in ((0, 0.1), (2, 0.4), (3, 0.8), (4, 1.0), (10, 1.0)):
+        delays = [client._delay(attempt) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+        assert max(delays) > bound / 2
+
+
+class FailingClient(algod.AlgodClient):
+    def __init__(self, errors):
+        super().__init__("a" * 64, "http://127.0.0.1:1")
+        self.errors = list(errors)
+        self.calls = 0
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"last-round": 1}
+
+
+def test_retries_transient_and_throttled_errors(slept):
+    inner = FailingClient([AlgodHTTPError("slow down", 429), AlgodHTTPError("unavailable", 503)])
+    client = ThrottledAlgodClient(inner, max_retries=3)
+    assert client.status() == {"last-round": 1}
+    stats = client.stats.snapshot()
+    assert inner.calls == 3
+    assert (stats["throttled"], stats["transient"], stats["retries"], stats["rejected"]) == (1, 1, 2, 0)
+
+
+def test_raises_errors_not_worth_retrying(slept):
+    inner = FailingClient([AlgodHTTPError("transaction rejected by logic", 400)])
+    client = ThrottledAlgodClient(inner)
+    with pytest.raises(AlgodHTTPError):
+        client.algod_request("POST", "/transactions", data=b"")
+    assert inner.calls == 1 and client.stats.rejected == 1 and not slept
+
+
+def test_gives_up_after_max_retries(slept):
+    inner = FailingClient([AlgodHTTPError("unavailable", 503)] * 5)
+    client = ThrottledAlgodClient(inner, max_retries=2)
+    with pytest.raises(AlgodHTTPError):
+        client.status()
+    assert inner.calls == 3 and client.stats.gave_up == 1 and len(slept) == 2
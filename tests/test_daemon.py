@@ -0,0 +1,111 @@
+import asyncio
+import json
+import socket
+
+import pytest
+from algosdk import account, mnemonic
+
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam.daemon import AuctionDaemon, serve
+from fake_algod import FakeAlgod, auction_state
+
+APP_ID = 7
+
+
+# Runs the daemon of a FakeAlgod holding a sealed auction on a socket in tmp_path while `session(connect)` runs;
+# connect() opens a connection whose request(**params) sends one command and returns its decoded answer
+def with_daemon(tmp_path, session, round=950):
+    client = FakeAlgod(AuctionInterfaceSealed, APP_ID, auction_state(AuctionInterfaceSealed, min_bid_increment=10_000,
+                                                                     num_bids=0), round=round)
+    daemon = AuctionDaemon(client)
+    path = str(tmp_path / "nam.sock")
+
+    async def connect():
+        reader, writer = await asyncio.open_unix_connection(path)
+
+        async def request(**params):
+            writer.write(json.dumps(params).encode("utf-8") + b"\n")
+            await writer.drain()
+            return json.loads(await reader.readline())
+        return request
+
+    async def run():
+        server = asyncio.create_task(serve(daemon, path))
+        while not server.done():
+            try:
+                (await asyncio.open_unix_connection(path))[1].close()
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(0.001)
+        try:
+            return await session(connect)
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+    return client, path, asyncio.run(run())
+
+
+def test_commands_over_the_socket(tmp_path):
+    sk, address = account.generate_account()
+
+    async def session(connect):
+        request = await connect()
+        answers = [await request(command="ping"),
+                   await request(command="add_account", mnemonic=mnemonic.from_private_key(sk)),
+                   await request(command="commit", contract="sealed", app_id=APP_ID, bidder=address, value=200_000,
+                                 nonce=5, deposit=10_000)]
+        # answered in order on one connection; a second connection is served alongside
+        other = await connect()
+        answers.append(await other(command="state", contract="sealed", app_id=APP_ID))
+        return answers
+
+    client, path, (ping, added, committed, state) = with_daemon(tmp_path, session)
+    assert ping == {"ok": True, "result": {"round": 950, "accounts": 0, "apps": 0}}
+    assert added["result"] == {"address": address}
+    assert committed["ok"] and committed["result"]["confirmed_round"] == 951
+    assert client.local_states[address].commitment is not None
+    assert state["result"]["lead_bid_amount"] == 100_000
+    assert not (tmp_path / "nam.sock").exists()
+
+
+def test_errors_are_answered(tmp_path):
+    async def session(connect):
+        request = await connect()
+        return [await request(command="launch"),
+                await request(command="bid", contract="sealed", app_id=APP_ID, bidder="NOBODY", amount=1),
+                await request(command="claim_seller", contract="sealed"),
+                await request(command="bid", app_id=99, bidder="creator", amount=1),
+                await request(command="ping")]
+
+    _, _, (unknown, no_key, missing, no_contract, ping) = with_daemon(tmp_path, session)
+    assert unknown["ok"] is False and unknown["type"] == "CommandError" and "unknown command launch" in unknown["error"]
+    assert "no key registered for account NOBODY" in no_key["error"]
+    assert "missing parameter" in missing["error"]
+    assert "unknown app 99" in no_contract["error"]
+    # the connection survives the errors
+    assert ping["ok"]
+
+
+def test_refuses_the_socket_of_a_live_daemon(tmp_path):
+    async def session(connect):
+        with pytest.raises(RuntimeError, match="already listening"):
+            await serve(None, str(tmp_path / "nam.sock"))
+        request = await connect()
+        return await request(command="ping")
+
+    _, _, ping = with_daemon(tmp_path, session)
+    assert ping["ok"]
+
+
+def test_replaces_a_stale_socket(tmp_path):
+    # bound by a daemon that did not shut down cleanly: nothing listens on it
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(tmp_path / "nam.sock"))
+    stale.close()
+
+    async def session(connect):
+        request = await connect()
+        return await request(command="ping")
+
+    _, _, ping = with_daemon(tmp_path, session)
+    assert ping["ok"]
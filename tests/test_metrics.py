@@ -0,0 +1,57 @@
+import urllib.request
+
+import pytest
+from algosdk.v2client import algod
+
+from Benchmarks.algod_standin import AlgodStandin, sealed_auction_state
+from nam.metrics import InstrumentedAlgodClient
+from nam.multinode import MultiNodeAlgodClient
+from nam.transport import PooledAlgodClient
+
+TOKEN = "a" * 64
+
+
+@pytest.fixture
+def standin():
+    with AlgodStandin() as standin:
+        standin.apps[1] = sealed_auction_state(1)
+        yield standin
+
+
+def body_size(standin, path: str) -> int:
+    with urllib.request.urlopen(standin.address + path) as resp:
+        return len(resp.read())
+
+
+def endpoint_stats(client, name: str) -> dict:
+    return client.metrics.snapshot(by_operation=False)[name]
+
+
+@pytest.mark.parametrize("transport", ["pooled", "multinode"])
+def test_response_size_is_the_body_read(standin, transport):
+    pooled = PooledAlgodClient(TOKEN, standin.address)
+    inner = pooled if transport == "pooled" else MultiNodeAlgodClient([pooled], health_interval=3600)
+    with InstrumentedAlgodClient(inner) as client:
+        client.application_info(1)
+        client.application_info(1)
+    stats = endpoint_stats(client, "GET /applications/{id}")
+    size = body_size(standin, "/v2/applications/1")
+    assert stats["calls"] == 2 and stats["response_bytes"] == 2 * size and stats["max_response_bytes"] == size
+
+
+def test_errors_have_no_response_size(standin):
+    with InstrumentedAlgodClient(PooledAlgodClient(TOKEN, standin.address)) as client:
+        with pytest.raises(Exception):
+            client.application_info(2)
+        client.status()
+    assert endpoint_stats(client, "GET /applications/{id}")["errors"] == {"AlgodHTTPError(404)": 1}
+    assert endpoint_stats(client, "GET /applications/{id}")["response_bytes"] == 0
+    assert endpoint_stats(client, "GET /status")["response_bytes"] == body_size(standin, "/v2/status")
+
+
+def test_sizes_the_transport_does_not_report_are_left_out(standin):
+    client = InstrumentedAlgodClient(algod.AlgodClient(TOKEN, standin.address))
+    client.application_info(1)
+    stats = endpoint_stats(client, "GET /applications/{id}")
+    assert stats["calls"] == 1 and stats["response_bytes"] == 0
+    assert sum(stats["size_histogram"].values()) == 0
@@ -0,0 +1,198 @@
+import asyncio
+
+import pytest
+from algosdk import account, encoding, error
+
+from AuctionContract import AuctionInterface
+from SealedAuctionContract import AuctionInterfaceSealed
+from SealedOvercollateralizedAuctionContract import AuctionInterfaceSealedOvercollateralized
+from nam.aio import AuctionOperations
+from nam.mirror import AuctionMirror
+from fake_algod import FakeAlgod, SyncAlgod, auction_state
+
+APP_ID = 7
+
+
+def open_auction_state():
+    state = AuctionInterface.AuctionState.decode([])
+    state.seller = bytes(32)
+    state.nft_id = 8
+    state.start_round = 900
+    state.end_round = 1100
+    state.reserve_amount = 100_000
+    state.min_bid_increment = 10_000
+    state.num_bids = 0
+    state.lead_bid_amount = 100_000
+    state.lead_bid_account = bytes(32)
+    return state
+
+
+def fake_algod(contract):
+    if contract is AuctionInterface:
+        return FakeAlgod(contract, APP_ID, open_auction_state())
+    if contract is AuctionInterfaceSealed:
+        return FakeAlgod(contract, APP_ID, auction_state(contract, min_bid_increment=10_000, num_bids=0))
+    return FakeAlgod(contract, APP_ID, auction_state(contract))
+
+
+# Bids (amount, nonce, deposit) of new bidders through ops, committing them first on the sealed contracts
+async def bid_all(ops, bids):
+    for amount, nonce, deposit in bids:
+        sk, _ = account.generate_account()
+        if "on_commit" in ops.mirror.rules:
+            await ops.commitAuctionApp(APP_ID, sk, amount, nonce, deposit)
+        await ops.placeBid(APP_ID, sk, amount, nonce)
+
+
+BIDS = {
+    AuctionInterface: [(200_000, None, None), (250_000, None, None)],
+    AuctionInterfaceSealed: [(200_000, 1, 10_000), (300_000, 2, 10_000)],
+    # the last bid only becomes the second highest
+    AuctionInterfaceSealedOvercollateralized: [(200_000, 1, 300_000), (300_000, 2, 300_000),
+                                               (250_000, 3, 400_000)],
+}
+
+
+@pytest.mark.parametrize("with_deltas", [True, False])
+@pytest.mark.parametrize("contract", list(BIDS), ids=lambda contract: contract.auction_contract["name"])
+def test_rules_agree_with_eval_deltas(contract, with_deltas):
+    client = fake_algod(contract)
+    client.deltas = with_deltas
+    mirror = AuctionMirror(contract)
+    ops = AuctionOperations(client, contract, mirror)
+
+    async def run():
+        await bid_all(ops, BIDS[contract])
+        seller_sk, _ = account.generate_account()
+        await ops.claimSeller(APP_ID, seller_sk)
+    asyncio.run(run())
+
+    assert not client.refused
+    assert mirror.stats.loads == 1 and mirror.stats.mismatches == 0 and mirror.stats.invalidations == 0
+    if with_deltas:
+        assert mirror.stats.deltas > 0 and mirror.stats.rule_updates == 0
+    else:
+        assert mirror.stats.rule_updates > 0 and mirror.stats.deltas == 0
+    auction = mirror.get(APP_ID)
+    assert auction.state == client.state
+    assert auction.state.seller_has_been_paid == contract.HAS_BEEN_PAID
+    for address, local in client.local_states.items():
+        assert auction.local_states[address] == local
+
+
+def test_mismatch_invalidates():
+    contract = AuctionInterfaceSealedOvercollateralized
+    client = fake_algod(contract)
+    mirror = AuctionMirror(contract)
+    ops = AuctionOperations(client, contract, mirror)
+    other = AuctionOperations(client, contract, AuctionMirror(contract))
+
+    async def run():
+        await mirror.read_async(client, APP_ID)
+        # another client takes the lead with 300k: the mirror still has the 100k starting lead
+        await bid_all(other, [(300_000, 1, 300_000)])
+        # so it expects 200k to take the lead, where the node only makes it the second highest
+        await bid_all(ops, [(200_000, 2, 300_000)])
+    asyncio.run(run())
+
+    assert not client.refused
+    assert mirror.stats.mismatches == 1 and mirror.stats.invalidations == 1
+    assert mirror.get(APP_ID) is None
+    assert mirror.read(SyncAlgod(client), APP_ID).state == client.state
+    assert client.state.second_highest_bid_amount == 200_000
+
+
+def test_refused_call_is_rebuilt_from_a_fresh_read():
+    contract = AuctionInterface
+    client = fake_algod(contract)
+    mirror = AuctionMirror(contract)
+    ops = AuctionOperations(client, contract, mirror)
+    other = AuctionOperations(client, contract, AuctionMirror(contract))
+    sk, address = account.generate_account()
+
+    async def run():
+        await ops.placeBid(APP_ID, sk, 200_000)
+        await bid_all(other, [(250_000, None, None)])
+        # built against the mirrored lead, which the node no longer has: refused, then sent again referencing it
+        await ops.placeBid(APP_ID, sk, 300_000)
+    asyncio.run(run())
+
+    assert len(client.refused) == 1 and len(client.accepted) == 3
+    assert mirror.stats.invalidations == 1 and mirror.stats.loads == 2
+    assert client.state.lead_bid_account == encoding.decode_address(address)
+    assert mirror.get(APP_ID).state == client.state
+
+
+def test_write_retries_once_after_a_stale_state_refusal():
+    contract = AuctionInterfaceSealed
+    fake = fake_algod(contract)
+    client = SyncAlgod(fake)
+    mirror = AuctionMirror(contract)
+    seen = []
+
+    def refused(global_state):
+        seen.append(global_state)
+        raise error.AlgodHTTPError("transaction rejected by logic", 400)
+
+    # not mirrored before, so the state it was built against was just read
+    with pytest.raises(error.AlgodHTTPError):
+        mirror.write(client, APP_ID, refused)
+    assert len(seen) == 1 and mirror.stats.loads == 1
+
+    # another client bid since
+    fake.state.lead_bid_amount = 200_000
+    seen.clear()
+    with pytest.raises(error.AlgodHTTPError):
+        mirror.write(client, APP_ID, refused)
+    assert [state.lead_bid_amount for state in seen] == [100_000, 200_000]
+    assert mirror.stats.invalidations == 1 and mirror.stats.loads == 2
+
+    def accepted(global_state):
+        return global_state.lead_bid_amount
+    assert mirror.write(client, APP_ID, accepted) == 200_000
+    assert mirror.stats.loads == 2
+
+
+@pytest.mark.parametrize("err", [
+    # the mirrored state was up to date: the refusal is the call's own
+    error.AlgodHTTPError("logic eval error: assert failed pc=512", 400),
+    # the call may have been taken
+    error.AlgodHTTPError("internal error", 500),
+    error.AlgodHTTPError("slow down", 429),
+    error.AlgodHTTPError("transaction already in ledger", 400),
+])
+def test_write_does_not_resend(err):
+    client = SyncAlgod(fake_algod(AuctionInterfaceSealed))
+    mirror = AuctionMirror(AuctionInterfaceSealed)
+    mirror.read(client, APP_ID)
+    sent = []
+
+    def write(global_state):
+        sent.append(global_state)
+        raise err
+    with pytest.raises(error.AlgodHTTPError):
+        mirror.write(client, APP_ID, write)
+    assert len(sent) == 1
+
+
+def test_deterministic_rejection_is_submitted_once():
+    contract = AuctionInterfaceSealed
+    client = fake_algod(contract)
+    mirror = AuctionMirror(contract)
+    ops = AuctionOperations(client, contract, mirror)
+    sk, _ = account.generate_account()
+    submitted = []
+
+    # e.g. claiming the NFT before opting in to it
+    async def send_transactions(signed):
+        submitted.append(signed)
+        raise error.AlgodHTTPError("transaction rejected by logic", 400)
+    client.send_transactions = send_transactions
+
+    async def run():
+        await mirror.read_async(client, APP_ID)
+        with pytest.raises(error.AlgodHTTPError):
+            await ops.claimWinner(APP_ID, sk)
+    asyncio.run(run())
+    assert len(submitted) == 1
+    assert mirror.stats.loads == 2
@@ -0,0 +1,125 @@
+import urllib.error
+from time import sleep
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.v2client import algod
+
+from nam.multinode import MultiNodeAlgodClient
+
+
+# algod node stand-in at round `round`, answering after `delay` seconds, or failing every request with `error`
+class FakeNode(algod.AlgodClient):
+    def __init__(self, name: str, round: int = 100, delay: float = 0.0, error: Exception = None):
+        super().__init__("a" * 64, "http://" + name)
+        self.round = round
+        self.delay = delay
+        self.error = error
+        self.requests = []
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        self.requests.append((method, requrl))
+        if self.delay:
+            sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if requrl == "/transactions":
+            return {"txId": "TX"}
+        return {"last-round": self.round}
+
+    def served(self, requrl: str) -> int:
+        return sum(1 for _, url in self.requests if url == requrl)
+
+
+@pytest.fixture
+def pool():
+    pools = []
+
+    def make(*nodes, **kwargs):
+        client = MultiNodeAlgodClient(nodes, health_interval=3600, **kwargs)
+        pools.append(client)
+        return client
+    yield make
+    for client in pools:
+        client.close()
+
+
+def test_reads_avoid_down_and_lagging_nodes(pool):
+    down = FakeNode("down", error=urllib.error.URLError(ConnectionRefusedError()))
+    lagging = FakeNode("lagging", round=90)
+    synced = FakeNode("synced")
+    client = pool(down, lagging, synced, max_lag=2)
+    assert [n["healthy"] for n in client.node_stats()] == [False, True, True]
+    for _ in range(20):
+        client.application_info(1)
+    assert synced.served("/applications/1") == 20
+    assert down.served("/applications/1") == lagging.served("/applications/1") == 0
+
+
+def test_reads_avoid_the_slow_node(pool):
+    slow = FakeNode("slow", delay=0.05)
+    fast = [FakeNode("fast1"), FakeNode("fast2")]
+    client = pool(slow, *fast)
+    for _ in range(30):
+        client.application_info(1)
+    # the less loaded of two random candidates is never the slowest of three
+    assert slow.served("/applications/1") == 0
+    assert sum(node.served("/applications/1") for node in fast) == 30
+
+
+def test_sticky_requests_go_to_the_best_synced_node(pool):
+    behind = FakeNode("behind", round=99)
+    ahead = FakeNode("ahead", round=101, delay=0.01)
+    client = pool(behind, ahead)
+    client.send_raw_transaction("AAAA")
+    client.pending_transaction_info("TX")
+    client.status_after_block(101)
+    assert [url for _, url in ahead.requests[1:]] == ["/transactions", "/transactions/pending/TX",
+                                                      "/status/wait-for-block-after/101"]
+    assert len(behind.requests) == 1
+
+
+def test_submit_fails_over_when_the_node_did_not_take_it(pool):
+    first = FakeNode("first", round=101)
+    second = FakeNode("second", round=100)
+    client = pool(first, second)
+    first.error = AlgodHTTPError("unavailable", 503)
+    assert client.send_raw_transaction("AAAA") == "TX"
+    assert first.served("/transactions") == 1 and second.served("/transactions") == 1
+    stats = client.node_stats()
+    assert (stats[0]["healthy"], stats[0]["failures"]) == (False, 1)
+    # the next lookups stay on the node that took it
+    client.pending_transaction_info("TX")
+    assert second.served("/transactions/pending/TX") == 1 and first.served("/transactions/pending/TX") == 0
+
+    # back after its next successful check
+    first.error = None
+    client.check_health()
+    client.pending_transaction_info("TX")
+    assert first.served("/transactions/pending/TX") == 1
+
+
+def test_submit_is_not_sent_twice(pool):
+    first = FakeNode("first", round=101)
+    second = FakeNode("second", round=100)
+    client = pool(first, second)
+    # the node may have taken it
+    first.error = AlgodHTTPError("internal error", 500)
+    with pytest.raises(AlgodHTTPError):
+        client.send_raw_transaction("AAAA")
+    assert second.served("/transactions") == 0
+    # and a transaction the node refuses is nobody else's business either
+    first.error = AlgodHTTPError("transaction rejected by logic", 400)
+    with pytest.raises(AlgodHTTPError):
+        client.send_raw_transaction("AAAA")
+    assert second.served("/transactions") == 0 and client.node_stats()[0]["healthy"]
+
+
+def test_raises_when_every_node_failed(pool):
+    nodes = [FakeNode("a"), FakeNode("b")]
+    client = pool(*nodes)
+    for node in nodes:
+        node.error = AlgodHTTPError("unavailable", 503)
+    with pytest.raises(AlgodHTTPError):
+        client.application_info(1)
+    assert all(node.served("/applications/1") == 1 for node in nodes)
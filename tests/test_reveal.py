@@ -0,0 +1,88 @@
+import asyncio
+
+from algosdk import account, encoding
+
+from SealedAuctionContract import AuctionInterfaceSealed
+from SealedOvercollateralizedAuctionContract import AuctionInterfaceSealedOvercollateralized
+from nam.reveal import LANDED, SKIPPED, commitment, reveal_bids
+from fake_algod import FakeAlgod, auction_state
+
+APP_ID = 7
+
+
+# FakeAlgod with a committed bid for each (amount, nonce, deposit); returns it and the bidders' keys
+def committed(contract, bids, **values):
+    client = FakeAlgod(contract, APP_ID, auction_state(contract, **values))
+    keys = []
+    for amount, nonce, deposit in bids:
+        sk, address = account.generate_account()
+        local = contract.BidderState.decode([])
+        local.commitment = commitment(amount, nonce)
+        if "deposit" in local.__slots__:
+            local.deposit = deposit
+        client.local_states[address] = local
+        keys.append(sk)
+    return client, keys
+
+
+def test_overcollateralized_underfunded_reveal_does_not_take_the_lead():
+    contract = AuctionInterfaceSealedOvercollateralized
+    # the 150k bid covered by a 120k deposit sorts between bids that take the lead
+    bids = [(200_000, 1, 300_000), (150_000, 2, 120_000), (120_000, 3, 200_000), (250_000, 4, 300_000)]
+    client, keys = committed(contract, bids)
+    reveals = asyncio.run(reveal_bids(client, contract, APP_ID, [(sk, amount, nonce) for sk, (amount, nonce, _)
+                                                                 in zip(keys, bids)]))
+    assert [reveal.status for reveal in reveals] == [LANDED] * 4
+    assert [reveal.deposit for reveal in reveals] == [300_000, 120_000, 200_000, 300_000]
+    # sent as one group, accepted as such
+    assert len(client.accepted) == 1 and not client.refused
+    assert client.state.lead_bid_amount == 250_000
+    assert client.state.lead_bid_account == encoding.decode_address(reveals[3].bidder)
+    assert client.state.second_highest_bid_amount == 200_000
+    assert all(local.deposit is None for local in client.local_states.values())
+
+
+def test_overcollateralized_revealed_bid_has_no_deposit_left():
+    contract = AuctionInterfaceSealedOvercollateralized
+    bids = [(150_000, 1, 200_000), (160_000, 2, None)]
+    client, keys = committed(contract, bids)
+    reveals = asyncio.run(reveal_bids(client, contract, APP_ID, [(sk, amount, nonce) for sk, (amount, nonce, _)
+                                                                 in zip(keys, bids)]))
+    assert [reveal.status for reveal in reveals] == [LANDED, LANDED]
+    assert client.state.lead_bid_amount == 150_000
+
+
+def test_sealed_reveals_in_lead_order():
+    contract = AuctionInterfaceSealed
+    bids = [(500_000, 1, None), (200_000, 2, None), (205_000, 3, None), (300_000, 4, None)]
+    client, keys = committed(contract, bids, min_bid_increment=10_000, num_bids=0)
+    triples = [(sk, amount, nonce) for sk, (amount, nonce, _) in zip(keys, bids)]
+    # a wrong nonce is left out before sending
+    triples.append((keys[0], 500_000, 99))
+    reveals = asyncio.run(reveal_bids(client, contract, APP_ID, triples))
+    assert [reveal.status for reveal in reveals] == [LANDED, LANDED, SKIPPED, LANDED, SKIPPED]
+    assert "minimum increment" in reveals[2].reason
+    assert "do not match" in reveals[4].reason
+    assert not client.refused
+    assert client.state.lead_bid_amount == 500_000 and client.state.num_bids == 3
+    assert client.state.second_highest_bid_amount == 300_000
+
+
+def test_reveal_window_closed():
+    contract = AuctionInterfaceSealed
+    client, keys = committed(contract, [(200_000, 1, None)], min_bid_increment=10_000, num_bids=0)
+    client.last_round = 1100
+    reveals = asyncio.run(reveal_bids(client, contract, APP_ID, [(keys[0], 200_000, 1)]))
+    assert reveals[0].status == SKIPPED and not client.accepted
+
+
+def test_reveal_window_closed_behind_a_stale_round():
+    contract = AuctionInterfaceSealed
+    client, keys = committed(contract, [(200_000, 1, None)], min_bid_increment=10_000, num_bids=0)
+
+    # the chain moved past end_round since the client last followed it
+    async def status():
+        return {"last-round": 1100}
+    client.status = status
+    reveals = asyncio.run(reveal_bids(client, contract, APP_ID, [(keys[0], 200_000, 1)]))
+    assert reveals[0].status == SKIPPED and not client.accepted
@@ -0,0 +1,102 @@
+import asyncio
+
+from Benchmarks.algod_standin import sealed_auction_state
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam.aio import AsyncAlgodClient
+from nam.scheduler import COMMIT_END, END, START, AuctionScheduler
+
+
+def sealed_state(app_id, start, commit, end):
+    return AuctionInterfaceSealed.AuctionState.decode(sealed_auction_state(app_id, start, commit, end))
+
+
+# Runs the phases due at `round` and waits for their batches; returns {phase: number of auctions}
+def tick(scheduler, round):
+    async def run():
+        due = scheduler.tick(round)
+        await scheduler.drain()
+        return due
+    return asyncio.run(run())
+
+
+def scheduler_with(handlers, **kwargs):
+    return AuctionScheduler(AsyncAlgodClient("a" * 64, "http://127.0.0.1:1"), handlers, **kwargs)
+
+
+def recorder(calls, phase, errors=None):
+    async def handler(auctions):
+        calls.append((phase, sorted(auction.app_id for auction in auctions)))
+        return errors
+    return handler
+
+
+def test_phases_in_deadline_order():
+    calls = []
+    scheduler = scheduler_with({phase: recorder(calls, phase) for phase in (START, COMMIT_END, END)})
+    scheduler.add_state(1, AuctionInterfaceSealed, sealed_state(1, 100, 110, 120))
+    scheduler.add_state(2, AuctionInterfaceSealed, sealed_state(2, 105, 110, 130))
+    assert scheduler.next_deadline() == 100
+
+    assert tick(scheduler, 99) == {}
+    assert tick(scheduler, 100) == {START: 1}
+    assert scheduler.next_deadline() == 105
+    assert tick(scheduler, 105) == {START: 1}
+    assert tick(scheduler, 110) == {COMMIT_END: 2}
+    assert tick(scheduler, 120) == {END: 1}
+    assert scheduler.next_deadline() == 130
+    assert tick(scheduler, 130) == {END: 1}
+    assert len(scheduler) == 0 and scheduler.stats.finished == 2
+    assert calls[0] == (START, [1])
+
+
+def test_removed_auctions_are_skipped():
+    calls = []
+    scheduler = scheduler_with({START: recorder(calls, START)})
+    for app_id in (1, 2, 3):
+        scheduler.add_state(app_id, AuctionInterfaceSealed, sealed_state(app_id, 100 + app_id, 200, 300))
+    scheduler.remove(1)
+    # the entry of app 1 is left in the heap, and dropped once it reaches the top
+    assert len(scheduler._heap) == 3
+    assert scheduler.next_deadline() == 102
+    assert len(scheduler._heap) == 2
+
+    # adding an app again replaces its entry
+    scheduler.add_state(3, AuctionInterfaceSealed, sealed_state(3, 150, 200, 300))
+    assert tick(scheduler, 149) == {START: 1}
+    assert calls == [(START, [2])]
+    assert tick(scheduler, 150) == {START: 1}
+    assert calls[-1] == (START, [3])
+
+
+def test_late_auction_skips_to_latest_phase():
+    calls = []
+    scheduler = scheduler_with({phase: recorder(calls, phase) for phase in (START, COMMIT_END, END)})
+    scheduler.add_state(1, AuctionInterfaceSealed, sealed_state(1, 100, 110, 120))
+    assert tick(scheduler, 125) == {END: 1}
+    assert calls == [(END, [1])]
+    assert scheduler.stats.skipped_phases == 2
+    assert scheduler.stats.max_lag_rounds == 5
+
+
+def test_failed_auctions_are_retried_then_dropped():
+    calls = []
+    failure = RuntimeError("refused")
+    scheduler = scheduler_with({START: recorder(calls, START, {1: failure})}, max_attempts=2)
+    scheduler.add_state(1, AuctionInterfaceSealed, sealed_state(1, 100, 110, 120))
+    scheduler.add_state(2, AuctionInterfaceSealed, sealed_state(2, 100, 110, 120))
+    assert tick(scheduler, 100) == {START: 2}
+    # retried the next round, without catching up on its later phases
+    assert scheduler.next_deadline() == 101
+    assert tick(scheduler, 101) == {START: 1}
+    assert scheduler.failed == {1: (START, failure)}
+    assert 1 not in scheduler.auctions and 2 in scheduler.auctions
+
+
+def test_batches():
+    calls = []
+    scheduler = scheduler_with({START: recorder(calls, START)}, batch_size=2)
+    for app_id in range(1, 6):
+        scheduler.add_state(app_id, AuctionInterfaceSealed, sealed_state(app_id, 100, 110, 120))
+    assert tick(scheduler, 100) == {START: 5}
+    assert sorted(len(app_ids) for _, app_ids in calls) == [1, 2, 2]
+    assert scheduler.stats.batches == 3
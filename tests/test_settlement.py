@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from algosdk import account, encoding, error
+
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam.settlement import SettlementWorker
+from fake_algod import FakeAlgod, auction_state
+
+APP_ID = 7
+
+
+# A FakeAlgod holding a sealed auction ending at round 1100, created by `creator` between a seller and a winner,
+# and a worker holding their keys
+def setup(round=1000, **kwargs):
+    (creator_sk, creator), (seller_sk, seller), (winner_sk, winner) = (account.generate_account() for _ in range(3))
+    state = auction_state(AuctionInterfaceSealed, seller=encoding.decode_address(seller),
+                          lead_bid_account=encoding.decode_address(winner), lead_bid_amount=200_000)
+    client = FakeAlgod(AuctionInterfaceSealed, APP_ID, state, round=round, creator=creator)
+    worker = SettlementWorker(client, {seller: seller_sk, winner: winner_sk}, creator_sk,
+                              contracts=[AuctionInterfaceSealed], **kwargs)
+    return client, worker, creator, winner
+
+
+# Ticks the worker's scheduler round by round up to `last`, recording the rounds settle() ran at
+def follow(client, worker, last):
+    rounds = []
+    settle = worker.settle
+
+    async def recorded(auction):
+        rounds.append(client.last_round)
+        return await settle(auction)
+    worker.settle = recorded
+
+    async def run():
+        for round in range(client.last_round, last + 1):
+            client.last_round = max(client.last_round, round)
+            worker.scheduler.tick(round)
+            await worker.scheduler.drain()
+    asyncio.run(run())
+    return rounds
+
+
+def test_discovers_the_auctions_of_the_creators():
+    client, worker, creator, winner = setup()
+
+    async def run():
+        return [await worker.discover([creator, winner]), await worker.discover([creator])]
+    # only the creator's app, and only once
+    assert asyncio.run(run()) == [1, 0]
+    assert worker.stats.discovered == 1
+    auction = worker.scheduler.auctions[APP_ID]
+    assert auction.contract is AuctionInterfaceSealed and auction.state == client.state
+    assert auction.data == (1000, creator)
+
+
+def test_settles_in_one_group():
+    # discovered once ended: the state read then is final
+    client, worker, creator, _ = setup(round=1100)
+    asyncio.run(worker.discover([creator]))
+    reads = client.reads
+    assert follow(client, worker, 1100) == [1100]
+    assert client.reads == reads
+    assert client.deleted and len(client.accepted) == 1
+    stats = worker.stats
+    assert (stats.groups, stats.seller_claims, stats.winner_claims, stats.deletions) == (1, 1, 1, 1)
+    assert stats.settled_by_round == {1101: 1} and stats.max_lag_rounds == 1
+    assert not worker.scheduler.auctions and not worker.stuck and not worker.failed
+
+
+def test_pays_the_seller_alone_until_the_winner_opts_in():
+    client, worker, creator, winner = setup()
+    client.opt_in_rounds[winner] = 1105
+    asyncio.run(worker.discover([creator]))
+    # retried 1, 2 then 4 rounds after the round the last attempt ended in
+    assert follow(client, worker, 1120) == [1100, 1102, 1104, 1108]
+    assert client.deleted
+    stats = worker.stats
+    assert (stats.opt_in_failures, stats.other_failures) == (3, 0)
+    # the seller is paid on the first attempt, the winner with the deletion
+    assert [len(txns) for txns in client.accepted] == [1, 2]
+    assert (stats.seller_claims, stats.winner_claims, stats.groups) == (1, 1, 1)
+    assert stats.settled_by_round == {1109: 1}
+
+
+def test_gives_up_after_the_retries():
+    client, worker, creator, winner = setup(retry_rounds=(1, 1))
+    client.opt_in_rounds[winner] = 2000
+    asyncio.run(worker.discover([creator]))
+    assert follow(client, worker, 1110) == [1100, 1102, 1103]
+    assert worker.failed[APP_ID][0] == "end" and "missing from" in str(worker.failed[APP_ID][1])
+    assert client.state.seller_has_been_paid == AuctionInterfaceSealed.HAS_BEEN_PAID and not client.deleted
+
+
+def test_seller_claim_failure_is_counted():
+    client, worker, creator, _ = setup(round=1100)
+    asyncio.run(worker.discover([creator]))
+    sent = []
+
+    async def send_transactions(signed):
+        sent.append(signed)
+        raise error.AlgodHTTPError("unavailable", 503)
+    client.send_transactions = send_transactions
+
+    async def run():
+        with pytest.raises(error.AlgodHTTPError):
+            await worker.settle(worker.scheduler.auctions[APP_ID])
+    asyncio.run(run())
+    # the group, then the seller's claim alone
+    assert [len(signed) for signed in sent] == [3, 1]
+    assert worker.stats.other_failures == 2 and worker.stats.seller_claims == 0
+
+
+def test_auctions_it_cannot_settle_are_stuck():
+    client, worker, creator, winner = setup(round=1100)
+    del worker.keys[winner]
+    asyncio.run(worker.discover([creator]))
+    follow(client, worker, 1100)
+    assert worker.stuck == {APP_ID: "no key for {}".format(winner)} and not client.accepted
+
+    client, worker, creator, _ = setup(round=1100)
+    client.state.lead_bid_account = bytes(32)
+    asyncio.run(worker.discover([creator]))
+    follow(client, worker, 1100)
+    # the seller is paid, but the app cannot be deleted
+    assert worker.stuck == {APP_ID: "no winner"}
+    assert worker.stats.seller_claims == 1 and not client.deleted
+
+
+def test_run_discovers_and_settles():
+    client, worker, creator, _ = setup(discover_interval=50)
+    asyncio.run(worker.run([creator]))
+    assert worker.stats.discovered == 1 and worker.stats.settled == 1
+    assert client.deleted and worker.stats.first_round == 1000
@@ -0,0 +1,90 @@
+import base64
+import json
+import os
+
+import pytest
+from algosdk.v2client import algod
+
+from nam.artifacts import CONTRACT_INTERFACES, INTERFACES, bundle_path
+from nam.teal_assembler import TealAssemblyError, assemble
+from algod_golden import load_golden, teal_hash
+
+# Programs with the bytecode go-algorand's assembler produces for them: its constant optimization from v4 on
+# (intcblock/bytecblock ordered by number of uses, ties by first use, single-use constants pushed) and branch
+# offsets relative to the end of the branching instruction. With NAM_ALGOD_ADDRESS (and NAM_ALGOD_TOKEN) set to a
+# node with EnableDeveloperAPI, test_matches_algod also compiles them and the three contracts on that node;
+# test_matches_golden checks the contracts against the bytecode algod compiled for them (see algod_golden.py).
+PROGRAMS = {
+    "single use": ("#pragma version 6\nint 1\nreturn", "06810143"),
+    "int ties": ("#pragma version 6\nint 5\nint 7\n+\nint 7\nint 5\n==\nreturn", "062002050722230823221243"),
+    "byte ties and single use": (
+        "#pragma version 6\nbyte \"a\"\nbyte \"b\"\nbyte \"b\"\nconcat\nconcat\nbyte \"a\"\nbyte \"c\"\nconcat\n"
+        "concat\nlen\nreturn",
+        "0626020161016228292950502880016350501543"),
+    "ordered by uses": (
+        "#pragma version 5\nint 9\nint 8\n+\nint 4\n+\nint 4\nint 8\n*\n+\nint 4\n-\nreturn",
+        "052002040881092308220822230b08220943"),
+    "backward and forward branches": (
+        "#pragma version 6\nint 0\nstore 0\nloop:\nload 0\nint 1\n+\ndup\nstore 0\nint 10\n<\nbnz loop\nload 0\n"
+        "int 10\n==\nbz fail\nint 1\nreturn\nfail:\nerr",
+        "062002010a8100350034002208493500230c40fff434002312410002224300"),
+    "v2 first-use block": ("#pragma version 2\nint 1\nint 2\nint 2\n+\n==\nbnz ok\nerr\nok:\nint 1",
+                           "022002010222232308124000010022"),
+    "v3 single use in block": ("#pragma version 3\nint 1\nreturn", "032001012243"),
+}
+
+
+def bundles():
+    for name in INTERFACES:
+        path = bundle_path(name.split(".")[0])
+        with open(path) as f:
+            yield name, json.load(f)
+
+
+@pytest.mark.parametrize("name", sorted(PROGRAMS))
+def test_programs(name):
+    source, expected = PROGRAMS[name]
+    assert assemble(source).hex() == expected
+
+
+# The bytecode of the bundles was produced by nam.teal_assembler itself: this only checks the bundles are up to
+# date with it, test_matches_golden compares it with algod
+@pytest.mark.parametrize("name,bundle", list(bundles()))
+def test_bundles_match_their_teal(name, bundle):
+    assert assemble(bundle["approval_teal"]) == base64.b64decode(bundle["approval_program"])
+    assert assemble(bundle["clear_teal"]) == base64.b64decode(bundle["clear_program"])
+
+
+@pytest.mark.parametrize("name", CONTRACT_INTERFACES)
+def test_matches_golden(name):
+    golden = load_golden(name)
+    if golden is None:
+        pytest.skip("no golden bytecode from algod in tests/golden: generate it with tests/algod_golden.py")
+    with open(bundle_path(name)) as f:
+        bundle = json.load(f)
+    for program in ("approval", "clear"):
+        source = bundle[program + "_teal"]
+        assert teal_hash(source) == golden[program + "_teal_sha256"], \
+            "the {} TEAL changed since the golden bytecode was compiled: regenerate it".format(program)
+        assert assemble(source) == base64.b64decode(golden[program + "_program"])
+        assert bundle[program + "_program"] == golden[program + "_program"]
+
+
+def test_backward_branch_before_v4():
+    with pytest.raises(TealAssemblyError, match="back jump"):
+        assemble("#pragma version 3\nloop:\nint 1\nbnz loop")
+
+
+def test_undefined_label():
+    with pytest.raises(TealAssemblyError, match="undefined label"):
+        assemble("#pragma version 6\nb nowhere")
+
+
+@pytest.mark.skipif("NAM_ALGOD_ADDRESS" not in os.environ, reason="needs a node with EnableDeveloperAPI")
+def test_matches_algod():
+    client = algod.AlgodClient(os.environ.get("NAM_ALGOD_TOKEN", "a" * 64), os.environ["NAM_ALGOD_ADDRESS"])
+    sources = [source for source, _ in PROGRAMS.values()]
+    for _, bundle in bundles():
+        sources += [bundle["approval_teal"], bundle["clear_teal"]]
+    for source in sources:
+        assert assemble(source) == base64.b64decode(client.compile(source)["result"]), source.splitlines()[:3]
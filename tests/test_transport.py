@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep
+
+import pytest
+from algosdk.error import AlgodHTTPError
+
+from Benchmarks.algod_standin import AlgodStandin, sealed_auction_state
+from nam.transport import PooledAlgodClient, PoolTimeoutError
+
+TOKEN = "a" * 64
+
+
+@pytest.fixture
+def standin():
+    started = []
+
+    def start(**kwargs):
+        standin = AlgodStandin(**kwargs).start()
+        standin.apps[1] = sealed_auction_state(1)
+        started.append(standin)
+        return standin
+    yield start
+    for standin in started:
+        standin.stop()
+
+
+def test_reuses_one_connection(standin):
+    node = standin()
+    with PooledAlgodClient(TOKEN, node.address) as client:
+        for _ in range(10):
+            assert client.status()["last-round"] == 1000
+        # an error answer leaves the connection usable
+        with pytest.raises(AlgodHTTPError):
+            client.application_info(2)
+        assert client.application_info(1)["id"] == 1
+    assert client.connections_opened == 1 and node.connections == 1 and node.requests == 12
+
+
+def test_reconnects_after_the_node_closed_an_idle_connection(standin):
+    node = standin(idle_timeout=0.05)
+    with PooledAlgodClient(TOKEN, node.address) as client:
+        client.status()
+        sleep(0.3)
+        # sent on the connection the node closed, then again on a new one
+        assert client.status()["last-round"] == 1000
+    assert client.connections_opened == 2 and node.connections == 2 and node.requests == 2
+
+
+def test_open_connections_are_bounded_by_the_pool_size(standin):
+    node = standin(latency=0.02)
+    with PooledAlgodClient(TOKEN, node.address, pool_size=2) as client:
+        with ThreadPoolExecutor(8) as executor:
+            rounds = list(executor.map(lambda _: client.status()["last-round"], range(16)))
+    assert rounds == [1000] * 16
+    assert client.connections_opened == 2 and node.connections == 2
+
+
+def test_waits_at_most_pool_timeout_for_a_connection(standin):
+    node = standin(latency=0.3)
+    with PooledAlgodClient(TOKEN, node.address, pool_size=1, pool_timeout=0.05) as client:
+        busy = threading.Thread(target=client.status)
+        busy.start()
+        while node.requests == 0:
+            sleep(0.001)
+        with pytest.raises(PoolTimeoutError):
+            client.status()
+        busy.join()
+        # released once the request in flight is done
+        assert client.status()["last-round"] == 1000
+    assert client.connections_opened == 1
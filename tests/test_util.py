@@ -0,0 +1,178 @@
+import os
+import threading
+from time import sleep
+
+import pytest
+from algosdk import error
+from algosdk.future import transaction
+
+import util
+from util import RoundWaiter, SuggestedParamsProvider
+from fake_algod import GENESIS_HASH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Chain stand-in for the status and suggested params endpoints: a round every `block_time` seconds, produced by wait-for-block itself,
+# or never while `stalled` is set
+class FakeChain:
+    def __init__(self, round: int = 1000, block_time: float = 0.005):
+        self.round = round
+        self.block_time = block_time
+        self.stalled = None
+        self.errors = []
+        self.status_calls = 0
+        self.params_calls = 0
+        self.polls = []
+
+    def status(self):
+        self.status_calls += 1
+        return {"last-round": self.round}
+
+    def suggested_params(self):
+        self.params_calls += 1
+        return transaction.SuggestedParams(1000, self.round, self.round + 1000, GENESIS_HASH, "fake", False,
+                                           "future", 1000)
+
+    def status_after_block(self, round: int):
+        self.polls.append(round)
+        if self.errors:
+            raise self.errors.pop(0)
+        if self.stalled is not None:
+            self.stalled.wait()
+        sleep(self.block_time)
+        self.round = max(self.round, round + 1)
+        return {"last-round": self.round}
+
+
+def stopped(waiter: RoundWaiter) -> bool:
+    for _ in range(1000):
+        if waiter._poller is None:
+            return True
+        sleep(0.001)
+    return False
+
+
+def test_waiters_share_one_long_poll():
+    chain = FakeChain()
+    waiter = RoundWaiter(chain)
+    threads = [threading.Thread(target=waiter.wait, args=(round,)) for round in (1001, 1003, 1003, 1002) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert waiter.last_round >= 1003
+    # one poll per round, not one per waiter
+    assert chain.polls[:3] == [1000, 1001, 1002] and len(set(chain.polls)) == len(chain.polls)
+    assert stopped(waiter) and chain.status_calls == 1
+
+
+def test_poller_stops_when_nobody_waits_and_restarts():
+    chain = FakeChain()
+    waiter = RoundWaiter(chain)
+    waiter.wait(1001)
+    assert stopped(waiter)
+    polls = len(chain.polls)
+    sleep(0.05)
+    assert len(chain.polls) == polls
+
+    # the chain moved on meanwhile: the new poller starts from a fresh status
+    chain.round = 1100
+    assert waiter.wait(1050) < 0.1
+    assert chain.status_calls == 2 and chain.polls[polls:] in ([], [1100])
+
+
+def test_wait_times_out():
+    chain = FakeChain()
+    chain.stalled = threading.Event()
+    waiter = RoundWaiter(chain)
+    with pytest.raises(TimeoutError):
+        waiter.wait(1001, timeout=0.05)
+    chain.stalled.set()
+    waiter.wait(1001)
+
+
+def test_poll_errors_reach_the_waiters():
+    chain = FakeChain()
+    chain.errors.append(error.AlgodHTTPError("unavailable", 503))
+    waiter = RoundWaiter(chain)
+    with pytest.raises(error.AlgodHTTPError):
+        waiter.wait(1001)
+    assert stopped(waiter)
+    # the next wait starts over
+    waiter.wait(1001)
+    assert waiter.last_round >= 1001
+
+
+def test_one_waiter_per_client():
+    chain = FakeChain()
+    assert util.get_round_waiter(chain) is util.get_round_waiter(chain)
+    assert util.get_round_waiter(chain) is not util.get_round_waiter(FakeChain())
+
+
+def test_params_are_fetched_once_per_round():
+    chain = FakeChain()
+    provider = SuggestedParamsProvider(chain)
+    sp = provider.get()
+    sp.fee = 5000
+    sp.flat_fee = True
+    # copies of the cached params, untouched by what callers do with theirs
+    assert [provider.get().fee for _ in range(5)] == [1000] * 5
+    assert chain.params_calls == 1 and sp.first == 1000
+
+
+def test_params_are_refreshed_once_the_waiter_saw_a_newer_round():
+    chain = FakeChain()
+    provider = SuggestedParamsProvider(chain)
+    provider.get()
+    waiter = util.get_round_waiter(chain)
+    waiter.wait(1001)
+    assert stopped(waiter)
+    sp = provider.get()
+    assert chain.params_calls == 2 and sp.first == waiter.last_round
+    provider.get()
+    assert chain.params_calls == 2
+
+
+def test_params_older_than_max_age_are_refreshed():
+    chain = FakeChain()
+    provider = SuggestedParamsProvider(chain, max_age=0.05)
+    provider.get()
+    # nobody follows the chain: the new round goes unnoticed until the params age out
+    chain.round = 1001
+    assert provider.get().first == 1000
+    sleep(0.1)
+    assert provider.get().first == 1001 and chain.params_calls == 2
+
+
+def test_invalidated_params_are_fetched_again():
+    chain = FakeChain()
+    provider = SuggestedParamsProvider(chain)
+    provider.get()
+    provider.invalidate()
+    provider.get()
+    assert chain.params_calls == 2
+
+
+def test_validity_and_fee_policies():
+    chain = FakeChain()
+    sp = SuggestedParamsProvider(chain, validity_rounds=10, flat_fee=2000).get()
+    assert (sp.first, sp.last, sp.fee, sp.flat_fee) == (1000, 1010, 2000, True)
+
+
+def test_suggested_params_share_the_client_provider():
+    chain = FakeChain()
+    assert util.get_params_provider(chain) is util.get_params_provider(chain)
+    util.suggested_params(chain)
+    util.suggested_params(chain)
+    assert chain.params_calls == 1
+
+
+# the contract directories run their scripts with their own copy of util.py on the path
+@pytest.mark.parametrize("directory", ["AuctionContract", "SealedAuctionContract",
+                                       "SealedOvercollateralizedAuctionContract"])
+def test_util_copies_are_identical(directory):
+    with open(os.path.join(ROOT, "util.py"), "rb") as f:
+        expected = f.read()
+    with open(os.path.join(ROOT, directory, "util.py"), "rb") as f:
+        assert f.read() == expected
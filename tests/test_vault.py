@@ -0,0 +1,96 @@
+import asyncio
+import importlib
+
+import pytest
+from algosdk import account, error
+
+from SealedAuctionContract import AuctionInterfaceSealed
+from nam.aio import AuctionOperations
+from nam.artifacts import CONTRACT_INTERFACES, interface_module
+from nam.reveal import LANDED
+from nam.vault import EXPIRED, FAILED, PENDING, REVEALED, CommitmentVault, commit_bid, reveal_due
+from fake_algod import FakeAlgod, auction_state
+
+CONTRACT = AuctionInterfaceSealed.auction_contract["name"]
+
+
+@pytest.fixture
+def vault(tmp_path):
+    with CommitmentVault(str(tmp_path / "vault.db")) as vault:
+        yield vault
+
+
+def bid(app_id, bidder, reveal_round, end_round, amount=200_000, nonce=1):
+    return app_id, CONTRACT, bidder, amount, nonce, 100_000, reveal_round, end_round
+
+
+def test_contract_names_resolve_to_interfaces():
+    for name, module in CONTRACT_INTERFACES.items():
+        assert interface_module(name) is importlib.import_module(module)
+        assert interface_module(name).auction_contract["name"] == name
+    with pytest.raises(ValueError):
+        interface_module("AuctionInterfaceSealed")
+
+
+def test_due_at_window_boundaries(vault):
+    vault.record_many([
+        bid(1, "OPENS", 100, 120),
+        bid(1, "NOT_YET", 101, 120),
+        bid(2, "LAST_ROUND", 90, 101),
+        bid(2, "CLOSES", 90, 100),
+        bid(3, "CLOSED", 80, 95),
+    ])
+    assert vault.next_reveal_round() == 80
+    due = vault.due(100)
+    assert sorted(commitment.bidder for commitment in due) == ["LAST_ROUND", "OPENS"]
+    # end_round is the first round the reveal is refused
+    assert vault.get(2, "CLOSES").status == EXPIRED
+    assert vault.get(3, "CLOSED").status == EXPIRED
+    assert "100" in vault.get(2, "CLOSES").reason
+    assert vault.get(1, "NOT_YET").status == PENDING
+    assert sorted(commitment.bidder for commitment in vault.due(101)) == ["NOT_YET", "OPENS"]
+    assert vault.next_reveal_round() == 100
+
+
+def test_record_replaces_the_bidders_commitment(vault):
+    vault.record(*bid(1, "BIDDER", 100, 120, amount=200_000, nonce=1))
+    vault.record(*bid(1, "BIDDER", 100, 120, amount=300_000, nonce=2 ** 64 - 1))
+    assert len(vault) == 1
+    stored = vault.get(1, "BIDDER")
+    assert (stored.amount, stored.nonce, stored.contract) == (300_000, 2 ** 64 - 1, CONTRACT)
+
+
+def test_commit_bid_marks_refused_commitments_failed(vault, monkeypatch):
+    client = FakeAlgod(AuctionInterfaceSealed, 7, auction_state(AuctionInterfaceSealed, min_bid_increment=10_000,
+                                                                num_bids=0))
+    ops = AuctionOperations(client, AuctionInterfaceSealed)
+
+    async def refused(*args):
+        raise error.AlgodHTTPError("overspend", 400)
+    monkeypatch.setattr(ops, "commitAuctionApp", refused)
+    sk, address = account.generate_account()
+    with pytest.raises(error.AlgodHTTPError):
+        asyncio.run(commit_bid(vault, ops, 7, sk, 200_000, 300_000))
+    assert vault.get(7, address).status == FAILED
+
+
+def test_reveal_due_after_reopening(tmp_path):
+    path = str(tmp_path / "vault.db")
+    client = FakeAlgod(AuctionInterfaceSealed, 7, auction_state(AuctionInterfaceSealed, min_bid_increment=10_000,
+                                                                num_bids=0), round=950)
+    keys = dict((address, sk) for sk, address in (account.generate_account() for _ in range(3)))
+
+    async def commit_all():
+        ops = AuctionOperations(client, AuctionInterfaceSealed)
+        with CommitmentVault(path) as vault:
+            for i, sk in enumerate(keys.values()):
+                await commit_bid(vault, ops, 7, sk, 200_000 + 50_000 * i, 300_000)
+    asyncio.run(commit_all())
+
+    client.last_round = 1000
+    with CommitmentVault(path) as vault:
+        results = asyncio.run(reveal_due(client, vault, keys))
+        assert [reveal.status for reveal in results[7]] == [LANDED] * 3
+        assert all(commitment.status == REVEALED for commitment in vault.for_app(7))
+        assert vault.next_reveal_round() is None
+    assert client.state.lead_bid_amount == 300_000
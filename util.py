@@ -1,27 +1,231 @@
 import base64
-
-from algosdk import account, mnemonic, encoding
+import contextvars
+import copy
+import hashlib
+import importlib.metadata
+import json
+import os
+import sys
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from algosdk import account, constants, mnemonic, encoding
 from random import choice, randint
 from algosdk.atomic_transaction_composer import *
 from algosdk.abi import Method, Contract
-from time import sleep
-
-# Function waits until a block with specific round has been accepted
+from algosdk.error import AlgodHTTPError, ConfirmationTimeoutError, TransactionRejectedError
+from time import time
+
+
+# Shares a single wait-for-block long-poll between any number of threads waiting for rounds.
+# A poller thread is started on demand, follows the chain with status_after_block() for as long as
+# someone is waiting and wakes every waiter within milliseconds of its target round being accepted.
+class RoundWaiter:
+    def __init__(self, client: algod.AlgodClient):
+        self.client = client
+        self.last_round = None
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._poller = None
+        self._error = None
+
+    # Blocks until the given round has been accepted and returns the number of seconds waited
+    def wait(self, round: int, timeout: float = None) -> float:
+        start = time()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self.last_round is None or self.last_round < round:
+                    if self._poller is None:
+                        self._error = None
+                        self._poller = threading.Thread(target=self._poll, daemon=True)
+                        self._poller.start()
+                    remaining = None if deadline is None else deadline - time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Round {} not reached within {}s".format(round, timeout))
+                    self._cond.wait(remaining)
+                    if self._error is not None:
+                        raise self._error
+            finally:
+                self._waiting -= 1
+        return time() - start
+
+    def _publish(self, last_round):
+        with self._cond:
+            if self.last_round is None or last_round > self.last_round:
+                self.last_round = last_round
+            self._cond.notify_all()
+
+    def _poll(self):
+        try:
+            last_round = self.client.status().get('last-round')
+            self._publish(last_round)
+            while True:
+                with self._cond:
+                    if self._waiting == 0:
+                        self._poller = None
+                        return
+                last_round = self.client.status_after_block(last_round).get('last-round')
+                self._publish(last_round)
+        except Exception as err:
+            with self._cond:
+                self._error = err
+                self._poller = None
+                self._cond.notify_all()
+
+
+_shared_state_lock = threading.Lock()
+_round_waiters = weakref.WeakKeyDictionary()
+_params_providers = weakref.WeakKeyDictionary()
+
+
+def _per_client(cache, client, factory):
+    with _shared_state_lock:
+        value = cache.get(client)
+        if value is None:
+            value = cache[client] = factory(client)
+        return value
+
+
+# Returns the RoundWaiter shared by all callers using the same client
+def get_round_waiter(client: algod.AlgodClient) -> RoundWaiter:
+    return _per_client(_round_waiters, client, RoundWaiter)
+
+
+# Function waits until a block with specific round has been accepted and returns the seconds it waited
 def waitUntilRound(
         client: algod.AlgodClient,
         round: int,
-):
+) -> float:
     print("Waiting for round {} ...".format(round))
-    currentRound = client.status().get('last-round')
-    while not currentRound >= round:
-        currentRound = client.status().get('last-round')
-        sleep(1)
-
-
-# helper function to compile program source
-def compile_program(client, source_code):
-    compile_response = client.compile(source_code)
-    return base64.b64decode(compile_response["result"])
+    return get_round_waiter(client).wait(round)
+
+
+# Hands out suggested transaction parameters, fetching them from the node at most once per round.
+# Cached params are refreshed as soon as the client's RoundWaiter has seen a newer round, or once they are
+# older than max_age seconds (about one block) when nobody is following the chain.
+# Policies applied to every copy handed out:
+#   validity_rounds - number of rounds a transaction stays valid (last - first), node default if None
+#   flat_fee - fixed fee in microAlgos per transaction, node suggested fee if None
+class SuggestedParamsProvider:
+    def __init__(self, client: algod.AlgodClient, max_age: float = 3.5,
+                 validity_rounds: int = None, flat_fee: int = None):
+        self.client = client
+        self.max_age = max_age
+        self.validity_rounds = validity_rounds
+        self.flat_fee = flat_fee
+        self._params = None
+        self._fetched_at = 0
+        self._lock = threading.Lock()
+
+    def _is_stale(self) -> bool:
+        if self._params is None or time() - self._fetched_at > self.max_age:
+            return True
+        last_round = get_round_waiter(self.client).last_round
+        return last_round is not None and last_round > self._params.first
+
+    def _fetch(self):
+        self._params = self.client.suggested_params()
+        self._fetched_at = time()
+
+    # Drops the cached params, e.g. after the node rejected a transaction built from them
+    def invalidate(self):
+        with self._lock:
+            self._params = None
+
+    def get(self) -> transaction.SuggestedParams:
+        with self._lock:
+            if self._is_stale():
+                self._fetch()
+            # hand out a copy so callers tweaking fee or validity do not alter the cached params
+            sp = copy.copy(self._params)
+        if self.validity_rounds is not None:
+            sp.last = sp.first + self.validity_rounds
+        if self.flat_fee is not None:
+            sp.flat_fee = True
+            sp.fee = self.flat_fee
+        return sp
+
+
+# Returns the SuggestedParamsProvider shared by all transaction builders using the same client
+def get_params_provider(client: algod.AlgodClient) -> SuggestedParamsProvider:
+    return _per_client(_params_providers, client, SuggestedParamsProvider)
+
+
+# helper function returning suggested params for a new transaction from the client's shared provider
+def suggested_params(client: algod.AlgodClient) -> transaction.SuggestedParams:
+    return get_params_provider(client).get()
+
+
+# Directory of the content-addressed cache of compiled programs, next to this module unless
+# NAM_COMPILE_CACHE points elsewhere
+COMPILE_CACHE_DIR = os.environ.get(
+    "NAM_COMPILE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".compile_cache"))
+
+
+def _cache_path(name: str) -> str:
+    return os.path.join(COMPILE_CACHE_DIR, name)
+
+
+def _read_cache(name: str, mode: str = "r"):
+    try:
+        with open(_cache_path(name), mode) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _write_cache(name: str, data, mode: str = "w"):
+    os.makedirs(COMPILE_CACHE_DIR, exist_ok=True)
+    # write to a temporary file first so concurrent deployers never read a partial entry
+    tmp = _cache_path("{}.{}.tmp".format(name, os.getpid()))
+    with open(tmp, mode) as f:
+        f.write(data)
+    os.replace(tmp, _cache_path(name))
+
+
+# helper function to compile program source, reusing the bytecode cached under the hash of the TEAL source.
+# Programs are assembled locally by default; with offline=False the node's /compile endpoint is used instead,
+# which requires EnableDeveloperAPI in the node's config.
+def compile_program(client, source_code, offline=True):
+    key = hashlib.sha256(source_code.encode("utf-8")).hexdigest()
+    program = _read_cache(key + ".bin", "rb")
+    if program is None:
+        if offline:
+            from nam.teal_assembler import assemble
+            program = assemble(source_code)
+        else:
+            compile_response = client.compile(source_code)
+            program = base64.b64decode(compile_response["result"])
+        _write_cache(key + ".bin", program, "wb")
+    return program
+
+
+# helper function to compile a contract Router to TEAL and ABI, reusing the output cached under the hash of
+# the PyTeal source defining it, the PyTeal version and the compiler options
+def compile_router(getRouter, version: int, optimize=None):
+    module = sys.modules[getRouter.__module__]
+    with open(module.__file__, "rb") as f:
+        source = f.read()
+    options = sorted((k, repr(v)) for k, v in vars(optimize).items()) if optimize is not None else []
+    key = hashlib.sha256(
+        source + repr((importlib.metadata.version("pyteal"), version, options)).encode("utf-8")
+    ).hexdigest()
+
+    approval_program = _read_cache(key + ".approval.teal")
+    clear_program = _read_cache(key + ".clear.teal")
+    js = _read_cache(key + ".json")
+    if approval_program is None or clear_program is None or js is None:
+        approval_program, clear_program, contract = getRouter().compile_program(version=version,
+                                                                                optimize=optimize)
+        _write_cache(key + ".approval.teal", approval_program)
+        _write_cache(key + ".clear.teal", clear_program)
+        _write_cache(key + ".json", json.dumps(contract.dictify()))
+    else:
+        contract = Contract.from_json(js)
+    return approval_program, clear_program, contract
 
 
 # helper function that converts a mnemonic passphrase into a private signing key
@@ -47,21 +251,147 @@ def format_state(state):
     return formatted
 
 
-# helper function to read app global state
-def read_global_state(client, app_id):
+# Base class of typed, slotted views of an app's state, one subclass per contract state schema.
+# decode() only looks at the keys of its schema: they are matched in their base64 form, so no key is decoded,
+# and unknown keys are skipped. Byte values (e.g. addresses) stay raw bytes, keys missing on chain are None.
+class StateView:
+    __slots__ = ()
+    # base64 encoded state key -> slot name
+    _fields = {}
+    _keys = {}
+
+    @classmethod
+    def decode(cls, state):
+        view = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(view, name, None)
+        fields = cls._fields
+        b64decode = base64.b64decode
+        for item in state:
+            name = fields.get(item["key"])
+            if name is not None:
+                value = item["value"]
+                setattr(view, name, b64decode(value["bytes"]) if value["type"] == 1 else value["uint"])
+        return view
+
+    # Returns a narrower view class decoding only the given slots
+    @classmethod
+    def only(cls, *names):
+        return state_view_class(cls.__name__, {name: cls._keys[name] for name in names})
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__,
+                               ", ".join("{}={!r}".format(k, v) for k, v in self.as_dict().items()))
+
+
+# Creates a StateView subclass from a mapping of slot name -> raw state key
+def state_view_class(name: str, keys: dict) -> type:
+    return type(name, (StateView,), {
+        "__slots__": tuple(keys),
+        "_keys": dict(keys),
+        "_fields": {base64.b64encode(key).decode("ascii"): slot for slot, key in keys.items()},
+    })
+
+
+def _pyteal_bytes(expr) -> bytes:
+    if expr.base == "utf8":
+        return json.loads(expr.byte_str).encode("utf-8")
+    if expr.base == "base16":
+        return bytes.fromhex(expr.byte_str[2:] if expr.byte_str.startswith("0x") else expr.byte_str)
+    if expr.base == "base64":
+        return base64.b64decode(expr.byte_str)
+    return base64.b32decode(expr.byte_str + "=" * (-len(expr.byte_str) % 8))
+
+
+# Generates the global and local state views of a contract from the `*_key` (global) and `*_local_key` (local)
+# PyTeal Bytes constants of its module namespace; slots are named after the constants without the suffix,
+# e.g. lead_bid_account_key -> lead_bid_account
+def state_views_from_keys(name: str, namespace: dict):
+    global_keys = {}
+    local_keys = {}
+    for constant, expr in namespace.items():
+        if not constant.endswith("_key") or not hasattr(expr, "byte_str"):
+            continue
+        if constant.endswith("_local_key"):
+            local_keys[constant[:-len("_local_key")]] = _pyteal_bytes(expr)
+        else:
+            global_keys[constant[:-len("_key")]] = _pyteal_bytes(expr)
+    return state_view_class(name + "GlobalState", global_keys), state_view_class(name + "LocalState", local_keys)
+
+
+# Checks that the `*_key` / `*_local_key` constants of a PyTeal contract module match the state views of its
+# PyTeal-free client interface
+def check_state_views(namespace: dict, global_view: type, local_view: type):
+    contract_global, contract_local = state_views_from_keys("", namespace)
+    if contract_global._keys != global_view._keys or contract_local._keys != local_view._keys:
+        raise Exception("The state keys of {} do not match its interface".format(namespace.get("__name__")))
+
+
+# helper function to read app global state, formatted as a dict or decoded into the given StateView class
+def read_global_state(client, app_id, view=None):
     app = client.application_info(app_id)
     global_state = (
         app["params"]["global-state"] if "global-state" in app["params"] else []
     )
+    if view is not None:
+        return view.decode(global_state)
     return format_state(global_state)
 
-def read_local_state(client, addr, app_id) :
-    results = client.account_info(addr)
-    local_state = results['apps-local-state'][0]
-    for index in local_state:
-        if local_state[index] == app_id :
-            local = local_state['key-value']
-    return format_state(local)
+
+# Runs fn(item) for every item on a bounded thread pool.
+# Returns (results, errors), both keyed by item: the result of every call that succeeded and the exception
+# raised by every call that failed, so one failing item does not hide the others.
+def map_concurrently(fn, items, max_workers=32):
+    results = {}
+    errors = {}
+    items = list(dict.fromkeys(items))
+    if not items:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        # each call runs in a copy of the caller's context, so contextvars (e.g. the nam.metrics operation) follow it
+        futures = {pool.submit(contextvars.copy_context().run, fn, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                results[item] = future.result()
+            except Exception as err:
+                errors[item] = err
+    return results, errors
+
+
+# helper function to read the global state of many apps concurrently.
+# Returns (states, errors): global states keyed by app ID, formatted or decoded into the given StateView class,
+# and the error raised for each app that could not be read (e.g. a deleted app).
+def read_global_states(client, app_ids, max_workers=32, view=None):
+    return map_concurrently(lambda app_id: read_global_state(client, app_id, view), app_ids, max_workers)
+
+# helper function to read the local state of one account in one app through the per-account-per-application
+# endpoint, formatted as a dict or decoded into the given StateView class (e.g. the contract's BidderState).
+# Returns None if the account has not opted in to the app.
+def read_local_state(client, addr, app_id, view=None):
+    try:
+        info = client.account_application_info(addr, app_id)
+    except AlgodHTTPError as err:
+        if err.code == 404:
+            return None
+        raise
+    local_state = info.get("app-local-state", {}).get("key-value", [])
+    if view is not None:
+        return view.decode(local_state)
+    return format_state(local_state)
+
+
+# helper function to read the local state of many bidders of one app concurrently.
+# Returns (states, errors): local states keyed by address (None for accounts that have not opted in),
+# formatted or decoded into the given StateView class, and the error raised for each unreadable address.
+def read_local_states(client, addrs, app_id, max_workers=32, view=None):
+    return map_concurrently(lambda addr: read_local_state(client, addr, app_id, view), addrs, max_workers)
 
 def optInToAsset(
         client: algod.AlgodClient, assetID: int, sk: str
@@ -69,7 +399,7 @@ def optInToAsset(
     txn = transaction.AssetOptInTxn(
         sender=account.address_from_private_key(sk),
         index=assetID,
-        sp=client.suggested_params(),
+        sp=suggested_params(client),
     )
     signedTxn = txn.sign(sk)
 
@@ -87,7 +417,7 @@ def create_app(
     on_complete = transaction.OnComplete.NoOpOC.real
 
     # get node suggested parameters
-    params = client.suggested_params()
+    params = suggested_params(client)
 
     # create unsigned transaction
     txn = transaction.ApplicationCreateTxn(
@@ -127,13 +457,79 @@ def create_app(
 
     return app_id
 
-# Utility function to get the Method object for a given method name
+# Process-wide index of the ABI methods of one contract, by name and by 4-byte selector.
+# The Contract is obtained from loader() on first use, so defining a registry costs nothing until a method
+# is needed, and every later lookup is a dictionary access without any I/O or parsing.
+class MethodRegistry:
+    def __init__(self, loader):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._contract = None
+        self._by_name = None
+        self._by_selector = None
+
+    def _load(self):
+        with self._lock:
+            if self._contract is None:
+                contract = self._loader()
+                self._by_name = {m.name: m for m in contract.methods}
+                self._by_selector = {m.get_selector(): m for m in contract.methods}
+                self._contract = contract
+
+    @property
+    def contract(self) -> Contract:
+        if self._contract is None:
+            self._load()
+        return self._contract
+
+    def get(self, name: str) -> Method:
+        if self._contract is None:
+            self._load()
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise Exception("No method with the name {}".format(name)) from None
+
+    def get_by_selector(self, selector: bytes) -> Method:
+        if self._contract is None:
+            self._load()
+        try:
+            return self._by_selector[bytes(selector)]
+        except KeyError:
+            raise Exception("No method with the selector {}".format(bytes(selector).hex())) from None
+
+
+_method_registries = {}
+
+
+# Returns the registry of a contract variant, created with the given loader the first time it is requested
+def get_method_registry(name: str, loader=None) -> MethodRegistry:
+    with _shared_state_lock:
+        registry = _method_registries.get(name)
+        if registry is None:
+            if loader is None:
+                raise Exception("No method registry for contract {}".format(name))
+            registry = _method_registries[name] = MethodRegistry(loader)
+        return registry
+
+
+# Checks that the ABI of a compiled contract Router matches the one declared by its PyTeal-free client interface
+def check_methods(interface: Contract, contract: Contract):
+    if interface.dictify() != contract.dictify():
+        raise Exception("The ABI of contract {} does not match its interface: update the interface with {}".format(
+            contract.name, json.dumps(contract.dictify())))
+
+
+# Imports the module `name` living next to module `module_name`, be it part of a package or a top-level module
+# (scripts run from its directory)
+def import_sibling(module_name: str, name: str):
+    package = module_name.rpartition(".")[0]
+    return importlib.import_module(package + "." + name if package else name)
+
+
+# Utility function to get the Method object for a given method name from the contract JSON
 def get_method(name: str, js: str) -> Method:
-    c = Contract.from_json(js)
-    for m in c.methods:
-        if m.name == name:
-            return m
-    raise Exception("No method with the name {}".format(name))
+    return get_method_registry(js, lambda: Contract.from_json(js)).get(name)
 
 
 # call application from contract
@@ -144,7 +540,7 @@ def call_app_from_contract(client, private_key, index, contract, method_name="in
     signer = AccountTransactionSigner(private_key)
 
     # get node suggested parameters
-    sp = client.suggested_params()
+    sp = suggested_params(client)
 
     # Create an instance of AtomicTransactionComposer
     atc = AtomicTransactionComposer()
@@ -172,7 +568,7 @@ def call_app(client, private_key, index, contract, method_name="increment", meth
     signer = AccountTransactionSigner(private_key)
 
     # get node suggested parameters
-    sp = client.suggested_params()
+    sp = suggested_params(client)
 
     # Create an instance of AtomicTransactionComposer
     atc = AtomicTransactionComposer()
@@ -212,7 +608,7 @@ def createDummyAsset(client: algod.AlgodClient, total: int,
         asset_name=f"AlgorandGOT",
         url=f"https://github.com/algorand-school/handson-contract/blob/main/image/algorand_throne.jpg",
         note=randomNote,
-        sp=client.suggested_params(),
+        sp=suggested_params(client),
     )
     signedTxn = txn.sign(sk)
 
@@ -223,12 +619,187 @@ def createDummyAsset(client: algod.AlgodClient, total: int,
     assert response['asset-index'] is not None and response['asset-index'] > 0
     return response['asset-index']
 
+# Mints count NFTs of `total` units each in atomic groups of AssetCreateTxns, spread round-robin over creators,
+# a list of (address, private key) pairs. All groups are submitted before waiting, so a few rounds are enough
+# whatever the count. unit_name, asset_name and url are templates formatted with the index i of the asset.
+# Returns (asset_ids, failures): the created asset IDs in index order, taken from the confirmed transactions
+# (None for assets whose group failed), and a dict index -> error.
+def createDummyAssets(client: algod.AlgodClient, creators, count: int, total: int = 1,
+                      unit_name: str = "ALGOT", asset_name: str = "AlgorandGOT #{i}",
+                      url: str = "https://github.com/algorand-school/handson-contract/blob/main/image/algorand_throne.jpg",
+                      wait_rounds=10, signing_service=None):
+    sp = bulk_suggested_params(client)
+    groups = []
+    # asset indexes minted by each group
+    group_indexes = []
+    for c, (creator, _) in enumerate(creators):
+        indexes = list(range(c, count, len(creators)))
+        txns = [transaction.AssetCreateTxn(
+            sender=creator,
+            total=total,
+            decimals=0,
+            default_frozen=False,
+            manager=creator,
+            reserve=creator,
+            freeze=creator,
+            clawback=creator,
+            unit_name=unit_name.format(i=i),
+            asset_name=asset_name.format(i=i),
+            url=url.format(i=i),
+            # this random note reduces the likelihood of this transaction looking like a duplicate
+            note=os.urandom(20),
+            sp=sp,
+        ) for i in indexes]
+        for group in make_groups(txns):
+            groups.append(group)
+            group_indexes.append(indexes[:len(group)])
+            indexes = indexes[len(group):]
+    signed_groups = sign_groups(groups, dict(creators), signing_service)
+
+    failures = {}
+    sent, send_errors = map_concurrently(lambda g: send_signed_group(client, signed_groups[g]), range(len(groups)))
+    for g, err in send_errors.items():
+        failures.update((i, err) for i in group_indexes[g])
+    # first txid of each submitted group -> group position
+    submitted = {txid: g for g, txid in sent.items()}
+
+    confirmed, errors = wait_for_confirmations(client, submitted, wait_rounds)
+    for txid, err in errors.items():
+        failures.update((i, err) for i in group_indexes[submitted[txid]])
+    # every transaction of a confirmed group is confirmed: look up the asset each one created
+    txids = {}
+    for txid in confirmed:
+        for txn, i in zip(groups[submitted[txid]], group_indexes[submitted[txid]]):
+            txids[txn.get_txid()] = i
+    infos, lookup_errors = map_concurrently(client.pending_transaction_info, txids)
+    asset_ids = [None] * count
+    for txid, i in txids.items():
+        if txid in infos:
+            asset_ids[i] = infos[txid]['asset-index']
+        else:
+            failures[i] = lookup_errors[txid]
+    return asset_ids, failures
+
+
+# Maximum number of transactions in an atomic group
+MAX_GROUP_SIZE = 16
+
+
+# Suggested params for building many transactions at once. While the network is not congested (no fee per byte)
+# every transaction pays the minimum fee: the fee is then set flat, which spares the SDK from encoding each
+# transaction to estimate its size.
+def bulk_suggested_params(client: algod.AlgodClient) -> transaction.SuggestedParams:
+    sp = suggested_params(client)
+    if not sp.flat_fee and sp.fee == 0:
+        sp.flat_fee = True
+        sp.fee = sp.min_fee or constants.min_txn_fee
+    return sp
+
+
+# Splits transactions into atomic groups of up to MAX_GROUP_SIZE and assigns their group IDs
+def make_groups(txns):
+    groups = [txns[i:i + MAX_GROUP_SIZE] for i in range(0, len(txns), MAX_GROUP_SIZE)]
+    for group in groups:
+        if len(group) > 1:
+            transaction.assign_group_id(group)
+    return groups
+
+
+# Signs groups of transactions with sks, a dict sender address -> private key, in this process or on the worker
+# processes of a nam.signing.SigningService (which yields signed msgpack blobs)
+def sign_groups(groups, sks, signing_service=None):
+    if signing_service is None:
+        return [[txn.sign(sks[txn.sender]) for txn in group] for group in groups]
+    handles = {sender: signing_service.add_key(sk) for sender, sk in sks.items()}
+    blobs = iter(signing_service.sign([(handles[txn.sender], txn) for group in groups for txn in group]))
+    return [[next(blobs) for _ in group] for group in groups]
+
+
+# Submits a signed group, as SignedTransactions or signed msgpack blobs
+def send_signed_group(client, signed_group):
+    if isinstance(signed_group[0], bytes):
+        return client.send_raw_transaction(base64.b64encode(b"".join(signed_group)))
+    return client.send_transactions(signed_group)
+
+
+# Waits for many transactions at once, checking every pending one once per round.
+# Returns (confirmed, errors): the pending info of every confirmed transaction and the error of every transaction
+# rejected by the node or not confirmed within wait_rounds rounds, both keyed by txid.
+def wait_for_confirmations(client, txids, wait_rounds=10, max_workers=32):
+    pending = list(dict.fromkeys(txids))
+    confirmed = {}
+    errors = {}
+    current_round = client.status().get('last-round')
+    last_round = current_round + wait_rounds
+    while pending:
+        infos, _ = map_concurrently(client.pending_transaction_info, pending, max_workers)
+        still_pending = []
+        for txid in pending:
+            # a failed lookup is retried next round, like transaction.wait_for_confirmation does
+            info = infos.get(txid, {})
+            if info.get('confirmed-round', 0) > 0:
+                confirmed[txid] = info
+            elif info.get('pool-error'):
+                errors[txid] = TransactionRejectedError("Transaction rejected: " + info['pool-error'])
+            else:
+                still_pending.append(txid)
+        pending = still_pending
+        if pending:
+            if current_round >= last_round:
+                for txid in pending:
+                    errors[txid] = ConfirmationTimeoutError(
+                        "Wait for transaction id {} timed out".format(txid))
+                break
+            current_round += 1
+            get_round_waiter(client).wait(current_round)
+    return confirmed, errors
+
+
+# Funds many accounts from one sender. payments is an iterable of (receiver, amount) pairs: they are packed into
+# atomic groups of up to MAX_GROUP_SIZE payments, signed in one pass and all submitted before waiting, so they
+# are confirmed in about one round whatever their number.
+# Returns a dict receiver -> error for every payment that failed. A group rejected by the node is resubmitted
+# one payment at a time, so that only the faulty receivers are reported.
+# Signing runs on the given nam.signing.SigningService if any, in this process otherwise.
+def fundAccounts(client, sender, sender_sk, payments, wait_rounds=10, signing_service=None):
+    sp = bulk_suggested_params(client)
+    groups = make_groups([transaction.PaymentTxn(sender=sender, receiver=receiver, amt=amt, sp=sp)
+                          for receiver, amt in payments])
+    signed_groups = sign_groups(groups, {sender: sender_sk}, signing_service)
+
+    failures = {}
+    # first txid of each submitted group -> receivers paid by the group
+    submitted = {}
+    for group, signed_group in zip(groups, signed_groups):
+        try:
+            send_signed_group(client, signed_group)
+            submitted[group[0].get_txid()] = [txn.receiver for txn in group]
+            continue
+        except AlgodHTTPError as err:
+            if len(group) == 1:
+                failures[group[0].receiver] = err
+                continue
+        for txn in group:
+            txn.group = None
+            signedTxn = txn.sign(sender_sk)
+            try:
+                client.send_transaction(signedTxn)
+                submitted[signedTxn.get_txid()] = [txn.receiver]
+            except AlgodHTTPError as err:
+                failures[txn.receiver] = err
+
+    _, errors = wait_for_confirmations(client, submitted, wait_rounds)
+    for txid, err in errors.items():
+        for receiver in submitted[txid]:
+            failures[receiver] = err
+    return failures
+
 def fundAccount(client, sender, receiver, sender_sk, amt):
     txn = transaction.PaymentTxn(
         sender=sender,
         receiver=receiver,
         amt=amt,
-        sp=client.suggested_params(),
+        sp=suggested_params(client),
     )
     signedTxn = txn.sign(sender_sk)
     client.send_transaction(signedTxn)